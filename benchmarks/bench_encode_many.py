@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark GenerateQrCode.encode_many and InvoiceBatch against the per-object path.
+
+Usage:
+    python benchmarks/bench_encode_many.py [rows]
+"""
+
+import sys
+import time
+
+from pyzatca import GenerateQrCode, InvoiceBatch
+from pyzatca.models.invoice_batch import to_epoch, to_halalas
+from pyzatca.tags import Seller, TaxNumber, InvoiceDate, InvoiceTotalAmount, InvoiceTaxAmount
+
+
+def make_rows(count: int) -> list:
+    """Build realistic Phase 1 rows for a handful of merchants."""
+    sellers = [
+        ('شركة حدث لتقنية المعلومات', '312087593400003'),
+        ('Salla', '310461435700003'),
+        ('مؤسسة النخبة التجارية', '300000000000003'),
+    ]
+    rows = []
+    for index in range(count):
+        seller, tax_number = sellers[(index // 100) % len(sellers)]
+        total = 100 + index % 900
+        rows.append((
+            seller,
+            tax_number,
+            '2025-08-05T07:%02d:%02dZ' % (index // 60 % 60, index % 60),
+            '%d.00' % total,
+            '%.2f' % (total * 0.15),
+        ))
+    return rows
+
+
+def per_object(rows: list) -> list:
+    return [
+        GenerateQrCode.from_array([
+            Seller(seller),
+            TaxNumber(tax_number),
+            InvoiceDate(date),
+            InvoiceTotalAmount(total),
+            InvoiceTaxAmount(tax),
+        ]).to_base64()
+        for seller, tax_number, date, total, tax in rows
+    ]
+
+
+def batch(rows: list) -> list:
+    return list(GenerateQrCode.encode_many(rows))
+
+
+def to_columns(rows: list) -> tuple:
+    """Convert rows to the columns a reporting job would load: halalas and epoch seconds."""
+    sellers, tax_numbers, dates, totals, taxes = zip(*rows)
+    return (
+        sellers,
+        tax_numbers,
+        [to_epoch(date) for date in dates],
+        [to_halalas(total) for total in totals],
+        [to_halalas(tax) for tax in taxes],
+    )
+
+
+def columnar(columns: tuple) -> list:
+    return InvoiceBatch.from_columns(*columns).to_base64()
+
+
+def measure(cases: dict, count: int, rounds: int = 5) -> dict:
+    """Return the best throughput of each case, in rows per second, over interleaved rounds."""
+    best = dict.fromkeys(cases, float('inf'))
+    for _ in range(rounds):
+        # Interleaving the cases keeps a noisy machine from favouring one of them
+        for name, (func, argument) in cases.items():
+            start = time.perf_counter()
+            func(argument)
+            best[name] = min(best[name], time.perf_counter() - start)
+    return {name: count / seconds for name, seconds in best.items()}
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rows = make_rows(count)
+    assert per_object(rows[:1000]) == batch(rows[:1000])
+    assert columnar(to_columns(rows[:1000])) == batch(rows[:1000])
+    
+    rates = measure({
+        'per-object': (per_object, rows),
+        'encode_many': (batch, rows),
+        'InvoiceBatch': (columnar, to_columns(rows)),
+    }, count)
+    object_rate = rates['per-object']
+    for name, rate in rates.items():
+        print(f"{name}: {rate:,.0f} rows/s ({rate / object_rate:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
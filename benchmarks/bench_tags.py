@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Measure the memory footprint and speed of Tag objects.
+
+Usage:
+    python benchmarks/bench_tags.py [tags]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from pyzatca.tags import Seller, TaxNumber, InvoiceDate, InvoiceTotalAmount, InvoiceTaxAmount
+
+
+def make_receipt(index: int) -> list:
+    """Build the five Phase 1 tags of one receipt, with values unique per receipt."""
+    return [
+        Seller('شركة حدث لتقنية المعلومات'),
+        TaxNumber('312087593400003'),
+        InvoiceDate('2025-08-05T07:%02d:%02dZ' % (index // 60 % 60, index % 60)),
+        InvoiceTotalAmount('%d.00' % (100 + index)),
+        InvoiceTaxAmount('%.2f' % ((100 + index) * 0.15)),
+    ]
+
+
+def measure_memory(receipts: int) -> float:
+    """Return the bytes allocated per tag while holding every receipt in memory."""
+    tracemalloc.start()
+    held = [make_receipt(index) for index in range(receipts)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return current / (receipts * 5)
+
+
+def measure(func, receipts: int) -> float:
+    """Return the best rate, in tags per second, over three runs."""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        func(receipts)
+        best = min(best, time.perf_counter() - start)
+    return receipts * 5 / best
+
+
+def construct(receipts: int) -> None:
+    for index in range(receipts):
+        make_receipt(index)
+
+
+def main():
+    receipts = int(sys.argv[1]) // 5 if len(sys.argv) > 1 else 200000
+    tags = [tag for index in range(1000) for tag in make_receipt(index)]
+    
+    print(f"memory: {measure_memory(receipts):,.0f} bytes/tag")
+    print(f"construct: {measure(construct, receipts):,.0f} tags/s")
+    print(f"__str__: {measure(lambda n: [str(tag) for tag in tags * (n // 1000)], receipts):,.0f} tags/s")
+    print(f"to_bytes: {measure(lambda n: [tag.to_bytes() for tag in tags * (n // 1000)], receipts):,.0f} tags/s")
+
+
+if __name__ == "__main__":
+    main()
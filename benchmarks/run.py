@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the pyzatca hot paths.
+
+Every run is appended to a JSON history file, so results can be compared
+across upgrades. With --compare, the run is checked against a baseline and
+the script exits with status 1 when a benchmark is slower than the
+threshold allows.
+
+Usage:
+    python benchmarks/run.py [--output results.json] [--filter NAME] [--quick]
+    python benchmarks/run.py --compare previous --threshold 0.10
+    python benchmarks/run.py --compare baseline.json --no-save
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import pyzatca
+from pyzatca import Certificate, CSRRequest, GenerateCSR, GenerateQrCode, InvoiceSign
+from pyzatca.helpers.certificate import certificate_registry
+from pyzatca.helpers.invoice_hasher import InvoiceHasher
+from pyzatca.invoice_chain import InvoiceChain
+from pyzatca.qr_verifier import QrVerifier
+from pyzatca.tags import Seller, TaxNumber, InvoiceDate, InvoiceTotalAmount, InvoiceTaxAmount
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results.json')
+
+ARABIC_INVOICE = ('شركة حدث لتقنية المعلومات', '312087593400003', '2025-08-05T07:21:06Z', '1150.00', '150.00')
+ENGLISH_INVOICE = ('Salla Electronic Commerce Company', '310461435700003', '2025-08-05T07:21:06Z', '100.00', '15.00')
+
+
+def make_qr_code(row: tuple) -> GenerateQrCode:
+    seller, tax_number, date, total, tax = row
+    return GenerateQrCode.from_array([
+        Seller(seller),
+        TaxNumber(tax_number),
+        InvoiceDate(date),
+        InvoiceTotalAmount(total),
+        InvoiceTaxAmount(tax),
+    ])
+
+
+def make_csr_request() -> CSRRequest:
+    return (CSRRequest.make()
+        .set_uid('312087593400003')
+        .set_serial_number('POS', '1.0', '0001')
+        .set_common_name('شركة حدث لتقنية المعلومات')
+        .set_organization_name('شركة حدث لتقنية المعلومات')
+        .set_organizational_unit_name('Riyadh Branch')
+        .set_country_name('SA'))
+
+
+def make_certificate_pair() -> tuple:
+    """Create a self-signed SECP256K1 certificate shaped like a ZATCA compliance certificate."""
+    from cryptography import x509
+    from cryptography.x509.oid import NameOID
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    
+    private_key = ec.generate_private_key(ec.SECP256K1())
+    subject = x509.Name([
+        x509.NameAttribute(NameOID.COMMON_NAME, 'POS-0001'),
+        x509.NameAttribute(NameOID.ORGANIZATION_NAME, 'شركة حدث لتقنية المعلومات'),
+        x509.NameAttribute(NameOID.COUNTRY_NAME, 'SA'),
+    ])
+    issuer = x509.Name([
+        x509.NameAttribute(NameOID.COMMON_NAME, 'TSZEINVOICE-SubCA-1'),
+        x509.NameAttribute(NameOID.DOMAIN_COMPONENT, 'gov'),
+    ])
+    now = datetime.datetime(2025, 1, 1)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(subject)
+        .issuer_name(issuer)
+        .public_key(private_key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=365))
+        .sign(private_key, hashes.SHA256())
+    )
+    return (
+        certificate.public_bytes(serialization.Encoding.PEM).decode('utf-8'),
+        private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        ).decode('utf-8'),
+    )
+
+
+def make_invoice_xml() -> str:
+    lines = ''.join(
+        f'<cac:InvoiceLine><cbc:ID>{line}</cbc:ID><cbc:LineExtensionAmount currencyID="SAR">100.00'
+        f'</cbc:LineExtensionAmount><cac:Item><cbc:Name>منتج {line}</cbc:Name></cac:Item></cac:InvoiceLine>'
+        for line in range(1, 11)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2" '
+        'xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2" '
+        'xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2">'
+        '<cbc:ID>SME00010</cbc:ID><cbc:IssueDate>2025-08-05</cbc:IssueDate>'
+        f'{lines}</Invoice>'
+    )
+
+
+def load_certificate(certificate_pem: str, private_key_pem: str) -> Certificate:
+    """Parse a certificate and its key from PEM, bypassing the certificate registry."""
+    certificate_registry.clear()
+    certificate = Certificate(certificate_pem, private_key_pem)
+    certificate.get_private_key()
+    return certificate
+
+
+def build_benchmarks() -> dict:
+    """Build the benchmark callables, keyed by name."""
+    arabic = make_qr_code(ARABIC_INVOICE)
+    english = make_qr_code(ENGLISH_INVOICE)
+    seller = Seller(ARABIC_INVOICE[0])
+    csr_request = make_csr_request()
+    certificate_pem, private_key_pem = make_certificate_pair()
+    certificate = Certificate(certificate_pem, private_key_pem)
+    invoice_xml = make_invoice_xml()
+    signed_qr_code = InvoiceSign(invoice_xml, certificate).get_qr_code()
+    verifier = QrVerifier([certificate])
+    chain = InvoiceChain('egs-1', certificate)
+    
+    benchmarks = {
+        'tag.str': lambda: str(seller),
+        'qr.to_tlv.arabic': arabic.to_tlv,
+        'qr.to_tlv.english': english.to_tlv,
+        'qr.to_base64.arabic': arabic.to_base64,
+        'qr.to_base64.english': english.to_base64,
+        'qr.build_and_encode': lambda: make_qr_code(ARABIC_INVOICE).to_base64(),
+        'qr.template.to_base64': lambda: GenerateQrCode.template(*ARABIC_INVOICE[:2]).to_base64(*ARABIC_INVOICE[2:]),
+        'csr.generate': lambda: GenerateCSR.from_request(csr_request).generate(),
+        'certificate.load': lambda: load_certificate(certificate_pem, private_key_pem),
+        'invoice_hasher.hash': lambda: InvoiceHasher().update(invoice_xml).digest(),
+        'invoice_sign.get_qr_code': lambda: InvoiceSign(invoice_xml, certificate).get_qr_code(),
+        'invoice_sign.get_invoice': lambda: InvoiceSign(invoice_xml, certificate).get_invoice(),
+        'invoice_chain.sign': lambda: chain.sign(invoice_xml),
+        'qr_verifier.verify': lambda: verifier.verify(signed_qr_code),
+    }
+    try:
+        import qrcode  # noqa: F401
+    except ImportError:
+        print('qrcode is not installed, skipping render benchmarks', file=sys.stderr)
+    else:
+        benchmarks['qr.render.arabic'] = arabic.render
+        benchmarks['qr.render.english'] = english.render
+    return benchmarks
+
+
+def measure(func, min_time: float, repeat: int) -> dict:
+    """
+    Time a callable.
+    
+    The loop count is calibrated so one repeat takes at least min_time
+    seconds; statistics are per call over the repeats.
+    """
+    func()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= max(2, min(10, int(min_time / max(elapsed, 1e-9)) + 1))
+    
+    timings = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((time.perf_counter() - start) / loops)
+    
+    best = min(timings)
+    return {
+        'loops': loops,
+        'best_ns': best * 1e9,
+        'median_ns': statistics.median(timings) * 1e9,
+        'stdev_ns': (statistics.stdev(timings) if len(timings) > 1 else 0.0) * 1e9,
+        'ops_per_sec': 1 / best,
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def load_history(path: str) -> dict:
+    if not os.path.exists(path):
+        return {'runs': []}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_history(path: str, history: dict) -> None:
+    """Write the history atomically so an interrupted run cannot corrupt it."""
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    os.replace(temp_path, path)
+
+
+def resolve_baseline(spec: str, history: dict) -> dict:
+    """Get the baseline run: 'previous' for the last recorded run, or a results file."""
+    if spec == 'previous':
+        if not history['runs']:
+            raise SystemExit('no previous run recorded to compare against')
+        return history['runs'][-1]
+    baseline = load_history(spec)
+    if not baseline['runs']:
+        raise SystemExit(f'no runs recorded in {spec}')
+    return baseline['runs'][-1]
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """
+    Compare two runs by best time per call.
+    
+    Returns:
+        list: (name, baseline ns, current ns, relative change) of every regression
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            print(f'{name:28} new')
+            continue
+        change = result['best_ns'] / before['best_ns'] - 1
+        flag = 'REGRESSION' if change > threshold else ''
+        print(f"{name:28} {before['best_ns']:>14,.0f} ns -> {result['best_ns']:>14,.0f} ns {change:>+8.1%} {flag}")
+        if change > threshold:
+            regressions.append((name, before['best_ns'], result['best_ns'], change))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='JSON history file to append to')
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this')
+    parser.add_argument('--quick', action='store_true', help='shorter timings for a smoke run')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help="'previous' for the last run in the history, or a results JSON file")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='relative slowdown flagged as a regression (default: 0.10)')
+    parser.add_argument('--no-save', action='store_true', help='do not append this run to the history')
+    args = parser.parse_args(argv)
+    
+    min_time, repeat = (0.02, 3) if args.quick else (0.2, 7)
+    history = load_history(args.output)
+    baseline = resolve_baseline(args.compare, history) if args.compare else None
+    
+    results = {}
+    for name, func in build_benchmarks().items():
+        if args.filter not in name:
+            continue
+        results[name] = measure(func, min_time, repeat)
+        print(f"{name:28} {results[name]['best_ns']:>14,.0f} ns/op {results[name]['ops_per_sec']:>14,.0f} ops/s")
+    
+    run = {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'version': pyzatca.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    if not args.no_save:
+        history['runs'].append(run)
+        save_history(args.output, history)
+    
+    if baseline is None:
+        return 0
+    print(f"\ncompared with {baseline.get('revision') or 'baseline'} from {baseline['timestamp']}:")
+    regressions = compare(baseline, run, args.threshold)
+    if regressions:
+        print(f'{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}')
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
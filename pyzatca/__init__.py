@@ -5,24 +5,54 @@ An unofficial package to help developers implement ZATCA (Fatoora) QR code easil
 which is required for Saudi Arabia's e-invoicing system.
 
 This is a Python port of the original PHP library by Salla.
+
+Public classes are imported on first access, so ``import pyzatca`` does not
+load ``cryptography`` unless CSR generation, certificates or signing are used.
 """
 
+import importlib
+from typing import TYPE_CHECKING
+
 __version__ = "1.0.0"
 __author__ = "Python ZATCA Port"
 __email__ = "support@example.com"
 
-from .generate_csr import GenerateCSR
-from .generate_qr_code import GenerateQrCode
-from .models.csr_request import CSRRequest
-from .models.invoice_sign import InvoiceSign
-from .helpers.certificate import Certificate
-from .tags import *
+if TYPE_CHECKING:
+    from .generate_csr import GenerateCSR
+    from .generate_qr_code import GenerateQrCode
+    from .models.csr_request import CSRRequest
+    from .models.invoice_sign import InvoiceSign
+    from .models.invoice_batch import InvoiceBatch
+    from .helpers.certificate import Certificate
+    from .tags import *
+
+_LAZY_IMPORTS = {
+    'GenerateCSR': '.generate_csr',
+    'GenerateQrCode': '.generate_qr_code',
+    'CSRRequest': '.models.csr_request',
+    'InvoiceSign': '.models.invoice_sign',
+    'InvoiceBatch': '.models.invoice_batch',
+    'Certificate': '.helpers.certificate',
+    'Tag': '.tags',
+    'Seller': '.tags',
+    'TaxNumber': '.tags',
+    'InvoiceDate': '.tags',
+    'InvoiceTotalAmount': '.tags',
+    'InvoiceTaxAmount': '.tags',
+    'InvoiceHash': '.tags',
+    'InvoiceDigitalSignature': '.tags',
+    'PublicKey': '.tags',
+    'CertificateSignature': '.tags',
+    'TAG_CLASSES': '.tags',
+    'make_tag': '.tags',
+}
 
 __all__ = [
     'GenerateCSR',
     'GenerateQrCode', 
     'CSRRequest',
     'InvoiceSign',
+    'InvoiceBatch',
     'Certificate',
     'Tag',
     'Seller',
@@ -34,4 +64,17 @@ __all__ = [
     'InvoiceDigitalSignature',
     'PublicKey',
     'CertificateSignature'
-] 
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
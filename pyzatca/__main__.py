@@ -0,0 +1,9 @@
+"""
+Run the ``fatoora`` command with ``python -m pyzatca``.
+"""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
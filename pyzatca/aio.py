@@ -0,0 +1,155 @@
+"""
+Asyncio support for ZATCA rendering, signing and CSR generation.
+
+The CPU bound work runs on an executor so it does not block the event
+loop. An ``AsyncRunner`` caps how many jobs it has on its executor at a
+time; callers past the cap wait their turn, in order. Give large batches
+their own runner with a small cap so they cannot starve interactive
+requests on the default runner.
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class AsyncRunner:
+    """
+    Runs blocking calls on an executor with bounded concurrency.
+    
+    Cancelling a waiting call drops it before it starts. A call that is
+    already running on the executor cannot be interrupted; its slot is
+    released once it actually finishes, so cancelled work still counts
+    against the limit while it holds a worker.
+    """
+    
+    def __init__(self, executor: Optional[Executor] = None, max_concurrency: Optional[int] = None):
+        """
+        Initialize the runner.
+        
+        Args:
+            executor (Executor, optional): Thread or process pool to run calls on;
+                defaults to a thread pool owned by the runner
+            max_concurrency (int, optional): Calls allowed on the executor at a time;
+                defaults to the CPU count
+                
+        Raises:
+            ValueError: If max_concurrency is not positive
+        """
+        max_concurrency = max_concurrency or os.cpu_count() or 1
+        if max_concurrency < 1:
+            raise ValueError('max_concurrency must be positive')
+        self.max_concurrency = max_concurrency
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._semaphore = None
+        self._loop = None
+    
+    @property
+    def executor(self) -> Executor:
+        """The executor calls run on, created on first use when none was given."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix='pyzatca-aio'
+            )
+        return self._executor
+    
+    @property
+    def uses_processes(self) -> bool:
+        """Whether calls run in other processes, so arguments must be picklable."""
+        return isinstance(self._executor, ProcessPoolExecutor)
+    
+    def _get_semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        # A semaphore belongs to one event loop; start afresh when used from another one
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+    
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking call on the executor.
+        
+        Args:
+            func (callable): The function to call
+            *args: Positional arguments for the function
+            **kwargs: Keyword arguments for the function
+            
+        Returns:
+            The function's return value
+            
+        Raises:
+            asyncio.CancelledError: If the calling task is cancelled
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_semaphore(loop)
+        await semaphore.acquire()
+        try:
+            future = self.executor.submit(functools.partial(func, *args, **kwargs))
+        except BaseException:
+            semaphore.release()
+            raise
+        
+        def release(_):
+            try:
+                loop.call_soon_threadsafe(semaphore.release)
+            except RuntimeError:
+                # The loop has been closed; nothing is waiting on the semaphore anymore
+                pass
+        
+        future.add_done_callback(release)
+        # Cancelling the wrapper also cancels the executor future if it has not started
+        return await asyncio.wrap_future(future, loop=loop)
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Shut down the executor if the runner created it.
+        
+        Args:
+            wait (bool): Whether to wait for running calls to finish
+        """
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+_default_runner = None
+
+
+def configure(executor: Optional[Executor] = None, max_concurrency: Optional[int] = None) -> AsyncRunner:
+    """
+    Replace the default runner used by the ``*_async`` methods.
+    
+    Args:
+        executor (Executor, optional): Thread or process pool to run calls on
+        max_concurrency (int, optional): Calls allowed on the executor at a time
+        
+    Returns:
+        AsyncRunner: The new default runner
+    """
+    global _default_runner
+    previous = _default_runner
+    _default_runner = AsyncRunner(executor, max_concurrency)
+    if previous is not None:
+        previous.shutdown(wait=False)
+    return _default_runner
+
+
+def get_runner(runner: Optional[AsyncRunner] = None) -> AsyncRunner:
+    """
+    Get the runner to use, creating the default runner on first use.
+    
+    Args:
+        runner (AsyncRunner, optional): An explicit runner, returned as is
+        
+    Returns:
+        AsyncRunner: The runner
+    """
+    global _default_runner
+    if runner is not None:
+        return runner
+    if _default_runner is None:
+        _default_runner = AsyncRunner()
+    return _default_runner
@@ -0,0 +1,473 @@
+"""
+Command line interface for bulk ZATCA jobs.
+
+Usage:
+    fatoora qr invoices.csv -o payloads.jsonl
+    fatoora render invoices.jsonl --directory images --workers 8
+    fatoora sign invoices.jsonl --certificate cert.pem --private-key key.pem -o signed.jsonl
+    fatoora csr devices.csv --directory csrs --workers 8
+    fatoora verify payloads.jsonl --certificate cert.pem -o report.jsonl
+    
+Input is CSV with a header row or JSON Lines, read one record at a time.
+Results are written in input order, one JSON line per record. With
+``--checkpoint`` the number of completed records and the output size are
+saved periodically, and a rerun with the same checkpoint continues after
+the last completed record. ``verify`` exits with status 2 when any
+payload fails verification.
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+
+def read_records(path: str, input_format: Optional[str] = None) -> Iterator[dict]:
+    """
+    Read records from a CSV or JSON Lines file, one at a time.
+    
+    Args:
+        path (str): The input file, or '-' for standard input
+        input_format (str, optional): 'csv' or 'jsonl'; guessed from the file extension
+        
+    Yields:
+        dict: One record per CSV row or JSON line
+        
+    Raises:
+        ValueError: If the format cannot be determined
+    """
+    if input_format is None:
+        extension = os.path.splitext(path)[1].lower()
+        input_format = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}.get(extension)
+        if input_format is None:
+            raise ValueError(f'cannot tell the format of {path}; use --input-format')
+    
+    if path == '-':
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+    else:
+        stream = open(path, encoding='utf-8-sig', newline='')
+    with stream:
+        if input_format == 'csv':
+            yield from csv.DictReader(stream)
+        else:
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class Progress:
+    """
+    Reports processed records and throughput on standard error.
+    """
+    
+    def __init__(self, enabled: bool = True, resumed: int = 0, interval: float = 1.0):
+        """
+        Initialize the progress report.
+        
+        Args:
+            enabled (bool): Whether to print anything
+            resumed (int): Records completed by an earlier run
+            interval (float): Seconds between updates
+        """
+        self.enabled = enabled
+        self.resumed = resumed
+        self.interval = interval
+        self.count = resumed
+        self.start = self.last = time.perf_counter()
+    
+    def update(self, count: int) -> None:
+        """Record the number of completed records, printing at most once per interval."""
+        self.count = count
+        now = time.perf_counter()
+        if self.enabled and now - self.last >= self.interval:
+            self.last = now
+            self._print(now)
+    
+    def finish(self) -> None:
+        """Print the final count and throughput."""
+        if self.enabled:
+            self._print(time.perf_counter())
+            sys.stderr.write('\n')
+            sys.stderr.flush()
+    
+    def _print(self, now: float) -> None:
+        rate = (self.count - self.resumed) / max(now - self.start, 1e-9)
+        sys.stderr.write(f'\r{self.count:,} records, {rate:,.0f} records/s')
+        sys.stderr.flush()
+
+
+class Checkpoint:
+    """
+    Number of completed records and output size, saved atomically.
+    """
+    
+    def __init__(self, path: Optional[str]):
+        """
+        Initialize the checkpoint.
+        
+        Args:
+            path (str, optional): The checkpoint file; checkpoints are disabled without one
+        """
+        self.path = path
+    
+    def load(self) -> Tuple[int, int]:
+        """
+        Get the saved state.
+        
+        Returns:
+            Tuple[int, int]: The completed record count and output size in bytes,
+                zeros when there is no checkpoint yet
+        """
+        if not self.path or not os.path.exists(self.path):
+            return 0, 0
+        with open(self.path, encoding='utf-8') as f:
+            state = json.load(f)
+        return state['records'], state['output_bytes']
+    
+    def save(self, records: int, output_bytes: int) -> None:
+        """
+        Save the state, replacing the previous checkpoint in one step.
+        
+        Args:
+            records (int): The number of completed records
+            output_bytes (int): The output size covering those records
+        """
+        if not self.path:
+            return
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'records': records, 'output_bytes': output_bytes}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+
+class _Drain:
+    """Iterator over a deque that can run dry and be resumed once refilled."""
+    
+    def __init__(self, queue: deque):
+        self.queue = queue
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        if not self.queue:
+            raise StopIteration
+        return self.queue.popleft()
+
+
+def safe_name(key: str) -> str:
+    """Make a record key usable as a file name."""
+    return re.sub(r'[^\w.-]', '_', key) or '_'
+
+
+def run(args: argparse.Namespace, produce: Callable[[Iterable[dict], deque], Iterator],
+        write: Callable[[str, object], dict]) -> int:
+    """
+    Stream records through a bulk operation, writing one JSON line per result.
+    
+    Args:
+        args (argparse.Namespace): The parsed command line
+        produce (callable): Takes the records and the deque of their keys, and
+            yields one result per record in order; the key of a record is
+            appended to the deque just before the record is handed out
+        write (callable): Turns a key and its result into the JSON object to output
+        
+    Returns:
+        int: The exit status
+    """
+    checkpoint = Checkpoint(args.checkpoint)
+    done, output_bytes = checkpoint.load()
+    
+    if args.output == '-':
+        output = sys.stdout
+    else:
+        output = open(args.output, 'r+' if done else 'w', encoding='utf-8', newline='\n')
+        # Drop anything written after the last checkpoint
+        output.seek(output_bytes)
+        output.truncate()
+    
+    keys = deque()
+    
+    def keyed_records():
+        records = islice(read_records(args.input, args.input_format), done, None)
+        for index, record in enumerate(records, start=done):
+            keys.append(str(record.get(args.key_field) or f'{index:08d}'))
+            yield record
+    
+    progress = Progress(not args.quiet, done)
+    count = done
+    try:
+        for result in produce(keyed_records(), keys):
+            key = keys.popleft()
+            output.write(json.dumps(write(key, result), ensure_ascii=False) + '\n')
+            count += 1
+            progress.update(count)
+            if args.checkpoint and count % args.checkpoint_every == 0:
+                output.flush()
+                checkpoint.save(count, output.tell() if output is not sys.stdout else 0)
+        output.flush()
+        checkpoint.save(count, output.tell() if output is not sys.stdout else 0)
+    finally:
+        progress.finish()
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+def _phase_one_row(record: dict) -> List[str]:
+    from .generate_qr_code import GenerateQrCode
+    
+    try:
+        return [record[field] for field in GenerateQrCode.ROW_FIELDS]
+    except KeyError as e:
+        raise ValueError(f'record is missing the {e.args[0]} field')
+
+
+def _payloads(records: Iterable[dict]) -> Iterator[str]:
+    """Take the 'qr' payload of each record, or encode one from its Phase 1 fields."""
+    from .generate_qr_code import GenerateQrCode
+    
+    for record in records:
+        payload = record.get('qr')
+        if not payload:
+            payload = next(GenerateQrCode.encode_many([_phase_one_row(record)]))
+        yield payload
+
+
+def command_qr(args: argparse.Namespace) -> int:
+    from .generate_qr_code import GenerateQrCode
+    
+    def produce(records, keys):
+        return GenerateQrCode.encode_many(_phase_one_row(record) for record in records)
+    
+    return run(args, produce, lambda key, payload: {args.key_field: key, 'qr': payload})
+
+
+def command_render(args: argparse.Namespace) -> int:
+    os.makedirs(args.directory, exist_ok=True)
+    
+    def produce(records, keys):
+        if args.image_format == 'svg':
+            from .rendering.targets import render_svg
+            
+            for payload in _payloads(records):
+                path = os.path.join(args.directory, f'{safe_name(keys[-1])}.svg')
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(render_svg(payload, args.options))
+                yield path
+            return
+        
+        from .rendering.pool import render_many
+        
+        names = deque()
+        
+        def named_payloads():
+            for payload in _payloads(records):
+                names.append(f'{safe_name(keys[-1])}.png')
+                yield payload
+        
+        yield from render_many(
+            named_payloads(), args.options, args.directory, names=_Drain(names), workers=args.workers
+        )
+    
+    return run(args, produce, lambda key, path: {args.key_field: key, 'path': path})
+
+
+def command_sign(args: argparse.Namespace) -> int:
+    from .helpers.certificate import Certificate
+    from .models.invoice_sign import InvoiceSign
+    
+    with open(args.certificate, encoding='utf-8') as f:
+        certificate_pem = f.read()
+    with open(args.private_key, encoding='utf-8') as f:
+        private_key_pem = f.read()
+    certificate = Certificate(certificate_pem, private_key_pem)
+    if args.directory:
+        os.makedirs(args.directory, exist_ok=True)
+    
+    def xml_invoices(records):
+        for record in records:
+            if record.get('xml'):
+                yield record['xml']
+            elif record.get('xml_path'):
+                with open(record['xml_path'], encoding='utf-8') as f:
+                    yield f.read()
+            else:
+                raise ValueError('record needs an xml or xml_path field')
+    
+    def produce(records, keys):
+        return InvoiceSign.sign_many(xml_invoices(records), certificate, workers=args.workers)
+    
+    def write(key, signed):
+        line = {args.key_field: key, 'hash': signed.hash, 'qr': signed.qr_code}
+        if args.directory:
+            line['path'] = os.path.join(args.directory, f'{safe_name(key)}.xml')
+            with open(line['path'], 'w', encoding='utf-8') as f:
+                f.write(signed.xml)
+        return line
+    
+    return run(args, produce, write)
+
+
+def _csr_request(record: dict):
+    from .models.csr_request import CSRRequest
+    
+    request = CSRRequest.make()
+    if record.get('uid'):
+        request.set_uid(record['uid'])
+    if record.get('serial_number'):
+        request.set_serial_number(record.get('solution_name', ''), record.get('version', ''), record['serial_number'])
+    request.set_common_name(record['common_name'])
+    request.set_organization_name(record['organization_name'])
+    request.set_organizational_unit_name(record['organizational_unit_name'])
+    request.set_country_name(record.get('country_name') or 'SA')
+    return request
+
+
+def command_csr(args: argparse.Namespace) -> int:
+    from cryptography.hazmat.primitives import serialization
+    from .generate_csr import GenerateCSR
+    
+    os.makedirs(args.directory, exist_ok=True)
+    
+    def produce(records, keys):
+        return GenerateCSR.generate_many((_csr_request(record) for record in records), workers=args.workers)
+    
+    def write(key, csr):
+        base = os.path.join(args.directory, safe_name(key))
+        with open(f'{base}.csr', 'w', encoding='utf-8') as f:
+            f.write(csr.get_csr_content())
+        # Keys are written unencrypted, so only the owner may read them
+        fd = os.open(f'{base}.key', os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        if hasattr(os, 'fchmod'):
+            os.fchmod(fd, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(csr.get_private_key().private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption()
+            ))
+        return {args.key_field: key, 'csr_path': f'{base}.csr', 'key_path': f'{base}.key'}
+    
+    return run(args, produce, write)
+
+
+def command_verify(args: argparse.Namespace) -> int:
+    from .qr_verifier import QrVerifier, VerificationReport
+    
+    verifier = QrVerifier()
+    for path in args.certificate or ():
+        with open(path, encoding='utf-8') as f:
+            verifier.add_certificate(f.read())
+    report = VerificationReport()
+    
+    def payloads(records):
+        for record in records:
+            if not record.get('qr'):
+                raise ValueError('record needs a qr field')
+            yield record['qr']
+    
+    def produce(records, keys):
+        return verifier.verify_many(payloads(records), workers=args.workers, report=report)
+    
+    def write(key, result):
+        line = {args.key_field: key}
+        line.update(result._asdict())
+        del line['invoice']
+        return line
+    
+    status = run(args, produce, write)
+    if not args.quiet:
+        sys.stderr.write(json.dumps(report.to_dict()) + '\n')
+    return status if report.valid == report.total else 2
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser of the ``fatoora`` command."""
+    parser = argparse.ArgumentParser(
+        prog='fatoora', description='Bulk ZATCA QR codes, images, invoice signing, CSRs and verification.'
+    )
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND')
+    subparsers.required = True
+    
+    def add_command(name, help_text, handler, key_field='invoice_number', workers=True):
+        command = subparsers.add_parser(name, help=help_text, description=help_text)
+        command.set_defaults(handler=handler)
+        command.add_argument('input', help="CSV or JSON Lines input file, or '-' for standard input")
+        command.add_argument('--input-format', choices=('csv', 'jsonl'),
+                             help='input format; guessed from the file extension by default')
+        command.add_argument('-o', '--output', default='-', help='JSON Lines output file (default: standard output)')
+        command.add_argument('--key-field', default=key_field,
+                             help=f'record field identifying each record (default: {key_field})')
+        command.add_argument('--checkpoint', help='file to save progress to and resume from')
+        command.add_argument('--checkpoint-every', type=int, default=1000, metavar='N',
+                             help='records between checkpoints (default: 1000)')
+        command.add_argument('-q', '--quiet', action='store_true', help='do not report progress')
+        if workers:
+            command.add_argument('--workers', type=int, help='worker threads or processes (default: CPU count)')
+        return command
+    
+    add_command('qr', 'Encode Phase 1 invoice fields into base64 TLV payloads.', command_qr, workers=False)
+    
+    render = add_command('render', 'Render QR code images from payloads or Phase 1 invoice fields.', command_render)
+    render.add_argument('--directory', required=True, help='directory to write the images into')
+    render.add_argument('--image-format', choices=('png', 'svg'), default='png')
+    render.add_argument('--box-size', type=int, help='pixels per module')
+    render.add_argument('--border', type=int, help='quiet zone in modules')
+    
+    sign = add_command('sign', 'Sign invoice XML given inline or by path.', command_sign)
+    sign.add_argument('--certificate', required=True, help='certificate PEM file')
+    sign.add_argument('--private-key', required=True, help='private key PEM file')
+    sign.add_argument('--directory', help='directory to write the signed XML into')
+    
+    csr = add_command('csr', 'Generate CSRs and private keys for EGS units.', command_csr, key_field='common_name')
+    csr.add_argument('--directory', required=True, help='directory to write the CSR and key files into')
+    
+    verify = add_command('verify', 'Verify the signatures in Phase 2 QR payloads.', command_verify)
+    verify.add_argument('--certificate', action='append',
+                        help='known signing certificate PEM file to check tag 9 against; repeatable')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the ``fatoora`` command.
+    
+    Args:
+        argv (List[str], optional): The arguments; defaults to ``sys.argv[1:]``
+        
+    Returns:
+        int: The exit status
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.checkpoint and args.checkpoint_every < 1:
+        parser.error('--checkpoint-every must be positive')
+    if args.checkpoint and args.output == '-':
+        parser.error('--checkpoint needs an --output file')
+    options = {}
+    for option in ('box_size', 'border'):
+        if getattr(args, option, None) is not None:
+            options[option] = getattr(args, option)
+    args.options = options or None
+    
+    try:
+        return args.handler(args)
+    except (OSError, ValueError, KeyError) as e:
+        sys.stderr.write(f'fatoora: error: {e}\n')
+        return 1
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == '__main__':
+    sys.exit(main())
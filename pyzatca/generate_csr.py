@@ -2,16 +2,65 @@
 Generate CSR for ZATCA e-invoicing.
 """
 
-import tempfile
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
 from cryptography import x509
 from cryptography.x509.oid import NameOID
 from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import ec
+from . import instrumentation
+from .helpers.key_pool import KeyPool, generate_private_key
 from .models.csr_request import CSRRequest
 from .models.csr import CSR
 
 
+@lru_cache(maxsize=1024)
+def _make_subject(common_name: str, organization_name: str, organizational_unit_name: str,
+                  country_name: str) -> x509.Name:
+    """Build the CSR subject name, reusing it for requests with the same DN."""
+    return x509.Name([
+        x509.NameAttribute(NameOID.COMMON_NAME, common_name),
+        x509.NameAttribute(NameOID.ORGANIZATION_NAME, organization_name),
+        x509.NameAttribute(NameOID.ORGANIZATIONAL_UNIT_NAME, organizational_unit_name),
+        x509.NameAttribute(NameOID.COUNTRY_NAME, country_name),
+    ])
+
+
+def _sign_csr(subject: x509.Name, private_key) -> str:
+    """Build and sign a CSR, returning it as PEM text."""
+    csr = x509.CertificateSigningRequestBuilder().subject_name(
+        subject
+    ).sign(private_key, hashes.SHA256())
+    return csr.public_bytes(serialization.Encoding.PEM).decode('utf-8')
+
+
+def _generate_chunk(dns: List[Tuple[str, str, str, str]]) -> List[Tuple[str, bytes]]:
+    """
+    Generate a chunk of CSRs inside a worker process.
+    
+    Private key objects cannot be pickled, so keys travel back as PEM.
+    
+    Returns:
+        List[Tuple[str, bytes]]: The CSR PEM text and private key PEM of each request
+    """
+    results = []
+    for dn in dns:
+        try:
+            private_key = generate_private_key()
+            csr_content = _sign_csr(_make_subject(*dn), private_key)
+        except Exception as e:
+            raise RuntimeError(f'Error Generating New Certificate Signing Request: {str(e)}')
+        results.append((csr_content, private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        )))
+    return results
+
+
 class GenerateCSR:
     """
     Generate Certificate Signing Request (CSR) for ZATCA e-invoicing.
@@ -19,28 +68,109 @@ class GenerateCSR:
     This class handles the generation of CSR requests for ZATCA integration.
     """
     
-    def __init__(self, csr_request: CSRRequest):
+    def __init__(self, csr_request: CSRRequest, key_pool: Optional[KeyPool] = None):
         """
         Initialize the CSR generator.
         
         Args:
             csr_request (CSRRequest): The CSR request data
+            key_pool (KeyPool, optional): Pool to take pre-generated private keys from
         """
         self.csr_request = csr_request
         self.data = csr_request.to_array()
+        self.key_pool = key_pool
     
     @classmethod
-    def from_request(cls, csr_request: CSRRequest) -> 'GenerateCSR':
+    def from_request(cls, csr_request: CSRRequest, key_pool: Optional[KeyPool] = None) -> 'GenerateCSR':
         """
         Create a CSR generator from a request.
         
         Args:
             csr_request (CSRRequest): The CSR request
+            key_pool (KeyPool, optional): Pool to take pre-generated private keys from
             
         Returns:
             GenerateCSR: A new GenerateCSR instance
         """
-        return cls(csr_request)
+        return cls(csr_request, key_pool)
+    
+    @classmethod
+    def generate_many(cls, csr_requests: Iterable[CSRRequest], workers: Optional[int] = None,
+                      chunk_size: int = 16) -> Iterator[CSR]:
+        """
+        Generate many CSRs across a process pool.
+        
+        Key generation and signing run in worker processes, in chunks to
+        amortize the IPC cost, with a bounded number of chunks in flight.
+        Results are yielded in input order.
+        
+        Args:
+            csr_requests (Iterable[CSRRequest]): The CSR requests
+            workers (int, optional): Number of worker processes; defaults to the CPU count
+            chunk_size (int): Number of requests generated per task
+            
+        Yields:
+            CSR: The generated CSR with content and private key
+            
+        Raises:
+            ValueError: If chunk_size or workers is not positive
+            RuntimeError: If CSR generation fails
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be positive')
+        workers = workers or os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError('workers must be positive')
+        
+        dns = (cls(csr_request).get_subject_fields() for csr_request in csr_requests)
+        max_pending = workers * 2
+        pending = deque()
+        
+        def results(future):
+            for csr_content, key_pem in future.result():
+                yield CSR(csr_content, serialization.load_pem_private_key(key_pem, password=None))
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            try:
+                while True:
+                    chunk = list(islice(dns, chunk_size))
+                    if not chunk:
+                        break
+                    if len(pending) >= max_pending:
+                        yield from results(pending.popleft())
+                    pending.append(executor.submit(_generate_chunk, chunk))
+                
+                while pending:
+                    yield from results(pending.popleft())
+            finally:
+                for future in pending:
+                    future.cancel()
+    
+    async def generate_async(self, runner=None) -> CSR:
+        """
+        Generate the CSR without blocking the event loop.
+        
+        On a thread pool runner the key pool, if any, is used as in
+        ``generate``. On a process pool runner the key is generated in the
+        worker and sent back as PEM.
+        
+        Args:
+            runner (AsyncRunner, optional): Runner to generate on; defaults to ``aio.get_runner()``
+            
+        Returns:
+            CSR: The generated CSR with content and private key
+            
+        Raises:
+            RuntimeError: If CSR generation fails
+        """
+        from .aio import get_runner
+        
+        runner = get_runner(runner)
+        if not runner.uses_processes:
+            return await runner.run(self.generate)
+        
+        [(csr_content, key_pem)] = await runner.run(_generate_chunk, [self.get_subject_fields()])
+        return CSR(csr_content, serialization.load_pem_private_key(key_pem, password=None))
     
     def initialize(self) -> 'GenerateCSR':
         """
@@ -53,6 +183,26 @@ class GenerateCSR:
         # The cryptography library handles this internally
         return self
     
+    def get_subject_fields(self) -> Tuple[str, str, str, str]:
+        """
+        Get the subject name fields.
+        
+        Returns:
+            Tuple[str, str, str, str]: The common name, organization name,
+                organizational unit name and country
+        """
+        dn = self.data['dn']
+        return (dn['CN'], dn['organizationName'], dn['organizationalUnitName'], dn['C'])
+    
+    def get_subject(self) -> x509.Name:
+        """
+        Get the CSR subject name.
+        
+        Returns:
+            x509.Name: The subject name, shared between requests with the same DN
+        """
+        return _make_subject(*self.get_subject_fields())
+    
     def generate(self) -> CSR:
         """
         Generate the CSR.
@@ -64,29 +214,18 @@ class GenerateCSR:
             RuntimeError: If CSR generation fails
         """
         try:
-            # Generate private key
-            private_key = ec.generate_private_key(
-                ec.SECP256K1()
-            )
-            
-            # Create subject name
-            subject = x509.Name([
-                x509.NameAttribute(NameOID.COMMON_NAME, self.data['dn']['CN']),
-                x509.NameAttribute(NameOID.ORGANIZATION_NAME, self.data['dn']['organizationName']),
-                x509.NameAttribute(NameOID.ORGANIZATIONAL_UNIT_NAME, self.data['dn']['organizationalUnitName']),
-                x509.NameAttribute(NameOID.COUNTRY_NAME, self.data['dn']['C']),
-            ])
-            
-            # Create CSR
-            csr = x509.CertificateSigningRequestBuilder().subject_name(
-                subject
-            ).sign(private_key, hashes.SHA256())
-            
-            # Export CSR to PEM format
-            csr_pem = csr.public_bytes(serialization.Encoding.PEM)
-            csr_content = csr_pem.decode('utf-8')
-            
-            return CSR(csr_content, private_key)
-            
+            with instrumentation.stage('csr.generate'):
+                # Take a ready key from the pool when there is one
+                with instrumentation.stage('csr.key'):
+                    if self.key_pool is not None:
+                        private_key = self.key_pool.get()
+                    else:
+                        private_key = generate_private_key()
+                
+                with instrumentation.stage('csr.sign'):
+                    csr_content = _sign_csr(self.get_subject(), private_key)
+                
+                return CSR(csr_content, private_key)
+        
         except Exception as e:
-            raise RuntimeError(f'Error Generating New Certificate Signing Request: {str(e)}') 
\ No newline at end of file
+            raise RuntimeError(f'Error Generating New Certificate Signing Request: {str(e)}')
@@ -3,8 +3,13 @@ Generate QR Code for ZATCA e-invoicing.
 """
 
 import base64
-from typing import List, Union
+import itertools
+import operator
+from typing import Any, Iterable, Iterator, List, Mapping, Sequence, Tuple, Union
+from . import instrumentation
 from .tags.tag import Tag
+from .tags.registry import make_tag
+from .qr_template import QrTemplate, qr_template
 
 
 class GenerateQrCode:
@@ -14,6 +19,14 @@ class GenerateQrCode:
     This class handles the generation of QR codes from TLV (Tag-Length-Value) data.
     """
     
+    ROW_FIELDS = (
+        'seller',
+        'tax_number',
+        'invoice_date',
+        'invoice_total_amount',
+        'invoice_tax_amount',
+    )
+    
     def __init__(self, data: List[Tag]):
         """
         Initialize the QR code generator.
@@ -42,6 +55,150 @@ class GenerateQrCode:
         """
         return cls(data)
     
+    @staticmethod
+    def template(seller: str, tax_number: str) -> QrTemplate:
+        """
+        Get a template with the Seller and TaxNumber tags pre-encoded.
+        
+        Templates are kept in an LRU cache, so repeated calls for the same
+        merchant return the same template.
+        
+        Args:
+            seller (str): The seller name
+            tax_number (str): The seller tax number
+            
+        Returns:
+            QrTemplate: The merchant template
+        """
+        return qr_template(str(seller), str(tax_number))
+    
+    @classmethod
+    def encode_many(cls, rows: Iterable[Union[Sequence[Any], Mapping[str, Any]]]) -> Iterator[str]:
+        """
+        Encode many Phase 1 invoices as base64 TLV payloads.
+        
+        Each row holds the seller name, seller tax number, invoice date,
+        invoice total amount and invoice tax amount, either as a sequence in
+        that order or as a mapping keyed by ``ROW_FIELDS``. The layout and the
+        value lengths are checked on every row.
+        Rows of the same merchant share its QrTemplate, so the seller prefix
+        is only encoded when the merchant changes.
+        
+        Args:
+            rows (Iterable): The invoice rows
+            
+        Yields:
+            str: The TLV as base64 encoded string, one per row, in order
+            
+        Raises:
+            ValueError: If the rows are malformed or a value is too long
+        """
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            return
+        
+        if isinstance(first, Mapping):
+            if any(field not in first for field in cls.ROW_FIELDS):
+                raise ValueError('malformed data structure')
+            getter = operator.itemgetter(*cls.ROW_FIELDS)
+        elif isinstance(first, Sequence) and len(first) == len(cls.ROW_FIELDS):
+            getter = None
+        else:
+            raise ValueError('malformed data structure')
+        
+        b64encode = base64.b64encode
+        last_seller = last_tax_number = template = None
+        for index, row in enumerate(itertools.chain((first,), rows)):
+            try:
+                seller, tax_number, date, total, tax = getter(row) if getter else row
+            except KeyError as e:
+                raise ValueError(f'malformed data structure: row {index} has no {e.args[0]!r}') from None
+            except (TypeError, ValueError):
+                raise ValueError(f'malformed data structure: row {index} is not a row of five values') from None
+            if template is None or seller != last_seller or tax_number != last_tax_number:
+                template = cls.template(seller, tax_number)
+                last_seller, last_tax_number = seller, tax_number
+            yield b64encode(template.to_tlv_bytes(date, total, tax)).decode('ascii')
+    
+    @classmethod
+    def from_base64(cls, payload: Union[str, bytes]) -> 'GenerateQrCode':
+        """
+        Create a QR code generator from a base64 encoded TLV payload.
+        
+        Args:
+            payload (Union[str, bytes]): The TLV as base64 encoded string
+            
+        Returns:
+            GenerateQrCode: A new GenerateQrCode instance holding the decoded tags
+            
+        Raises:
+            ValueError: If the payload is not valid base64 or TLV data
+        """
+        return cls(list(cls.decode_tlv(base64.b64decode(payload, validate=True))))
+    
+    @staticmethod
+    def iter_tlv(data: Union[bytes, bytearray, memoryview]) -> Iterator[Tuple[int, memoryview]]:
+        """
+        Walk a TLV buffer without copying it.
+        
+        Args:
+            data (Union[bytes, bytearray, memoryview]): The encoded TLV data structure
+            
+        Yields:
+            Tuple[int, memoryview]: The tag number and a view of its value
+            
+        Raises:
+            ValueError: If the data is truncated
+        """
+        view = memoryview(data)
+        position = 0
+        end = len(view)
+        while position < end:
+            if position + 2 > end:
+                raise ValueError('truncated TLV data')
+            tag = view[position]
+            start = position + 2
+            position = start + view[position + 1]
+            if position > end:
+                raise ValueError('truncated TLV data')
+            yield tag, view[start:position]
+    
+    @classmethod
+    def decode_tlv(cls, data: Union[bytes, bytearray, memoryview]) -> Iterator[Tag]:
+        """
+        Decode a TLV buffer into tag instances.
+        
+        Tag numbers are mapped to their classes through ``TAG_CLASSES``;
+        unknown numbers are returned as plain ``Tag`` instances.
+        
+        Args:
+            data (Union[bytes, bytearray, memoryview]): The encoded TLV data structure
+            
+        Yields:
+            Tag: The decoded tags, in order
+        """
+        for tag, value in cls.iter_tlv(data):
+            yield make_tag(tag, str(value, 'utf-8'))
+    
+    @classmethod
+    def iter_base64(cls, payloads: Iterable[Union[str, bytes]]) -> Iterator['GenerateQrCode']:
+        """
+        Lazily decode base64 encoded TLV payloads, e.g. the lines of a file.
+        
+        Blank lines are skipped, and only one payload is held at a time.
+        
+        Args:
+            payloads (Iterable[Union[str, bytes]]): The base64 encoded payloads
+            
+        Yields:
+            GenerateQrCode: A QR code generator per payload, in order
+        """
+        for payload in payloads:
+            payload = payload.strip()
+            if payload:
+                yield cls.from_base64(payload)
+    
     def to_tlv(self) -> str:
         """
         Encode the TLV data structure.
@@ -51,6 +208,18 @@ class GenerateQrCode:
         """
         return ''.join(str(tag) for tag in self.data)
     
+    def to_tlv_bytes(self) -> bytes:
+        """
+        Encode the TLV data structure as bytes.
+        
+        Each tag already holds its TLV bytes, so the payload is assembled in
+        a single join without going through str.
+        
+        Returns:
+            bytes: The encoded TLV data structure
+        """
+        return b''.join([tag._tlv for tag in self.data])
+    
     def to_base64(self) -> str:
         """
         Encode the TLV as base64.
@@ -58,49 +227,141 @@ class GenerateQrCode:
         Returns:
             str: The TLV as base64 encoded string
         """
-        return base64.b64encode(self.to_tlv().encode('utf-8')).decode('ascii')
+        if not instrumentation.sinks:
+            return base64.b64encode(self.to_tlv_bytes()).decode('ascii')
+        
+        with instrumentation.stage('qr.tlv'):
+            tlv = self.to_tlv_bytes()
+        with instrumentation.stage('qr.base64'):
+            return base64.b64encode(tlv).decode('ascii')
     
-    def render(self, options: dict = None, file_path: str = None) -> str:
+    def render(self, options: dict = None, file_path: str = None, cache=None) -> str:
         """
         Render the QR code as base64 data image.
         
         Args:
-            options (dict, optional): QR code options
-            file_path (str, optional): File path to save the QR code image
+            options (dict, optional): QR code options, see ``rendering.DEFAULT_OPTIONS``
+            file_path (str, optional): File path to save the QR code image; PNG when
+                a cache is used
+            cache (RenderCache, optional): Cache of rendered images to reuse
             
         Returns:
             str: Base64 encoded PNG image data
         """
-        try:
-            import qrcode
-            from io import BytesIO
-            
-            # Create QR code
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(self.to_base64())
-            qr.make(fit=True)
+        if cache is None:
+            from .rendering.qr_image import render_data_uri
             
-            # Create image
-            img = qr.make_image(fill_color="black", back_color="white")
-            
-            # Convert to base64
-            buffer = BytesIO()
-            img.save(buffer, format='PNG')
-            img_data = base64.b64encode(buffer.getvalue()).decode('ascii')
+            return render_data_uri(self.to_base64(), options, file_path)
+        
+        from .rendering.qr_image import render_png
+        
+        with instrumentation.stage('qr.render'):
+            tlv = self.to_tlv_bytes()
+            key = cache.key(tlv, options)
+            png = cache.get(key)
+            if png is None:
+                png = render_png(base64.b64encode(tlv).decode('ascii'), options)
+                cache.put(key, png)
             
             # Save to file if specified
             if file_path:
-                img.save(file_path)
+                with open(file_path, 'wb') as f:
+                    f.write(png)
+        
+        return f"data:image/png;base64,{base64.b64encode(png).decode('ascii')}"
+    
+    async def render_async(self, options: dict = None, file_path: str = None, runner=None) -> str:
+        """
+        Render the QR code as base64 data image without blocking the event loop.
+        
+        Args:
+            options (dict, optional): QR code options, see ``rendering.DEFAULT_OPTIONS``
+            file_path (str, optional): File path to save the QR code image
+            runner (AsyncRunner, optional): Runner to render on; defaults to ``aio.get_runner()``
             
-            return f"data:image/png;base64,{img_data}"
+        Returns:
+            str: Base64 encoded PNG image data
+        """
+        from .aio import get_runner
+        from .rendering.qr_image import render_data_uri
+        
+        return await get_runner(runner).run(render_data_uri, self.to_base64(), options, file_path)
+    
+    def to_store(self, writer, invoice_number: Union[str, int], options: dict = None) -> None:
+        """
+        Write the QR code to a payload store, with its image if the store keeps images.
+        
+        Args:
+            writer (PayloadStoreWriter): The open store
+            invoice_number (Union[str, int]): The invoice number used as key
+            options (dict, optional): QR code options for the image
+        """
+        writer.add_qr_code(invoice_number, self, options)
+    
+    def render_svg(self, options: dict = None, file_path: str = None) -> str:
+        """
+        Render the QR code as SVG, without going through PIL.
+        
+        Args:
+            options (dict, optional): QR code options
+            file_path (str, optional): File path to save the SVG document
+            
+        Returns:
+            str: The SVG document
+        """
+        from .rendering.targets import render_svg
+        svg = render_svg(self.to_base64(), options)
+        if file_path:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(svg)
+        return svg
+    
+    def render_pbm(self, options: dict = None, file_path: str = None) -> bytes:
+        """
+        Render the QR code as a binary PBM image, without going through PIL.
+        
+        Args:
+            options (dict, optional): QR code options
+            file_path (str, optional): File path to save the PBM image
+            
+        Returns:
+            bytes: The PBM image data
+        """
+        from .rendering.targets import render_pbm
+        pbm = render_pbm(self.to_base64(), options)
+        if file_path:
+            with open(file_path, 'wb') as f:
+                f.write(pbm)
+        return pbm
+    
+    def render_escpos(self, options: dict = None) -> bytes:
+        """
+        Render the QR code as an ESC/POS raster command for thermal printers.
+        
+        Args:
+            options (dict, optional): QR code options; ``box_size`` is the module size in dots
+            
+        Returns:
+            bytes: The ``GS v 0`` command, ready to be written to the printer
+        """
+        from .rendering.targets import render_escpos
+        return render_escpos(self.to_base64(), options)
+    
+    @classmethod
+    def render_many(cls, qr_codes: Iterable[Union['GenerateQrCode', str]], options: dict = None,
+                    directory: str = None, **kwargs) -> Iterator[str]:
+        """
+        Render many QR codes across a process pool.
+        
+        See ``rendering.render_many`` for the remaining keyword arguments.
+        
+        Args:
+            qr_codes (Iterable): GenerateQrCode instances or base64 TLV strings
+            options (dict, optional): QR code options
+            directory (str, optional): Directory to write PNG files into
             
-        except ImportError:
-            raise ImportError(
-                "qrcode library is required for QR code rendering. "
-                "Install it with: pip install qrcode[pil]"
-            ) 
\ No newline at end of file
+        Yields:
+            str: PNG data URIs, or the written file paths when a directory is given, in order
+        """
+        from .rendering.pool import render_many
+        return render_many(qr_codes, options, directory, **kwargs)
@@ -5,7 +5,15 @@ This module contains helper classes and utilities for the ZATCA library.
 """
 
 from .certificate import Certificate
+from .certificate_store import CertificateStore
+from .key_pool import KeyPool
+from .rotating_certificate import RotatingCertificate
+from .invoice_hasher import InvoiceHasher
 
 __all__ = [
-    'Certificate'
+    'Certificate',
+    'CertificateStore',
+    'KeyPool',
+    'RotatingCertificate',
+    'InvoiceHasher'
 ] 
\ No newline at end of file
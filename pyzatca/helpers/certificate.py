@@ -4,10 +4,154 @@ Certificate helper for ZATCA.
 
 import base64
 import hashlib
+import threading
+from collections import OrderedDict
 from cryptography import x509
 from cryptography.hazmat.primitives import serialization
 
 
+class CertificateData:
+    """
+    A parsed certificate and the values derived from it.
+    
+    Instances are shared by every Certificate built from the same PEM, so
+    derived values are computed on first use and then kept.
+    """
+    
+    def __init__(self, plain_certificate: str, fingerprint: str):
+        """
+        Parse a certificate.
+        
+        Args:
+            plain_certificate (str): The certificate in PEM format
+            fingerprint (str): The SHA-256 hex digest of the PEM text
+        """
+        self.fingerprint = fingerprint
+        self.certificate = x509.load_pem_x509_certificate(
+            plain_certificate.encode('utf-8')
+        )
+        self._hash = None
+        self._plain_public_key = None
+        self._certificate_signature = None
+        self._raw_certificate = None
+        self._digest_value = None
+        self._issuer_name = None
+    
+    def get_hash(self) -> str:
+        """Get the base64 encoded SHA-256 hash of the PEM text."""
+        if self._hash is None:
+            self._hash = base64.b64encode(bytes.fromhex(self.fingerprint)).decode('ascii')
+        return self._hash
+    
+    def get_plain_public_key(self) -> str:
+        """Get the public key as base64 encoded DER, i.e. PEM without headers and newlines."""
+        if self._plain_public_key is None:
+            public_der = self.certificate.public_key().public_bytes(
+                encoding=serialization.Encoding.DER,
+                format=serialization.PublicFormat.SubjectPublicKeyInfo
+            )
+            self._plain_public_key = base64.b64encode(public_der).decode('ascii')
+        return self._plain_public_key
+    
+    def get_certificate_signature(self) -> str:
+        """Get the certificate signature without its first byte, hex encoded."""
+        if self._certificate_signature is None:
+            # Remove the first byte as mentioned in the PHP version
+            self._certificate_signature = self.certificate.signature[1:].hex()
+        return self._certificate_signature
+    
+    def get_raw_certificate(self) -> str:
+        """Get the certificate as base64 encoded DER, i.e. PEM without headers and newlines."""
+        if self._raw_certificate is None:
+            der = self.certificate.public_bytes(serialization.Encoding.DER)
+            self._raw_certificate = base64.b64encode(der).decode('ascii')
+        return self._raw_certificate
+    
+    def get_digest_value(self) -> str:
+        """Get the XAdES certificate digest: the hex SHA-256 of the raw certificate, base64 encoded."""
+        if self._digest_value is None:
+            hex_digest = hashlib.sha256(self.get_raw_certificate().encode('ascii')).hexdigest()
+            self._digest_value = base64.b64encode(hex_digest.encode('ascii')).decode('ascii')
+        return self._digest_value
+    
+    def get_issuer_name(self) -> str:
+        """Get the issuer DN, most specific attribute first, e.g. 'CN=TSZEINVOICE-SubCA-1, DC=gov'."""
+        if self._issuer_name is None:
+            self._issuer_name = ', '.join(
+                rdn.rfc4514_string() for rdn in reversed(self.certificate.issuer.rdns)
+            )
+        return self._issuer_name
+    
+    def get_serial_number(self) -> str:
+        """Get the certificate serial number in decimal."""
+        return str(self.certificate.serial_number)
+
+
+class CertificateRegistry:
+    """
+    Process-wide LRU registry of parsed certificates.
+    
+    Certificates are keyed by the SHA-256 fingerprint of their PEM text, so
+    the same PEM is parsed once however many Certificate objects use it.
+    """
+    
+    def __init__(self, maxsize: int = 256):
+        """
+        Initialize the registry.
+        
+        Args:
+            maxsize (int): The number of parsed certificates to keep
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, plain_certificate: str) -> CertificateData:
+        """
+        Get the parsed certificate for a PEM, parsing it on a miss.
+        
+        Args:
+            plain_certificate (str): The certificate in PEM format
+            
+        Returns:
+            CertificateData: The shared parsed certificate
+        """
+        fingerprint = hashlib.sha256(plain_certificate.encode('utf-8')).hexdigest()
+        with self._lock:
+            data = self._entries.get(fingerprint)
+            if data is not None:
+                self._entries.move_to_end(fingerprint)
+                self.hits += 1
+                return data
+            self.misses += 1
+        
+        data = CertificateData(plain_certificate, fingerprint)
+        with self._lock:
+            data = self._entries.setdefault(fingerprint, data)
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return data
+    
+    def clear(self) -> None:
+        """Remove every parsed certificate and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, fingerprint: str) -> bool:
+        return fingerprint in self._entries
+
+
+certificate_registry = CertificateRegistry()
+
+
 class Certificate:
     """
     Certificate helper for ZATCA e-invoicing.
@@ -25,14 +169,19 @@ class Certificate:
             private_key (str): The private key in PEM format
         """
         self.plain_certificate = certificate
-        self.certificate = x509.load_pem_x509_certificate(
-            certificate.encode('utf-8')
-        )
+        self.plain_private_key = private_key
+        self.data = certificate_registry.get(certificate)
+        self.certificate = self.data.certificate
         self.private_key = serialization.load_pem_private_key(
             private_key.encode('utf-8'),
             password=None
         )
         self.secret_key = None
+        self._authorization_header = None
+    
+    def __reduce__(self):
+        # Key objects cannot be pickled, so rebuild from the PEM text, e.g. in worker processes
+        return (self.__class__, (self.plain_certificate, self.plain_private_key), {'secret_key': self.secret_key})
     
     def set_secret_key(self, secret_key: str) -> 'Certificate':
         """
@@ -45,12 +194,33 @@ class Certificate:
             Certificate: Self for method chaining
         """
         self.secret_key = secret_key
+        self._authorization_header = None
+        return self
+    
+    def current(self) -> 'Certificate':
+        """
+        Get the certificate to sign with, as for a RotatingCertificate.
+        
+        Returns:
+            Certificate: Self
+        """
         return self
     
     def get_private_key(self):
         """Get the private key object."""
         return self.private_key
     
+    def has_matching_key(self) -> bool:
+        """
+        Check that the private key belongs to the certificate.
+        
+        Returns:
+            bool: Whether the private key's public key is the certificate's public key
+        """
+        public_format = (serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo)
+        return (self.private_key.public_key().public_bytes(*public_format)
+                == self.certificate.public_key().public_bytes(*public_format))
+    
     def get_plain_certificate(self) -> str:
         """Get the plain certificate text."""
         return self.plain_certificate
@@ -59,6 +229,10 @@ class Certificate:
         """Get the certificate object."""
         return self.certificate
     
+    def get_fingerprint(self) -> str:
+        """Get the SHA-256 hex digest of the certificate PEM text."""
+        return self.data.fingerprint
+    
     def get_authorization_header(self) -> str:
         """
         Generate authorization bearer token.
@@ -69,8 +243,12 @@ class Certificate:
         if not self.secret_key:
             raise ValueError("Secret key must be set before generating authorization header")
         
-        cert_b64 = base64.b64encode(self.plain_certificate.encode('utf-8')).decode('ascii')
-        return f'Basic {base64.b64encode(f"{cert_b64}:{self.secret_key}".encode("utf-8")).decode("ascii")}'
+        if self._authorization_header is None:
+            cert_b64 = base64.b64encode(self.plain_certificate.encode('utf-8')).decode('ascii')
+            self._authorization_header = (
+                f'Basic {base64.b64encode(f"{cert_b64}:{self.secret_key}".encode("utf-8")).decode("ascii")}'
+            )
+        return self._authorization_header
     
     def get_hash(self) -> str:
         """
@@ -79,9 +257,7 @@ class Certificate:
         Returns:
             str: Base64 encoded SHA256 hash
         """
-        return base64.b64encode(
-            hashlib.sha256(self.plain_certificate.encode('utf-8')).digest()
-        ).decode('ascii')
+        return self.data.get_hash()
     
     def get_plain_public_key(self) -> str:
         """
@@ -90,18 +266,7 @@ class Certificate:
         Returns:
             str: The public key in base64 format
         """
-        public_key = self.certificate.public_key()
-        public_pem = public_key.public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo
-        )
-        
-        # Remove PEM headers and newlines
-        return public_pem.decode('utf-8').replace(
-            '-----BEGIN PUBLIC KEY-----\n', ''
-        ).replace(
-            '\n-----END PUBLIC KEY-----\n', ''
-        ).replace('\n', '')
+        return self.data.get_plain_public_key()
     
     def get_secret_key(self) -> str:
         """
@@ -119,10 +284,7 @@ class Certificate:
         Returns:
             str: The certificate signature
         """
-        # Get the signature from the certificate
-        signature = self.certificate.signature
-        # Remove the first byte as mentioned in the PHP version
-        return signature[1:].hex()
+        return self.data.get_certificate_signature()
     
     def get_formatted_issuer_dn(self) -> str:
         """
@@ -131,6 +293,4 @@ class Certificate:
         Returns:
             str: The formatted issuer distinguished name
         """
-        issuer = self.certificate.issuer
-        # Convert to string format similar to PHP
-        return str(issuer) 
\ No newline at end of file
+        return self.data.get_issuer_name()
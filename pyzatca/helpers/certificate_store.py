@@ -0,0 +1,348 @@
+"""
+Lazily loaded certificates for many EGS units.
+"""
+
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
+
+from .certificate import Certificate
+
+
+# Rough size of a parsed certificate and key beyond their PEM text, in bytes
+PARSED_OVERHEAD = 4096
+
+CertificateRecord = Tuple[str, str, Optional[str]]
+
+
+def estimate_size(certificate: Certificate) -> int:
+    """
+    Estimate the memory held by a parsed certificate.
+    
+    Args:
+        certificate (Certificate): The certificate
+        
+    Returns:
+        int: The PEM text counted twice (text and parsed form) plus a fixed overhead
+    """
+    return PARSED_OVERHEAD + 2 * (len(certificate.plain_certificate) + len(certificate.plain_private_key))
+
+
+class DirectorySource:
+    """
+    Certificates and keys stored as files named after their EGS unit.
+    
+    The unit ``egs-1`` is read from ``egs-1.pem`` and ``egs-1.key``, and an
+    optional ``egs-1.secret`` holding the API secret.
+    """
+    
+    def __init__(self, directory: str, certificate_suffix: str = '.pem', key_suffix: str = '.key',
+                 secret_suffix: str = '.secret'):
+        """
+        Initialize the source.
+        
+        Args:
+            directory (str): The directory holding the files
+            certificate_suffix (str): File name suffix of certificates
+            key_suffix (str): File name suffix of private keys
+            secret_suffix (str): File name suffix of API secrets
+        """
+        self.directory = directory
+        self.certificate_suffix = certificate_suffix
+        self.key_suffix = key_suffix
+        self.secret_suffix = secret_suffix
+    
+    def ids(self) -> List[str]:
+        """
+        List the units with both a certificate and a key, without reading them.
+        
+        Returns:
+            List[str]: The unit identifiers
+        """
+        names = set()
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                names.add(entry.name)
+        suffix_length = len(self.certificate_suffix)
+        return sorted(
+            name[:-suffix_length] for name in names
+            if name.endswith(self.certificate_suffix) and name[:-suffix_length] + self.key_suffix in names
+        )
+    
+    def load(self, egs_id: str) -> Optional[CertificateRecord]:
+        """
+        Read the files of one unit.
+        
+        Args:
+            egs_id (str): The unit identifier
+            
+        Returns:
+            CertificateRecord: The certificate PEM, key PEM and secret, or None if there are no files
+        """
+        if os.sep in egs_id or (os.altsep and os.altsep in egs_id) or egs_id in ('', '.', '..'):
+            return None
+        base = os.path.join(self.directory, egs_id)
+        try:
+            with open(base + self.certificate_suffix, encoding='utf-8') as f:
+                certificate = f.read()
+            with open(base + self.key_suffix, encoding='utf-8') as f:
+                private_key = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            with open(base + self.secret_suffix, encoding='utf-8') as f:
+                secret_key = f.read().strip()
+        except FileNotFoundError:
+            secret_key = None
+        return certificate, private_key, secret_key
+
+
+class SqliteSource:
+    """
+    Certificates and keys stored in a SQLite table.
+    
+    The table has the columns ``id``, ``certificate``, ``private_key`` and
+    ``secret_key``, and is created if missing. Each thread uses its own
+    connection.
+    """
+    
+    def __init__(self, path: str, table: str = 'certificates'):
+        """
+        Initialize the source.
+        
+        Args:
+            path (str): The SQLite database file
+            table (str): The table name
+            
+        Raises:
+            ValueError: If the table name is not a plain identifier
+        """
+        if not table.isidentifier():
+            raise ValueError(f'invalid table name: {table}')
+        self.path = path
+        self.table = table
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                f'CREATE TABLE IF NOT EXISTS {table} ('
+                'id TEXT PRIMARY KEY, certificate TEXT NOT NULL, private_key TEXT NOT NULL, secret_key TEXT)'
+            )
+    
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.path)
+        return connection
+    
+    def ids(self) -> List[str]:
+        """
+        List the stored units, without reading their certificates.
+        
+        Returns:
+            List[str]: The unit identifiers
+        """
+        return [row[0] for row in self._connection().execute(f'SELECT id FROM {self.table} ORDER BY id')]
+    
+    def load(self, egs_id: str) -> Optional[CertificateRecord]:
+        """
+        Read one unit.
+        
+        Args:
+            egs_id (str): The unit identifier
+            
+        Returns:
+            CertificateRecord: The certificate PEM, key PEM and secret, or None if there is no row
+        """
+        return self._connection().execute(
+            f'SELECT certificate, private_key, secret_key FROM {self.table} WHERE id = ?', (egs_id,)
+        ).fetchone()
+    
+    def put(self, egs_id: str, certificate: str, private_key: str, secret_key: Optional[str] = None) -> None:
+        """
+        Add or replace a unit.
+        
+        Args:
+            egs_id (str): The unit identifier
+            certificate (str): The certificate in PEM format
+            private_key (str): The private key in PEM format
+            secret_key (str, optional): The API secret
+        """
+        with self._connection() as connection:
+            connection.execute(
+                f'INSERT OR REPLACE INTO {self.table} (id, certificate, private_key, secret_key) VALUES (?, ?, ?, ?)',
+                (egs_id, certificate, private_key, secret_key)
+            )
+
+
+class CertificateStore:
+    """
+    Certificates of many EGS units, parsed on first use.
+    
+    Nothing is read at startup; a certificate and its key are loaded from
+    the source and parsed the first time they are asked for. Parsed
+    certificates stay in an LRU bounded by count and by estimated memory,
+    so a process serving thousands of merchants only keeps the active ones.
+    
+    Example:
+        store = CertificateStore.from_directory('/etc/zatca/csids', max_bytes=32 * 1024 * 1024)
+        certificate = store.get('egs-1')
+    """
+    
+    def __init__(self, source, max_items: Optional[int] = None, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize the store.
+        
+        Args:
+            source: A DirectorySource, SqliteSource or any object with ``load(egs_id)``
+            max_items (int, optional): Number of parsed certificates to keep; unbounded by default
+            max_bytes (int): Estimated memory of the parsed certificates to keep
+            
+        Raises:
+            ValueError: If a limit is not positive
+        """
+        if (max_items is not None and max_items < 1) or max_bytes < 1:
+            raise ValueError('store limits must be positive')
+        self.source = source
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_directory(cls, directory: str, **kwargs) -> 'CertificateStore':
+        """
+        Create a store over a directory of PEM files, see DirectorySource.
+        
+        Args:
+            directory (str): The directory holding the files
+            **kwargs: Limits passed to CertificateStore
+            
+        Returns:
+            CertificateStore: A new store
+        """
+        return cls(DirectorySource(directory), **kwargs)
+    
+    @classmethod
+    def from_sqlite(cls, path: str, table: str = 'certificates', **kwargs) -> 'CertificateStore':
+        """
+        Create a store over a SQLite table, see SqliteSource.
+        
+        Args:
+            path (str): The SQLite database file
+            table (str): The table name
+            **kwargs: Limits passed to CertificateStore
+            
+        Returns:
+            CertificateStore: A new store
+        """
+        return cls(SqliteSource(path, table), **kwargs)
+    
+    def get(self, egs_id: str) -> Certificate:
+        """
+        Get the certificate of a unit, loading and parsing it on a miss.
+        
+        Args:
+            egs_id (str): The unit identifier
+            
+        Returns:
+            Certificate: The parsed certificate, with its secret key set if the source has one
+            
+        Raises:
+            KeyError: If the source has no certificate for the unit
+            ValueError: If the stored certificate or key cannot be parsed, or they do not match
+        """
+        with self._lock:
+            entry = self._entries.get(egs_id)
+            if entry is not None:
+                self._entries.move_to_end(egs_id)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        
+        record = self.source.load(egs_id)
+        if record is None:
+            raise KeyError(egs_id)
+        plain_certificate, plain_private_key, secret_key = record
+        certificate = Certificate(plain_certificate, plain_private_key)
+        if not certificate.has_matching_key():
+            raise ValueError(f'the private key of {egs_id} does not match its certificate')
+        if secret_key:
+            certificate.set_secret_key(secret_key)
+        size = estimate_size(certificate)
+        
+        with self._lock:
+            entry = self._entries.get(egs_id)
+            if entry is not None:
+                # Another thread loaded it meanwhile
+                self._entries.move_to_end(egs_id)
+                return entry[0]
+            self._entries[egs_id] = (certificate, size)
+            self._bytes += size
+            while len(self._entries) > 1 and (
+                    self._bytes > self.max_bytes
+                    or (self.max_items is not None and len(self._entries) > self.max_items)):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+        return certificate
+    
+    def __getitem__(self, egs_id: str) -> Certificate:
+        return self.get(egs_id)
+    
+    def __contains__(self, egs_id: str) -> bool:
+        return egs_id in self._entries or self.source.load(egs_id) is not None
+    
+    def ids(self) -> List[str]:
+        """
+        List the units in the source, without loading them.
+        
+        Returns:
+            List[str]: The unit identifiers
+        """
+        return self.source.ids()
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.ids())
+    
+    def invalidate(self, egs_id: str) -> None:
+        """
+        Drop a parsed certificate, e.g. after its files were renewed.
+        
+        Args:
+            egs_id (str): The unit identifier
+        """
+        with self._lock:
+            entry = self._entries.pop(egs_id, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+    
+    def clear(self) -> None:
+        """Drop every parsed certificate and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+    
+    def stats(self) -> dict:
+        """
+        Get the store counters.
+        
+        Returns:
+            dict: Hits, misses, evictions, and the number and estimated bytes of parsed certificates
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'items': len(self._entries),
+                'bytes': self._bytes,
+            }
@@ -0,0 +1,409 @@
+"""
+Streaming canonical hashing of UBL invoices.
+
+The ZATCA invoice hash is the SHA-256 of the invoice canonicalized with
+C14N 1.1, after removing the UBLExtensions, the Signature and the
+AdditionalDocumentReference that carries the QR code. The invoice is
+parsed with expat in chunks and each chunk's canonical output is fed to
+the digest straight away, so memory use does not grow with the number
+of invoice lines.
+"""
+
+import hashlib
+import os
+from typing import BinaryIO, Iterator, Optional, Union
+from xml.parsers import expat
+
+
+XML_NAMESPACE = 'http://www.w3.org/XML/1998/namespace'
+EXT_NAMESPACE = 'urn:oasis:names:specification:ubl:schema:xsd:CommonExtensionComponents-2'
+CAC_NAMESPACE = 'urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2'
+CBC_NAMESPACE = 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2'
+
+# Elements left out of the hash together with everything inside them
+EXCLUDED_ELEMENTS = frozenset([
+    (EXT_NAMESPACE, 'UBLExtensions'),
+    (CAC_NAMESPACE, 'Signature'),
+])
+_DOCUMENT_REFERENCE = (CAC_NAMESPACE, 'AdditionalDocumentReference')
+_ID = (CBC_NAMESPACE, 'ID')
+
+CHUNK_SIZE = 64 * 1024
+
+Source = Union[str, bytes, os.PathLike, BinaryIO]
+
+
+def _escape_text(text: str) -> str:
+    if '&' in text:
+        text = text.replace('&', '&amp;')
+    if '<' in text:
+        text = text.replace('<', '&lt;')
+    if '>' in text:
+        text = text.replace('>', '&gt;')
+    if '\r' in text:
+        text = text.replace('\r', '&#xD;')
+    return text
+
+
+def _escape_attribute(value: str) -> str:
+    if '&' in value:
+        value = value.replace('&', '&amp;')
+    if '<' in value:
+        value = value.replace('<', '&lt;')
+    if '"' in value:
+        value = value.replace('"', '&quot;')
+    if '\t' in value:
+        value = value.replace('\t', '&#x9;')
+    if '\n' in value:
+        value = value.replace('\n', '&#xA;')
+    if '\r' in value:
+        value = value.replace('\r', '&#xD;')
+    return value
+
+
+class InvoiceCanonicalizer:
+    """
+    Incremental C14N 1.1 serializer for invoices, without comments.
+    
+    Feed the XML in chunks; each call returns the canonical text completed
+    so far. The AdditionalDocumentReference is held back only until its
+    ID is known, so whole invoices are never buffered.
+    """
+    
+    def __init__(self, excluded=EXCLUDED_ELEMENTS, capture: Optional[dict] = None):
+        """
+        Initialize the canonicalizer.
+        
+        Args:
+            excluded (frozenset): (namespace, local name) pairs of the elements to leave out
+            capture (dict, optional): Maps element paths below the root, as tuples of
+                (namespace, local name) pairs, to names; the text of the first element
+                on each path is collected into ``captured``
+        """
+        self.excluded = excluded
+        self.capture = capture
+        self.captured = {}
+        self._paths = [()]
+        self._capturing = None
+        self._written = []
+        self._out = self._written
+        # Prefix to namespace maps in scope, and as rendered on output ancestors
+        self._namespaces = [{'xml': XML_NAMESPACE}]
+        self._rendered = [{'': ''}]
+        self._depth = 0
+        self._skip_depth = 0
+        self._root_done = False
+        # State of an AdditionalDocumentReference whose ID is not known yet
+        self._held_depth = None
+        self._held_first_child = False
+        self._held_id = None
+        
+        parser = self._parser = expat.ParserCreate()
+        parser.ordered_attributes = True
+        parser.buffer_text = True
+        parser.StartElementHandler = self._start
+        parser.EndElementHandler = self._end
+        parser.CharacterDataHandler = self._data
+        parser.ProcessingInstructionHandler = self._pi
+    
+    def feed(self, data: Union[str, bytes]) -> str:
+        """
+        Parse the next chunk of the invoice.
+        
+        Args:
+            data (Union[str, bytes]): The next chunk of XML
+            
+        Returns:
+            str: The canonical text completed by this chunk
+            
+        Raises:
+            ValueError: If the XML is not well-formed
+        """
+        try:
+            self._parser.Parse(data, False)
+        except expat.ExpatError as e:
+            raise ValueError(f'invalid invoice XML: {e}') from None
+        return self._take()
+    
+    def close(self) -> str:
+        """
+        Finish parsing.
+        
+        Returns:
+            str: The rest of the canonical text
+            
+        Raises:
+            ValueError: If the XML is incomplete or not well-formed
+        """
+        try:
+            self._parser.Parse(b'', True)
+        except expat.ExpatError as e:
+            raise ValueError(f'invalid invoice XML: {e}') from None
+        return self._take()
+    
+    def _take(self) -> str:
+        text = ''.join(self._written)
+        del self._written[:]
+        return text
+    
+    def _resolve(self, name: str, namespaces: dict, attribute: bool = False) -> tuple:
+        prefix, _, local = name.rpartition(':')
+        if not prefix and attribute:
+            return '', local
+        # Unbound prefixes are tolerated and sort as if in no namespace
+        return namespaces.get(prefix, ''), local
+    
+    def _start(self, name: str, attributes: list) -> None:
+        if self._skip_depth:
+            self._skip_depth += 1
+            return
+        
+        namespaces = self._namespaces[-1]
+        declared = None
+        plain = []
+        for index in range(0, len(attributes), 2):
+            key = attributes[index]
+            if key == 'xmlns' or key[:6] == 'xmlns:':
+                if declared is None:
+                    declared = {}
+                declared[key[6:]] = attributes[index + 1]
+            else:
+                plain.append((key, attributes[index + 1]))
+        if declared:
+            namespaces = dict(namespaces)
+            namespaces.update(declared)
+        
+        element = self._resolve(name, namespaces)
+        if element in self.excluded:
+            self._skip_depth = 1
+            return
+        
+        if self._held_depth is not None and self._depth == self._held_depth and not self._held_first_child:
+            # First child of a held document reference: only an ID can decide
+            self._held_first_child = True
+            if element == _ID:
+                self._held_id = []
+            else:
+                self._release()
+        
+        rendered = self._rendered[-1]
+        rendered_namespaces = ''
+        if declared:
+            changed = sorted(
+                (prefix, uri) for prefix, uri in declared.items()
+                if rendered.get(prefix, None if prefix else '') != uri and (uri or not prefix)
+            )
+            if changed:
+                rendered = dict(rendered)
+                rendered.update(changed)
+                rendered_namespaces = ''.join(
+                    f' xmlns:{prefix}="{_escape_attribute(uri)}"' if prefix else f' xmlns="{_escape_attribute(uri)}"'
+                    for prefix, uri in changed
+                )
+        self._namespaces.append(namespaces)
+        self._rendered.append(rendered)
+        self._depth += 1
+        
+        if self.capture is not None:
+            path = self._paths[-1] + (element,) if self._depth > 1 else ()
+            self._paths.append(path)
+            field = self.capture.get(path)
+            if field is not None and field not in self.captured:
+                self._capturing = (field, self._depth, [])
+        
+        if element == _DOCUMENT_REFERENCE and self._held_depth is None:
+            self._held_depth = self._depth
+            self._held_first_child = False
+            self._out = []
+        
+        if plain:
+            if len(plain) > 1:
+                plain.sort(key=lambda attribute: self._resolve(attribute[0], namespaces, True))
+            rendered_attributes = ''.join(f' {key}="{_escape_attribute(value)}"' for key, value in plain)
+            self._out.append(f'<{name}{rendered_namespaces}{rendered_attributes}>')
+        else:
+            self._out.append(f'<{name}{rendered_namespaces}>')
+    
+    def _end(self, name: str) -> None:
+        if self._skip_depth:
+            self._skip_depth -= 1
+            return
+        
+        self._out.append(f'</{name}>')
+        depth = self._depth
+        self._depth -= 1
+        self._namespaces.pop()
+        self._rendered.pop()
+        if self.capture is not None:
+            self._paths.pop()
+            if self._capturing is not None and self._capturing[1] == depth:
+                field, _, text = self._capturing
+                self.captured[field] = ''.join(text)
+                self._capturing = None
+        if depth == 1:
+            self._root_done = True
+        
+        if self._held_depth is None:
+            return
+        if depth == self._held_depth:
+            self._release()
+        elif self._held_id is not None and depth == self._held_depth + 1:
+            # Matched like normalize-space(cbc:ID) = 'QR' in the ZATCA transform
+            if ''.join(self._held_id).strip() == 'QR':
+                # The QR reference: drop what was held and skip the rest of it
+                self._out = self._written
+                self._held_depth = self._held_id = None
+                self._depth -= 1
+                self._namespaces.pop()
+                self._rendered.pop()
+                if self.capture is not None:
+                    self._paths.pop()
+                self._skip_depth = 1
+            else:
+                self._release()
+    
+    def _release(self) -> None:
+        self._written.extend(self._out)
+        self._out = self._written
+        self._held_depth = self._held_id = None
+    
+    def _data(self, data: str) -> None:
+        if self._skip_depth or not self._depth:
+            return
+        if self._held_id is not None:
+            self._held_id.append(data)
+        if self._capturing is not None and self._capturing[1] == self._depth:
+            self._capturing[2].append(data)
+        self._out.append(_escape_text(data))
+    
+    def _pi(self, target: str, data: str) -> None:
+        if self._skip_depth:
+            return
+        pi = f'<?{target} {data}?>' if data else f'<?{target}?>'
+        if self._depth:
+            self._out.append(pi)
+        elif self._root_done:
+            self._out.append('\n' + pi)
+        else:
+            self._out.append(pi + '\n')
+
+
+def iter_chunks(source: Source, chunk_size: int = CHUNK_SIZE) -> Iterator[Union[str, bytes]]:
+    """
+    Read an invoice in chunks.
+    
+    Args:
+        source (Source): A file path, XML bytes, or a binary or text stream
+        chunk_size (int): The number of bytes or characters per chunk
+        
+    Yields:
+        Union[str, bytes]: The chunks of XML
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield bytes(source)
+        return
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as stream:
+            yield from iter_chunks(stream, chunk_size)
+        return
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+class InvoiceHasher:
+    """
+    Incremental ZATCA invoice hash.
+    
+    Example:
+        hasher = InvoiceHasher()
+        for chunk in chunks:
+            hasher.update(chunk)
+        digest = hasher.digest()
+    """
+    
+    def __init__(self, capture: Optional[dict] = None):
+        """
+        Initialize an empty hash.
+        
+        Args:
+            capture (dict, optional): Element paths whose text to collect while
+                hashing, see InvoiceCanonicalizer
+        """
+        self._canonicalizer = InvoiceCanonicalizer(capture=capture)
+        self._sha256 = hashlib.sha256()
+        self._digest = None
+    
+    def update(self, data: Union[str, bytes]) -> 'InvoiceHasher':
+        """
+        Hash the next chunk of the invoice XML.
+        
+        Args:
+            data (Union[str, bytes]): The next chunk of XML
+            
+        Returns:
+            InvoiceHasher: Self for method chaining
+            
+        Raises:
+            ValueError: If the XML is not well-formed, or the hash is already final
+        """
+        if self._digest is not None:
+            raise ValueError('the invoice hash is already final')
+        self._sha256.update(self._canonicalizer.feed(data).encode('utf-8'))
+        return self
+    
+    def digest(self) -> bytes:
+        """
+        Finish the invoice and get its hash.
+        
+        Returns:
+            bytes: The raw SHA-256 digest of the canonical invoice
+            
+        Raises:
+            ValueError: If the XML is incomplete or not well-formed
+        """
+        if self._digest is None:
+            self._sha256.update(self._canonicalizer.close().encode('utf-8'))
+            self._digest = self._sha256.digest()
+        return self._digest
+    
+    @property
+    def captured(self) -> dict:
+        """The text collected for the capture paths, by name."""
+        return self._canonicalizer.captured
+    
+    @classmethod
+    def hash(cls, source: Source, chunk_size: int = CHUNK_SIZE) -> bytes:
+        """
+        Hash an invoice from a file path, XML bytes or a stream.
+        
+        Args:
+            source (Source): A file path, XML bytes, or a binary or text stream
+            chunk_size (int): The number of bytes or characters read at a time
+            
+        Returns:
+            bytes: The raw SHA-256 digest of the canonical invoice
+        """
+        hasher = cls()
+        for chunk in iter_chunks(source, chunk_size):
+            hasher.update(chunk)
+        return hasher.digest()
+
+
+def canonicalize(source: Source, chunk_size: int = CHUNK_SIZE) -> str:
+    """
+    Get the canonical text that the invoice hash covers, e.g. for debugging.
+    
+    Args:
+        source (Source): A file path, XML bytes, or a binary or text stream
+        chunk_size (int): The number of bytes or characters read at a time
+        
+    Returns:
+        str: The canonical invoice
+    """
+    canonicalizer = InvoiceCanonicalizer()
+    parts = [canonicalizer.feed(chunk) for chunk in iter_chunks(source, chunk_size)]
+    parts.append(canonicalizer.close())
+    return ''.join(parts)
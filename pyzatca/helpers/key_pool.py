@@ -0,0 +1,113 @@
+"""
+Pool of pre-generated private keys for ZATCA CSR generation.
+"""
+
+import queue
+import threading
+from typing import Optional
+from cryptography.hazmat.primitives.asymmetric import ec
+
+
+def generate_private_key() -> ec.EllipticCurvePrivateKey:
+    """Generate a new SECP256K1 private key, the curve ZATCA requires."""
+    return ec.generate_private_key(ec.SECP256K1())
+
+
+class KeyPool:
+    """
+    Keeps a number of SECP256K1 private keys generated ahead of time.
+    
+    A background thread refills the pool as keys are taken, so interactive
+    CSR requests get a ready key instead of waiting for key generation.
+    When the pool is empty a key is generated in the calling thread.
+    """
+    
+    def __init__(self, size: int = 16, start: bool = True):
+        """
+        Initialize the key pool.
+        
+        Args:
+            size (int): The number of ready keys to keep
+            start (bool): Whether to start the background thread now
+            
+        Raises:
+            ValueError: If size is not positive
+        """
+        if size < 1:
+            raise ValueError('size must be positive')
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._keys = queue.Queue(maxsize=size)
+        self._stopped = threading.Event()
+        self._thread = None
+        if start:
+            self.start()
+    
+    def start(self) -> 'KeyPool':
+        """
+        Start the background thread that fills the pool.
+        
+        Returns:
+            KeyPool: Self for method chaining
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._fill, name='pyzatca-key-pool', daemon=True)
+            self._thread.start()
+        return self
+    
+    def _fill(self) -> None:
+        """Generate keys until the pool is stopped, blocking while it is full."""
+        while not self._stopped.is_set():
+            key = generate_private_key()
+            while not self._stopped.is_set():
+                try:
+                    self._keys.put(key, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+    
+    def get(self, timeout: Optional[float] = None) -> ec.EllipticCurvePrivateKey:
+        """
+        Take a ready key from the pool.
+        
+        Args:
+            timeout (float, optional): Seconds to wait for a ready key before
+                generating one in the calling thread; by default do not wait
+                
+        Returns:
+            EllipticCurvePrivateKey: A private key that is not handed out again
+        """
+        try:
+            if timeout:
+                key = self._keys.get(timeout=timeout)
+            else:
+                key = self._keys.get_nowait()
+        except queue.Empty:
+            self.misses += 1
+            return generate_private_key()
+        self.hits += 1
+        return key
+    
+    def ready(self) -> int:
+        """Get the number of keys currently waiting in the pool."""
+        return self._keys.qsize()
+    
+    def close(self) -> None:
+        """Stop the background thread and drop the remaining keys."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        while True:
+            try:
+                self._keys.get_nowait()
+            except queue.Empty:
+                break
+    
+    def __enter__(self) -> 'KeyPool':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
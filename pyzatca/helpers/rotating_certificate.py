@@ -0,0 +1,166 @@
+"""
+Certificates that follow their files on disk.
+"""
+
+import os
+import threading
+from typing import Callable, Optional, Tuple
+
+from .certificate import Certificate
+
+
+class RotatingCertificate:
+    """
+    A certificate source that picks up renewed certificate and key files.
+    
+    The files are polled for changes to their inode, modification time or
+    size, e.g. from a background thread. A changed pair is loaded and
+    checked in full before it replaces the current Certificate in a single
+    reference swap, so readers never wait on a reload. Anything holding
+    the previous Certificate keeps using it: InvoiceSign takes its
+    certificate from ``current()`` when it is created, so an invoice that
+    is being signed during a rotation is finished with the old key.
+    
+    A certificate whose key does not match, e.g. when only one of the two
+    files has been replaced so far, is not used; the old certificate stays
+    current and the files are checked again on the next poll.
+    
+    Example:
+        with RotatingCertificate('csid.pem', 'csid.key', interval=5) as source:
+            signed = InvoiceSign(xml_invoice, source).get_invoice()
+    """
+    
+    def __init__(self, certificate_path: str, private_key_path: str, secret_path: Optional[str] = None,
+                 interval: float = 1.0, start: bool = True,
+                 on_rotate: Optional[Callable[[Certificate, Certificate], None]] = None):
+        """
+        Load the certificate and optionally start polling.
+        
+        Args:
+            certificate_path (str): The certificate PEM file
+            private_key_path (str): The private key PEM file
+            secret_path (str, optional): A file holding the API secret
+            interval (float): Seconds between polls of the background thread
+            start (bool): Whether to start the background thread
+            on_rotate (callable, optional): Called with the old and new Certificate after a swap
+            
+        Raises:
+            OSError: If the files cannot be read
+            ValueError: If the certificate or key is invalid, or they do not match
+        """
+        self.certificate_path = certificate_path
+        self.private_key_path = private_key_path
+        self.secret_path = secret_path
+        self.interval = interval
+        self.on_rotate = on_rotate
+        self.rotations = 0
+        self.errors = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        
+        self._signature = self._stat()
+        self._current = self._load()
+        if start:
+            self.start()
+    
+    def current(self) -> Certificate:
+        """
+        Get the certificate in use, without blocking.
+        
+        Returns:
+            Certificate: The latest valid certificate
+        """
+        return self._current
+    
+    def _paths(self) -> Tuple[str, ...]:
+        paths = (self.certificate_path, self.private_key_path)
+        return paths + (self.secret_path,) if self.secret_path else paths
+    
+    def _stat(self) -> tuple:
+        signature = []
+        for path in self._paths():
+            stat = os.stat(path)
+            signature.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+    
+    def _load(self) -> Certificate:
+        with open(self.certificate_path, encoding='utf-8') as f:
+            plain_certificate = f.read()
+        with open(self.private_key_path, encoding='utf-8') as f:
+            plain_private_key = f.read()
+        certificate = Certificate(plain_certificate, plain_private_key)
+        if not certificate.has_matching_key():
+            raise ValueError('the private key does not match the certificate')
+        if self.secret_path:
+            with open(self.secret_path, encoding='utf-8') as f:
+                certificate.set_secret_key(f.read().strip())
+        return certificate
+    
+    def check(self) -> bool:
+        """
+        Reload the certificate if its files changed.
+        
+        Errors are not raised; they are counted in ``errors`` and kept in
+        ``last_error``, and the current certificate stays in use. Errors
+        raised by ``on_rotate`` are recorded the same way, after the swap.
+        
+        Returns:
+            bool: Whether a new certificate was swapped in
+        """
+        with self._lock:
+            try:
+                signature = self._stat()
+                if signature == self._signature:
+                    return False
+                certificate = self._load()
+                # The files may have changed again while loading; check once more on the next poll
+                if self._stat() != signature:
+                    return False
+            except (OSError, ValueError) as e:
+                self.errors += 1
+                self.last_error = e
+                return False
+            
+            previous, self._current = self._current, certificate
+            self._signature = signature
+            self.rotations += 1
+        if self.on_rotate is not None:
+            try:
+                self.on_rotate(previous, certificate)
+            except Exception as e:
+                # A failing callback must not stop the polling thread
+                self.errors += 1
+                self.last_error = e
+        return True
+    
+    def start(self) -> 'RotatingCertificate':
+        """
+        Start polling the files in a daemon thread.
+        
+        Returns:
+            RotatingCertificate: Self for method chaining
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._poll, name='pyzatca-certificate-rotation', daemon=True)
+            self._thread.start()
+        return self
+    
+    def _poll(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+    
+    def close(self) -> None:
+        """Stop the polling thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def __enter__(self) -> 'RotatingCertificate':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
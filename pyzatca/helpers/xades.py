@@ -0,0 +1,335 @@
+"""
+XAdES-BES enveloped signatures for ZATCA invoices.
+
+Everything in the signature that depends only on the certificate is built
+once per certificate into a SignatureTemplate, leaving holes for the
+per-invoice values: the invoice hash, the signature value, the signing
+time and the SignedProperties hash. The signature, the QR document
+reference and the cac:Signature element are spliced into the invoice text
+without adding whitespace outside of them, so the invoice hash is the
+same before and after signing.
+"""
+
+import base64
+import hashlib
+import re
+import threading
+import weakref
+from collections import namedtuple
+from xml.sax.saxutils import escape
+
+from .certificate import Certificate, CertificateData
+from .invoice_hasher import CAC_NAMESPACE, CBC_NAMESPACE, EXT_NAMESPACE
+
+
+_HOLE = '\0'
+
+SIGNED_PROPERTIES = (
+    '<xades:SignedProperties xmlns:xades="http://uri.etsi.org/01903/v1.3.2#" Id="xadesSignedProperties">\n'
+    '                                    <xades:SignedSignatureProperties>\n'
+    '                                        <xades:SigningTime>\0</xades:SigningTime>\n'
+    '                                        <xades:SigningCertificate>\n'
+    '                                            <xades:Cert>\n'
+    '                                                <xades:CertDigest>\n'
+    '                                                    <ds:DigestMethod xmlns:ds="http://www.w3.org/2000/09/xmldsig#" '
+    'Algorithm="http://www.w3.org/2001/04/xmlenc#sha256"/>\n'
+    '                                                    <ds:DigestValue xmlns:ds="http://www.w3.org/2000/09/xmldsig#">'
+    '{digest_value}</ds:DigestValue>\n'
+    '                                                </xades:CertDigest>\n'
+    '                                                <xades:IssuerSerial>\n'
+    '                                                    <ds:X509IssuerName xmlns:ds="http://www.w3.org/2000/09/xmldsig#">'
+    '{issuer_name}</ds:X509IssuerName>\n'
+    '                                                    <ds:X509SerialNumber xmlns:ds="http://www.w3.org/2000/09/xmldsig#">'
+    '{serial_number}</ds:X509SerialNumber>\n'
+    '                                                </xades:IssuerSerial>\n'
+    '                                            </xades:Cert>\n'
+    '                                        </xades:SigningCertificate>\n'
+    '                                    </xades:SignedSignatureProperties>\n'
+    '                                </xades:SignedProperties>'
+)
+
+UBL_EXTENSIONS = (
+    '<ext:UBLExtensions{namespaces}>\n'
+    '        <ext:UBLExtension>\n'
+    '            <ext:ExtensionURI>urn:oasis:names:specification:ubl:dsig:enveloped:xades</ext:ExtensionURI>\n'
+    '            <ext:ExtensionContent>\n'
+    '                <sig:UBLDocumentSignatures '
+    'xmlns:sig="urn:oasis:names:specification:ubl:schema:xsd:CommonSignatureComponents-2" '
+    'xmlns:sac="urn:oasis:names:specification:ubl:schema:xsd:SignatureAggregateComponents-2" '
+    'xmlns:sbc="urn:oasis:names:specification:ubl:schema:xsd:SignatureBasicComponents-2">\n'
+    '                    <sac:SignatureInformation>\n'
+    '                        <cbc:ID>urn:oasis:names:specification:ubl:signature:1</cbc:ID>\n'
+    '                        <sbc:ReferencedSignatureID>urn:oasis:names:specification:ubl:signature:Invoice'
+    '</sbc:ReferencedSignatureID>\n'
+    '                        <ds:Signature xmlns:ds="http://www.w3.org/2000/09/xmldsig#" Id="signature">\n'
+    '                            <ds:SignedInfo>\n'
+    '                                <ds:CanonicalizationMethod Algorithm="http://www.w3.org/2006/12/xml-c14n11"/>\n'
+    '                                <ds:SignatureMethod Algorithm="http://www.w3.org/2001/04/xmldsig-more#ecdsa-sha256"/>\n'
+    '                                <ds:Reference Id="invoiceSignedData" URI="">\n'
+    '                                    <ds:Transforms>\n'
+    '                                        <ds:Transform Algorithm="http://www.w3.org/TR/1999/REC-xpath-19991116">\n'
+    '                                            <ds:XPath>not(//ancestor-or-self::ext:UBLExtensions)</ds:XPath>\n'
+    '                                        </ds:Transform>\n'
+    '                                        <ds:Transform Algorithm="http://www.w3.org/TR/1999/REC-xpath-19991116">\n'
+    '                                            <ds:XPath>not(//ancestor-or-self::cac:Signature)</ds:XPath>\n'
+    '                                        </ds:Transform>\n'
+    '                                        <ds:Transform Algorithm="http://www.w3.org/TR/1999/REC-xpath-19991116">\n'
+    '                                            <ds:XPath>not(//ancestor-or-self::cac:AdditionalDocumentReference'
+    '[cbc:ID=\'QR\'])</ds:XPath>\n'
+    '                                        </ds:Transform>\n'
+    '                                        <ds:Transform Algorithm="http://www.w3.org/2006/12/xml-c14n11"/>\n'
+    '                                    </ds:Transforms>\n'
+    '                                    <ds:DigestMethod Algorithm="http://www.w3.org/2001/04/xmlenc#sha256"/>\n'
+    '                                    <ds:DigestValue>\0</ds:DigestValue>\n'
+    '                                </ds:Reference>\n'
+    '                                <ds:Reference Type="http://www.w3.org/2000/09/xmldsig#SignatureProperties" '
+    'URI="#xadesSignedProperties">\n'
+    '                                    <ds:DigestMethod Algorithm="http://www.w3.org/2001/04/xmlenc#sha256"/>\n'
+    '                                    <ds:DigestValue>\0</ds:DigestValue>\n'
+    '                                </ds:Reference>\n'
+    '                            </ds:SignedInfo>\n'
+    '                            <ds:SignatureValue>\0</ds:SignatureValue>\n'
+    '                            <ds:KeyInfo>\n'
+    '                                <ds:X509Data>\n'
+    '                                    <ds:X509Certificate>{raw_certificate}</ds:X509Certificate>\n'
+    '                                </ds:X509Data>\n'
+    '                            </ds:KeyInfo>\n'
+    '                            <ds:Object>\n'
+    '                                <xades:QualifyingProperties xmlns:xades="http://uri.etsi.org/01903/v1.3.2#" '
+    'Target="signature">\n'
+    '                                \0\n'
+    '                                </xades:QualifyingProperties>\n'
+    '                            </ds:Object>\n'
+    '                        </ds:Signature>\n'
+    '                    </sac:SignatureInformation>\n'
+    '                </sig:UBLDocumentSignatures>\n'
+    '            </ext:ExtensionContent>\n'
+    '        </ext:UBLExtension>\n'
+    '    </ext:UBLExtensions>'
+)
+
+QR_REFERENCE = (
+    '<cac:AdditionalDocumentReference{namespaces}>\n'
+    '        <cbc:ID>QR</cbc:ID>\n'
+    '        <cac:Attachment>\n'
+    '            <cbc:EmbeddedDocumentBinaryObject mimeCode="text/plain">\0</cbc:EmbeddedDocumentBinaryObject>\n'
+    '        </cac:Attachment>\n'
+    '    </cac:AdditionalDocumentReference>'
+)
+
+SIGNATURE_REFERENCE = (
+    '<cac:Signature{namespaces}>\n'
+    '        <cbc:ID>urn:oasis:names:specification:ubl:signature:Invoice</cbc:ID>\n'
+    '        <cbc:SignatureMethod>urn:oasis:names:specification:ubl:dsig:enveloped:xades</cbc:SignatureMethod>\n'
+    '    </cac:Signature>'
+)
+
+
+def _split(template: str, **values) -> tuple:
+    """Fill the certificate values into a template and split it at the per-invoice holes."""
+    for name, value in values.items():
+        template = template.replace('{%s}' % name, value)
+    return tuple(template.split(_HOLE))
+
+
+class SignatureTemplate:
+    """
+    The parts of a XAdES signature that only depend on the certificate.
+    """
+    
+    _cache = weakref.WeakKeyDictionary()
+    _lock = threading.Lock()
+    
+    def __init__(self, data: CertificateData):
+        """
+        Build the template.
+        
+        Args:
+            data (CertificateData): The parsed signing certificate
+        """
+        self._signed_properties = _split(
+            SIGNED_PROPERTIES,
+            digest_value=data.get_digest_value(),
+            issuer_name=escape(data.get_issuer_name()),
+            serial_number=data.get_serial_number(),
+        )
+        raw_certificate = data.get_raw_certificate()
+        # One variant with and one without local namespace declarations
+        self._extensions = {
+            namespaces: _split(UBL_EXTENSIONS, namespaces=namespaces, raw_certificate=raw_certificate)
+            for namespaces in ('', f' xmlns:ext="{EXT_NAMESPACE}"', f' xmlns:cbc="{CBC_NAMESPACE}"',
+                               f' xmlns:ext="{EXT_NAMESPACE}" xmlns:cbc="{CBC_NAMESPACE}"')
+        }
+    
+    @classmethod
+    def for_certificate(cls, certificate: Certificate) -> 'SignatureTemplate':
+        """
+        Get the shared template of a certificate, building it on first use.
+        
+        Args:
+            certificate (Certificate): The signing certificate
+            
+        Returns:
+            SignatureTemplate: The template, kept as long as the parsed certificate
+        """
+        data = certificate.data
+        template = cls._cache.get(data)
+        if template is None:
+            template = cls(data)
+            with cls._lock:
+                template = cls._cache.setdefault(data, template)
+        return template
+    
+    def signed_properties(self, signing_time: str) -> str:
+        """
+        Get the SignedProperties element as it is embedded in the signature.
+        
+        Args:
+            signing_time (str): The signing time, e.g. '2025-08-05T07:21:06'
+            
+        Returns:
+            str: The SignedProperties XML
+        """
+        head, tail = self._signed_properties
+        return f'{head}{signing_time}{tail}'
+    
+    @staticmethod
+    def signed_properties_hash(signed_properties: str) -> str:
+        """
+        Get the digest of the SignedProperties: the hex SHA-256 of its text, base64 encoded.
+        
+        Args:
+            signed_properties (str): The SignedProperties XML
+            
+        Returns:
+            str: The base64 encoded digest
+        """
+        hex_digest = hashlib.sha256(signed_properties.encode('utf-8')).hexdigest()
+        return base64.b64encode(hex_digest.encode('ascii')).decode('ascii')
+    
+    def extensions(self, invoice_hash: str, signature: str, signing_time: str, namespaces: str = '') -> str:
+        """
+        Build the UBLExtensions element carrying the signature.
+        
+        Args:
+            invoice_hash (str): The base64 encoded invoice hash
+            signature (str): The base64 encoded ECDSA signature of the hash
+            signing_time (str): The signing time, e.g. '2025-08-05T07:21:06'
+            namespaces (str): Namespace declarations the invoice root lacks
+            
+        Returns:
+            str: The UBLExtensions XML
+        """
+        signed_properties = self.signed_properties(signing_time)
+        parts = self._extensions[namespaces]
+        return ''.join((
+            parts[0], invoice_hash,
+            parts[1], self.signed_properties_hash(signed_properties),
+            parts[2], signature,
+            parts[3], signed_properties,
+            parts[4],
+        ))
+
+
+InvoiceSlots = namedtuple('InvoiceSlots', ['head', 'middle', 'tail', 'extension_namespaces'])
+InvoiceSlots.__doc__ = """
+An invoice split at the UBLExtensions and the QR value.
+
+The signed invoice is head + UBLExtensions + middle + QR payload + tail.
+"""
+
+_ROOT = re.compile(r'<(?![?!])([^\s/>]+)[^>]*?(/?)>')
+_EXTENSIONS = re.compile(r'<ext:UBLExtensions\b(?:[^>]*/>|.*?</ext:UBLExtensions>)', re.S)
+_QR_VALUE = re.compile(
+    r'(<cbc:ID>\s*QR\s*</cbc:ID>\s*<cac:Attachment>\s*<cbc:EmbeddedDocumentBinaryObject\b[^>]*?)'
+    r'(/>|>(.*?)</cbc:EmbeddedDocumentBinaryObject>)', re.S
+)
+_DOCUMENT_REFERENCES_END = '</cac:AdditionalDocumentReference>'
+
+
+def find_root(xml_invoice: str):
+    """
+    Find the start tag of the root element of an invoice.
+    
+    Args:
+        xml_invoice (str): The invoice XML
+        
+    Returns:
+        re.Match: The start tag, with the tag name in group 1 and '/' in group 2 if it is self-closing
+        
+    Raises:
+        ValueError: If the invoice has no root element
+    """
+    root = _ROOT.search(xml_invoice)
+    if root is None:
+        raise ValueError('invalid invoice XML: no root element')
+    return root
+
+
+def split_invoice(xml_invoice: str) -> InvoiceSlots:
+    """
+    Find where the signature and the QR payload go in an invoice.
+    
+    An existing ext:UBLExtensions is replaced, and an existing QR document
+    reference is filled in. Otherwise they are added, the QR reference
+    after the last document reference, and cac:Signature too if missing.
+    Nothing outside these elements changes, so the canonical invoice and
+    its hash stay the same. The conventional ext, cac and cbc prefixes are
+    expected; missing declarations are added on the new elements.
+    
+    Args:
+        xml_invoice (str): The invoice XML
+        
+    Returns:
+        InvoiceSlots: The invoice around the two slots
+        
+    Raises:
+        ValueError: If the invoice has no root element
+    """
+    root = find_root(xml_invoice)
+    root_tag = root.group(0)
+    if root.group(2):
+        # A self-closing root gets an end tag; the canonical form is the same
+        root_tag = root_tag[:-2] + '>'
+        xml_invoice = f'{xml_invoice[:root.start()]}{root_tag}</{root.group(1)}>{xml_invoice[root.end():]}'
+    root_end = root.start() + len(root_tag)
+    
+    def missing(*prefixes):
+        return ''.join(
+            f' xmlns:{prefix}="{uri}"' for prefix, uri in prefixes if f'xmlns:{prefix}=' not in root_tag
+        )
+    
+    extension_namespaces = missing(('ext', EXT_NAMESPACE), ('cbc', CBC_NAMESPACE))
+    reference_namespaces = missing(('cac', CAC_NAMESPACE), ('cbc', CBC_NAMESPACE))
+    
+    extensions = _EXTENSIONS.search(xml_invoice, root_end)
+    if extensions is not None:
+        head, rest = xml_invoice[:extensions.start()], xml_invoice[extensions.end():]
+    else:
+        head, rest = xml_invoice[:root_end], xml_invoice[root_end:]
+    
+    qr_value = _QR_VALUE.search(rest)
+    if qr_value is not None:
+        if qr_value.group(3) is None:
+            # Self-closing placeholder
+            return InvoiceSlots(
+                head, rest[:qr_value.end(1)] + '>', '</cbc:EmbeddedDocumentBinaryObject>' + rest[qr_value.end():],
+                extension_namespaces
+            )
+        return InvoiceSlots(head, rest[:qr_value.start(3)], rest[qr_value.end(3):], extension_namespaces)
+    
+    qr_head, qr_tail = QR_REFERENCE.format(namespaces=reference_namespaces).split(_HOLE)
+    if '<cac:Signature>' not in rest and '<cac:Signature ' not in rest:
+        qr_tail += SIGNATURE_REFERENCE.format(namespaces=reference_namespaces)
+    
+    position = rest.rfind(_DOCUMENT_REFERENCES_END)
+    if position >= 0:
+        position += len(_DOCUMENT_REFERENCES_END)
+    else:
+        for anchor in ('<cac:Signature', '<cac:AccountingSupplierParty', f'</{root.group(1)}>'):
+            position = rest.find(anchor)
+            if position >= 0:
+                break
+        else:
+            raise ValueError('invalid invoice XML: no end tag')
+    return InvoiceSlots(head, rest[:position] + qr_head, qr_tail + rest[position:], extension_namespaces)
@@ -0,0 +1,237 @@
+"""
+Opt-in timing of pyzatca stages.
+
+QR generation, rendering, invoice signing and CSR generation report how
+long each stage took to the registered sinks. A sink is any callable
+taking the stage name and the elapsed seconds. With no sinks registered
+the instrumented code only checks that the sink list is empty.
+
+Stages:
+    qr.tlv, qr.base64, qr.matrix, qr.image, qr.png, qr.render,
+    invoice.hash, invoice.sign, invoice.qr, invoice.xades,
+    csr.key, csr.sign, csr.generate
+"""
+
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+Sink = Callable[[str, float], None]
+
+# Registered sinks. Instrumented code checks ``if sinks`` before timing anything.
+sinks: List[Sink] = []
+
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+
+class _NullStage:
+    """Stage used while no sinks are registered."""
+    
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+
+
+class _Stage:
+    """Times a block and emits it to the sinks on exit."""
+    
+    __slots__ = ('name', 'start')
+    
+    def __init__(self, name: str):
+        self.name = name
+    
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        emit(self.name, perf_counter() - self.start)
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name: str):
+    """
+    Time a block of code as a named stage.
+    
+    Args:
+        name (str): The stage name
+        
+    Returns:
+        A context manager that emits the elapsed time on exit
+    """
+    if not sinks:
+        return _NULL_STAGE
+    return _Stage(name)
+
+
+def emit(name: str, seconds: float) -> None:
+    """
+    Report a timed stage to every sink.
+    
+    Args:
+        name (str): The stage name
+        seconds (float): The elapsed time in seconds
+    """
+    for sink in sinks:
+        sink(name, seconds)
+
+
+def add_sink(sink: Sink) -> Sink:
+    """
+    Register a sink.
+    
+    Args:
+        sink (callable): Called with the stage name and elapsed seconds
+        
+    Returns:
+        callable: The sink, so it can be used as a decorator
+    """
+    sinks.append(sink)
+    return sink
+
+
+def remove_sink(sink: Sink) -> None:
+    """
+    Unregister a sink.
+    
+    Args:
+        sink (callable): A registered sink
+    """
+    if sink in sinks:
+        sinks.remove(sink)
+
+
+@contextmanager
+def attached(sink: Sink) -> Iterator[Sink]:
+    """
+    Register a sink for the duration of a block.
+    
+    Args:
+        sink (callable): Called with the stage name and elapsed seconds
+        
+    Yields:
+        callable: The sink
+    """
+    add_sink(sink)
+    try:
+        yield sink
+    finally:
+        remove_sink(sink)
+
+
+class HistogramSink:
+    """
+    Keeps a latency histogram per stage in process.
+    
+    Histograms use fixed upper bounds in seconds, like Prometheus
+    histograms, and can be dumped in the Prometheus text format.
+    """
+    
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 metric: str = 'pyzatca_stage_duration_seconds'):
+        """
+        Initialize the sink.
+        
+        Args:
+            buckets (Sequence[float]): Increasing bucket upper bounds in seconds
+            metric (str): The metric name used in the Prometheus output
+            
+        Raises:
+            ValueError: If the buckets are empty or not increasing
+        """
+        buckets = tuple(float(bound) for bound in buckets)
+        if not buckets or any(low >= high for low, high in zip(buckets, buckets[1:])):
+            raise ValueError('buckets must be increasing')
+        self.buckets = buckets
+        self.metric = metric
+        self._stages = {}
+        self._lock = threading.Lock()
+    
+    def __call__(self, name: str, seconds: float) -> None:
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._stages.get(name)
+            if histogram is None:
+                # Per-bucket counts, with the last slot for +Inf, then sum
+                histogram = self._stages[name] = [[0] * (len(self.buckets) + 1), 0.0]
+            histogram[0][index] += 1
+            histogram[1] += seconds
+    
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        Get the recorded histograms.
+        
+        Returns:
+            dict: Per stage, the cumulative bucket counts keyed by upper bound,
+                the total count and the sum of seconds
+        """
+        with self._lock:
+            stages = {name: (list(counts), total) for name, (counts, total) in self._stages.items()}
+        
+        result = {}
+        for name, (counts, total) in sorted(stages.items()):
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                buckets[bound] = cumulative
+            result[name] = {'buckets': buckets, 'count': cumulative, 'sum': total}
+        return result
+    
+    def quantile(self, name: str, q: float) -> Optional[float]:
+        """
+        Estimate a quantile of a stage from its buckets.
+        
+        Args:
+            name (str): The stage name
+            q (float): The quantile, between 0 and 1
+            
+        Returns:
+            float: The upper bound of the bucket holding the quantile, or None
+                if the stage has not been recorded
+        """
+        histogram = self.snapshot().get(name)
+        if histogram is None:
+            return None
+        rank = q * histogram['count']
+        for bound, cumulative in histogram['buckets'].items():
+            if cumulative >= rank:
+                return bound
+        return float('inf')
+    
+    def reset(self) -> None:
+        """Forget every recorded stage."""
+        with self._lock:
+            self._stages.clear()
+    
+    def to_prometheus(self) -> str:
+        """
+        Dump the histograms in the Prometheus text exposition format.
+        
+        Returns:
+            str: The metric family, one histogram per stage label
+        """
+        lines = [
+            f'# HELP {self.metric} Time spent in each pyzatca stage.',
+            f'# TYPE {self.metric} histogram',
+        ]
+        for name, histogram in self.snapshot().items():
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            for bound, cumulative in histogram['buckets'].items():
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.metric}_bucket{{stage="{label}",le="{le}"}} {cumulative}')
+            lines.append(f'{self.metric}_sum{{stage="{label}"}} {histogram["sum"]!r}')
+            lines.append(f'{self.metric}_count{{stage="{label}"}} {histogram["count"]}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,573 @@
+"""
+Previous invoice hash chains of EGS units.
+
+Every EGS unit numbers its invoices with an invoice counter value (ICV)
+and links each invoice to the one before it with the previous invoice
+hash (PIH), the hash of the previous invoice. Both are stored in document
+references of the invoice and are part of its hash, so the chain of a
+unit is strictly sequential:
+
+    <cac:AdditionalDocumentReference>
+        <cbc:ID>ICV</cbc:ID>
+        <cbc:UUID>42</cbc:UUID>
+    </cac:AdditionalDocumentReference>
+    
+``InvoiceChain`` keeps the running ICV and PIH of one unit and saves them
+to a small checkpoint, so a restarted process continues the chain
+without rehashing earlier invoices. ``ChainEngine`` runs the chains of
+many units on a thread pool: only hashing is ordered per unit, while
+signing and building the signed XML run in parallel.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional, Tuple
+
+from .helpers.invoice_hasher import CAC_NAMESPACE, CBC_NAMESPACE
+from .helpers.xades import find_root
+from .models.invoice_sign import InvoiceSign
+
+
+# The PIH of the first invoice of a unit: the base64 encoded hex SHA-256 of '0'
+INITIAL_PIH = base64.b64encode(hashlib.sha256(b'0').hexdigest().encode('ascii')).decode('ascii')
+
+ChainState = namedtuple('ChainState', ['icv', 'pih'])
+ChainState.__doc__ = """The ICV of the last invoice of a unit and the hash to link the next invoice to."""
+
+ChainedInvoice = namedtuple('ChainedInvoice', ['device', 'icv', 'pih', 'xml', 'hash', 'qr_code'])
+ChainedInvoice.__doc__ = """A signed invoice with its place in the chain of its unit."""
+
+_PendingInvoice = namedtuple('_PendingInvoice', ['icv', 'pih', 'signer'])
+
+ICV_REFERENCE = (
+    '<cac:AdditionalDocumentReference{namespaces}>\n'
+    '        <cbc:ID>ICV</cbc:ID>\n'
+    '        <cbc:UUID>{icv}</cbc:UUID>\n'
+    '    </cac:AdditionalDocumentReference>'
+)
+
+PIH_REFERENCE = (
+    '<cac:AdditionalDocumentReference{namespaces}>\n'
+    '        <cbc:ID>PIH</cbc:ID>\n'
+    '        <cac:Attachment>\n'
+    '            <cbc:EmbeddedDocumentBinaryObject mimeCode="text/plain">{pih}</cbc:EmbeddedDocumentBinaryObject>\n'
+    '        </cac:Attachment>\n'
+    '    </cac:AdditionalDocumentReference>'
+)
+
+_ICV_VALUE = re.compile(r'(<cbc:ID>\s*ICV\s*</cbc:ID>\s*<cbc:UUID\b[^>]*?)(/>|>(.*?)</cbc:UUID>)', re.S)
+_PIH_VALUE = re.compile(
+    r'(<cbc:ID>\s*PIH\s*</cbc:ID>\s*<cac:Attachment>\s*<cbc:EmbeddedDocumentBinaryObject\b[^>]*?)'
+    r'(/>|>(.*?)</cbc:EmbeddedDocumentBinaryObject>)', re.S
+)
+_QR_ID = re.compile(r'<cbc:ID>\s*QR\s*</cbc:ID>')
+_REFERENCE_START = '<cac:AdditionalDocumentReference'
+_REFERENCE_END = '</cac:AdditionalDocumentReference>'
+
+
+def _fill(pattern, xml_invoice: str, value: str, end_tag: str) -> Optional[str]:
+    match = pattern.search(xml_invoice)
+    if match is None:
+        return None
+    return f'{xml_invoice[:match.end(1)]}>{value}{end_tag}{xml_invoice[match.end():]}'
+
+
+def set_chain_references(xml_invoice: str, icv: int, pih: str) -> str:
+    """
+    Put the ICV and PIH into an invoice.
+    
+    Existing ICV and PIH document references are filled in. A missing PIH
+    reference is added before the QR document reference, or after the last
+    document reference like split_invoice adds the QR reference, and a
+    missing ICV reference right before the PIH reference. The conventional
+    cac and cbc prefixes are expected; missing declarations are added on
+    the new elements.
+    
+    Args:
+        xml_invoice (str): The invoice XML
+        icv (int): The invoice counter value
+        pih (str): The base64 encoded hash of the previous invoice
+        
+    Returns:
+        str: The invoice XML with the chain references
+        
+    Raises:
+        ValueError: If the invoice has no root element
+    """
+    root = find_root(xml_invoice)
+    if root.group(2):
+        raise ValueError('invalid invoice XML: no root element')
+    namespaces = ''.join(
+        f' xmlns:{prefix}="{uri}"' for prefix, uri in (('cac', CAC_NAMESPACE), ('cbc', CBC_NAMESPACE))
+        if f'xmlns:{prefix}=' not in root.group(0)
+    )
+    
+    xml_invoice = _fill(_PIH_VALUE, xml_invoice, pih, '</cbc:EmbeddedDocumentBinaryObject>') or _insert(
+        xml_invoice, root, PIH_REFERENCE.format(namespaces=namespaces, pih=pih)
+    )
+    filled = _fill(_ICV_VALUE, xml_invoice, str(icv), '</cbc:UUID>')
+    if filled is not None:
+        return filled
+    # The ICV reference goes right before the PIH reference
+    position = xml_invoice.rfind(_REFERENCE_START, 0, _PIH_VALUE.search(xml_invoice).start())
+    reference = ICV_REFERENCE.format(namespaces=namespaces, icv=icv)
+    return f'{xml_invoice[:position]}{reference}\n    {xml_invoice[position:]}'
+
+
+def _insert(xml_invoice: str, root, reference: str) -> str:
+    """Add a document reference before the QR reference, or after the last document reference."""
+    qr = _QR_ID.search(xml_invoice, root.end())
+    position = xml_invoice.rfind(_REFERENCE_START, root.end(), qr.start()) if qr is not None else -1
+    if position >= 0:
+        return f'{xml_invoice[:position]}{reference}\n    {xml_invoice[position:]}'
+    position = xml_invoice.rfind(_REFERENCE_END, root.end())
+    if position >= 0:
+        position += len(_REFERENCE_END)
+        return f'{xml_invoice[:position]}\n    {reference}{xml_invoice[position:]}'
+    for anchor in ('<cac:Signature', '<cac:AccountingSupplierParty', f'</{root.group(1)}>'):
+        position = xml_invoice.find(anchor, root.end())
+        if position >= 0:
+            return f'{xml_invoice[:position]}{reference}\n    {xml_invoice[position:]}'
+    raise ValueError('invalid invoice XML: no end tag')
+
+
+class ChainCheckpoints:
+    """
+    The chain state of each unit in a small JSON file of its own.
+    
+    A unit ``egs-1`` is saved to ``egs-1.json`` as its ICV and PIH. Files
+    are replaced in one step, so a crash leaves either the old or the new
+    state. Without a directory the states are only kept in memory.
+    """
+    
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Initialize the checkpoints.
+        
+        Args:
+            directory (str, optional): The directory holding the files, created if missing
+        """
+        self.directory = directory
+        self._states = {}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    
+    def _path(self, device: str) -> str:
+        if os.sep in device or (os.altsep and os.altsep in device) or device in ('', '.', '..'):
+            raise ValueError(f'invalid device identifier: {device!r}')
+        return os.path.join(self.directory, f'{device}.json')
+    
+    def load(self, device: str) -> Optional[ChainState]:
+        """
+        Get the saved state of a unit.
+        
+        Args:
+            device (str): The unit identifier
+            
+        Returns:
+            ChainState: The saved state, or None if the unit has no checkpoint
+            
+        Raises:
+            ValueError: If the identifier is not a plain file name
+        """
+        if not self.directory:
+            return self._states.get(device)
+        try:
+            with open(self._path(device), encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        return ChainState(state['icv'], state['pih'])
+    
+    def save(self, device: str, state: ChainState) -> None:
+        """
+        Save the state of a unit, replacing its previous checkpoint in one step.
+        
+        Args:
+            device (str): The unit identifier
+            state (ChainState): The state to save
+            
+        Raises:
+            ValueError: If the identifier is not a plain file name
+        """
+        if not self.directory:
+            self._states[device] = state
+            return
+        path = self._path(device)
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'icv': state.icv, 'pih': state.pih}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+
+class InvoiceChain:
+    """
+    The running ICV and PIH of one EGS unit.
+    
+    Invoices get the next ICV and the hash of the previous invoice in the
+    order they are given, also when they are signed from several threads:
+    each invoice takes a turn when it is queued, and waits for its turn
+    only while it is hashed.
+    
+    ``state`` only moves on when a signed invoice is handed to the caller.
+    Invoices that were hashed but never handed out, e.g. when a sign_many
+    loop stops early, are taken back, so the next invoice follows the last
+    one the caller got. This expects one caller to feed a unit at a time.
+    
+    With ``checkpoint_every`` above 1 the state is saved every so many
+    invoices and on flush(). After a crash the chain resumes from the last
+    checkpoint, so the invoices signed since then must be signed again, in
+    the same order and with the same signing times, to rebuild the chain.
+    
+    The certificate is looked up for every invoice, so a chain can take
+    its certificate from a CertificateStore without keeping it parsed, and
+    picks up renewed certificates.
+    
+    Example:
+        chain = InvoiceChain('egs-1', certificate, ChainCheckpoints('/var/lib/zatca/chains'))
+        for xml_invoice in invoices:
+            signed = chain.sign(xml_invoice)
+    """
+    
+    def __init__(self, device: str, certificate, checkpoints: Optional[ChainCheckpoints] = None,
+                 checkpoint_every: int = 1):
+        """
+        Initialize the chain, resuming from its checkpoint if there is one.
+        
+        Args:
+            device (str): The unit identifier
+            certificate: The Certificate or RotatingCertificate of the unit, or
+                a CertificateStore or mapping holding it under the unit identifier
+            checkpoints (ChainCheckpoints, optional): Where to save the state; in memory by default
+            checkpoint_every (int): Number of invoices between checkpoints
+            
+        Raises:
+            ValueError: If checkpoint_every is not positive
+        """
+        if checkpoint_every < 1:
+            raise ValueError('checkpoint_every must be positive')
+        self.device = device
+        self.certificate = certificate
+        self.checkpoints = checkpoints if checkpoints is not None else ChainCheckpoints()
+        self.checkpoint_every = checkpoint_every
+        self.state = self.checkpoints.load(device) or ChainState(0, INITIAL_PIH)
+        self._saved = self.state
+        # The state after the last hashed invoice, ahead of state while invoices are in flight
+        self._head = self.state
+        self._issued = 0
+        self._serving = 0
+        self._abandoned = set()
+        self._turn = threading.Condition()
+        self._save_lock = threading.Lock()
+    
+    def _reserve(self) -> int:
+        """Take the next turn; it must be passed to _hash() or given back with _release()."""
+        with self._turn:
+            ticket = self._issued
+            self._issued += 1
+        return ticket
+    
+    def _release(self, ticket: int) -> None:
+        """Give back a turn that will not be hashed, e.g. of a cancelled invoice."""
+        with self._turn:
+            self._abandoned.add(ticket)
+            self._advance()
+    
+    def _advance(self) -> None:
+        while self._serving in self._abandoned:
+            self._abandoned.discard(self._serving)
+            self._serving += 1
+        self._turn.notify_all()
+    
+    def _wait(self, ticket: int) -> None:
+        with self._turn:
+            self._turn.wait_for(lambda: self._serving == ticket)
+    
+    def _pass(self) -> None:
+        with self._turn:
+            self._serving += 1
+            self._advance()
+    
+    def _idle(self) -> bool:
+        """Whether no invoice is queued, in flight, or waiting to be handed out."""
+        with self._turn:
+            return self._serving == self._issued and self._head == self.state
+    
+    def _certificate(self):
+        certificate = self.certificate
+        return certificate if hasattr(certificate, 'current') else certificate[self.device]
+    
+    def _hash(self, ticket: int, xml_invoice: str, signing_time=None) -> _PendingInvoice:
+        """Chain and hash an invoice in its turn; an invoice that fails is left out of the chain."""
+        self._wait(ticket)
+        try:
+            icv, pih = self._head.icv + 1, self._head.pih
+            signer = InvoiceSign(set_chain_references(xml_invoice, icv, pih), self._certificate(), signing_time)
+            self._head = ChainState(icv, signer.get_hash())
+            return _PendingInvoice(icv, pih, signer)
+        finally:
+            self._pass()
+    
+    def _complete(self, pending: _PendingInvoice) -> ChainedInvoice:
+        """Sign a hashed invoice; invoices of the unit may be completed in any order."""
+        signer = pending.signer
+        xml = signer.get_invoice()
+        return ChainedInvoice(self.device, pending.icv, pending.pih, xml, signer.get_hash(), signer.get_qr_code())
+    
+    def _commit(self, signed: ChainedInvoice) -> None:
+        """Move the state on to an invoice handed to the caller, and save it when a checkpoint is due."""
+        with self._save_lock:
+            if signed.icv <= self.state.icv:
+                return
+            self.state = ChainState(signed.icv, signed.hash)
+        if signed.icv % self.checkpoint_every == 0:
+            self.flush()
+    
+    def _rollback(self) -> None:
+        """Take back the invoices hashed since the last one handed out; waits for a turn."""
+        self._wait(self._reserve())
+        try:
+            self._head = self.state
+        finally:
+            self._pass()
+    
+    def sign(self, xml_invoice: str, signing_time=None) -> ChainedInvoice:
+        """
+        Chain and sign the next invoice of the unit.
+        
+        Args:
+            xml_invoice (str): The invoice XML
+            signing_time (Union[datetime, str], optional): The XAdES signing time
+            
+        Returns:
+            ChainedInvoice: The signed invoice and its place in the chain
+            
+        Raises:
+            ValueError: If the invoice XML is not well-formed
+        """
+        return self._sign(self._reserve(), xml_invoice, signing_time)
+    
+    def _sign(self, ticket: int, xml_invoice: str, signing_time=None) -> ChainedInvoice:
+        pending = self._hash(ticket, xml_invoice, signing_time)
+        try:
+            signed = self._complete(pending)
+        except Exception:
+            self._rollback()
+            raise
+        self._commit(signed)
+        return signed
+    
+    def flush(self) -> None:
+        """Save the state if it changed since the last checkpoint."""
+        with self._save_lock:
+            state = self.state
+            if state != self._saved:
+                self.checkpoints.save(self.device, state)
+                self._saved = state
+
+
+class ChainEngine:
+    """
+    The invoice chains of many EGS units.
+    
+    Chains are created on first use and resume from their checkpoints, so
+    a restart costs one small file read per active unit. With
+    ``max_chains`` the least recently used chains are flushed and dropped
+    once there are more, as long as they have no invoices in flight, and
+    are rebuilt from their checkpoints when their units come back.
+    
+    Example:
+        engine = ChainEngine(CertificateStore.from_directory('/etc/zatca/csids'),
+                             ChainCheckpoints('/var/lib/zatca/chains'))
+        for signed in engine.sign_many((record['device'], record['xml']) for record in records):
+            submit(signed)
+    """
+    
+    def __init__(self, certificates, checkpoints: Optional[ChainCheckpoints] = None, checkpoint_every: int = 1,
+                 max_chains: Optional[int] = None):
+        """
+        Initialize the engine.
+        
+        Args:
+            certificates: One Certificate or RotatingCertificate for every unit, or
+                a CertificateStore or mapping of unit identifiers to certificates
+            checkpoints (ChainCheckpoints, optional): Where to save the states; in memory by default
+            checkpoint_every (int): Number of invoices between checkpoints of a unit
+            max_chains (int, optional): Number of chains to keep; unbounded by default
+            
+        Raises:
+            ValueError: If checkpoint_every or max_chains is not positive
+        """
+        if checkpoint_every < 1:
+            raise ValueError('checkpoint_every must be positive')
+        if max_chains is not None and max_chains < 1:
+            raise ValueError('max_chains must be positive')
+        self.certificates = certificates
+        self.checkpoints = checkpoints if checkpoints is not None else ChainCheckpoints()
+        self.checkpoint_every = checkpoint_every
+        self.max_chains = max_chains
+        self._chains = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def chain(self, device: str) -> InvoiceChain:
+        """
+        Get the chain of a unit, resuming it from its checkpoint on first use.
+        
+        With ``max_chains`` an idle chain may be dropped later on, so sign
+        through the engine rather than keeping the chain around.
+        
+        Args:
+            device (str): The unit identifier
+            
+        Returns:
+            InvoiceChain: The chain
+            
+        Raises:
+            KeyError: If there is no certificate for the unit
+        """
+        with self._lock:
+            return self._get_chain(device)
+    
+    def _get_chain(self, device: str) -> InvoiceChain:
+        """Look up or create the chain of a unit; the engine lock must be held."""
+        chain = self._chains.get(device)
+        if chain is not None:
+            self._chains.move_to_end(device)
+            return chain
+        certificates = self.certificates
+        if not hasattr(certificates, 'current') and device not in certificates:
+            raise KeyError(device)
+        chain = self._chains[device] = InvoiceChain(device, certificates, self.checkpoints, self.checkpoint_every)
+        if self.max_chains is not None and len(self._chains) > self.max_chains:
+            self._evict(len(self._chains) - self.max_chains)
+        return chain
+    
+    def _evict(self, count: int) -> None:
+        """Flush and drop up to count of the least recently used idle chains, never the newest one."""
+        for device in list(self._chains)[:-1]:
+            if count == 0:
+                break
+            chain = self._chains[device]
+            if chain._idle():
+                chain.flush()
+                del self._chains[device]
+                count -= 1
+    
+    def _reserve(self, device: str) -> Tuple[InvoiceChain, int]:
+        """Take the next turn of a unit; holding a turn keeps its chain from being dropped."""
+        with self._lock:
+            chain = self._get_chain(device)
+            return chain, chain._reserve()
+    
+    def state(self, device: str) -> ChainState:
+        """
+        Get the state of a unit.
+        
+        Args:
+            device (str): The unit identifier
+            
+        Returns:
+            ChainState: The ICV of its last invoice and the PIH of its next invoice
+        """
+        chain = self._chains.get(device)
+        if chain is not None:
+            return chain.state
+        return self.checkpoints.load(device) or ChainState(0, INITIAL_PIH)
+    
+    def sign(self, device: str, xml_invoice: str, signing_time=None) -> ChainedInvoice:
+        """
+        Chain and sign the next invoice of a unit.
+        
+        Args:
+            device (str): The unit identifier
+            xml_invoice (str): The invoice XML
+            signing_time (Union[datetime, str], optional): The XAdES signing time
+            
+        Returns:
+            ChainedInvoice: The signed invoice and its place in the chain
+        """
+        chain, ticket = self._reserve(device)
+        return chain._sign(ticket, xml_invoice, signing_time)
+    
+    def sign_many(self, invoices: Iterable[Tuple[str, str]], workers: Optional[int] = None,
+                  signing_time=None) -> Iterator[ChainedInvoice]:
+        """
+        Chain and sign invoices of many units across a thread pool.
+        
+        The invoices of a unit are chained in input order. Only hashing
+        waits for the previous invoice of the same unit; invoices of other
+        units, and the signing of every invoice, run in parallel. Only a
+        bounded number of invoices is in flight at a time, and results are
+        yielded in input order. A chain only moves on when its invoice is
+        yielded: if the loop stops early or an invoice fails, the invoices
+        in flight are dropped and the next invoice of each unit follows the
+        last one yielded.
+        
+        Args:
+            invoices (Iterable[Tuple[str, str]]): (unit identifier, invoice XML) pairs
+            workers (int, optional): Number of worker threads; defaults to the CPU count
+            signing_time (Union[datetime, str], optional): The XAdES signing time of every invoice
+            
+        Yields:
+            ChainedInvoice: The signed invoice and its place in the chain
+            
+        Raises:
+            ValueError: If workers is not positive
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError('workers must be positive')
+        
+        def sign_one(chain, ticket, xml_invoice):
+            return chain._complete(chain._hash(ticket, xml_invoice, signing_time))
+        
+        def hand_out():
+            # An invoice that fails stays pending, so its chain is rolled back
+            future, chain, _ = pending[0]
+            signed = future.result()
+            pending.popleft()
+            chain._commit(signed)
+            return signed
+        
+        max_pending = workers * 4
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                for device, xml_invoice in invoices:
+                    if len(pending) >= max_pending:
+                        yield hand_out()
+                    chain, ticket = self._reserve(device)
+                    pending.append((executor.submit(sign_one, chain, ticket, xml_invoice), chain, ticket))
+                
+                while pending:
+                    yield hand_out()
+            finally:
+                for future, chain, ticket in pending:
+                    if future.cancel():
+                        chain._release(ticket)
+                if pending:
+                    # Let the running invoices finish, then take back everything not yielded
+                    executor.shutdown(wait=True)
+                    for chain in set(entry[1] for entry in pending):
+                        chain._rollback()
+    
+    def flush(self) -> None:
+        """Save the state of every unit that changed since its last checkpoint."""
+        with self._lock:
+            chains = list(self._chains.values())
+        for chain in chains:
+            chain.flush()
+    
+    def __enter__(self) -> 'ChainEngine':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.flush()
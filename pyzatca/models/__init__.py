@@ -2,16 +2,48 @@
 ZATCA Models module
 
 This module contains data models used in the ZATCA library.
+
+Models are imported on first access, so Phase 1 models such as
+``InvoiceBatch`` do not load ``cryptography``.
 """
 
-from .csr_request import CSRRequest
-from .csr import CSR
-from .invoice import Invoice
-from .invoice_sign import InvoiceSign
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .csr_request import CSRRequest
+    from .csr import CSR
+    from .invoice import Invoice
+    from .invoice_sign import InvoiceSign, SignedInvoice
+    from .invoice_batch import InvoiceBatch
+
+_LAZY_IMPORTS = {
+    'CSRRequest': '.csr_request',
+    'CSR': '.csr',
+    'Invoice': '.invoice',
+    'InvoiceSign': '.invoice_sign',
+    'SignedInvoice': '.invoice_sign',
+    'InvoiceBatch': '.invoice_batch',
+}
 
 __all__ = [
     'CSRRequest',
     'CSR', 
     'Invoice',
-    'InvoiceSign'
-] 
\ No newline at end of file
+    'InvoiceSign',
+    'SignedInvoice',
+    'InvoiceBatch'
+]
+
+
+def __getattr__(name):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
@@ -2,28 +2,56 @@
 Invoice model for ZATCA.
 """
 
+from typing import Optional
+
 
 class Invoice:
     """
     Invoice model for ZATCA e-invoicing.
     
     This class represents an invoice with its XML content and metadata.
+    An invoice can also refer to an XML file, which is then only read when
+    its content is asked for, so it can be hashed as a stream.
     """
     
-    def __init__(self, xml_content: str):
+    def __init__(self, xml_content: Optional[str], path: Optional[str] = None):
         """
         Initialize an invoice.
         
         Args:
-            xml_content (str): The invoice XML content
+            xml_content (str, optional): The invoice XML content
+            path (str, optional): The invoice XML file, read on demand when there is no content
+            
+        Raises:
+            ValueError: If neither content nor a path is given
         """
+        if xml_content is None and path is None:
+            raise ValueError('an invoice needs XML content or a path')
         self.xml_content = xml_content
+        self.path = path
+    
+    @classmethod
+    def from_path(cls, path: str) -> 'Invoice':
+        """
+        Create an invoice backed by an XML file.
+        
+        Args:
+            path (str): The invoice XML file
+            
+        Returns:
+            Invoice: A new invoice that reads the file on demand
+        """
+        return cls(None, path)
     
     def get_xml_content(self) -> str:
         """Get the XML content."""
+        if self.xml_content is None:
+            with open(self.path, encoding='utf-8') as f:
+                self.xml_content = f.read()
         return self.xml_content
     
     def set_xml_content(self, xml_content: str) -> 'Invoice':
         """Set the XML content."""
         self.xml_content = xml_content
-        return self 
\ No newline at end of file
+        self.path = None
+        return self
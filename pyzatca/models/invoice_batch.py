@@ -0,0 +1,334 @@
+"""
+Columnar invoice batch model for ZATCA.
+"""
+
+import binascii
+import datetime
+import functools
+import itertools
+from array import array
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple, Union
+from ..generate_qr_code import GenerateQrCode
+from ..qr_template import QrTemplate
+from ..tags.tag import encode_field, header_table
+
+
+_UTC = datetime.timezone.utc
+_HALALA = Decimal('0.01')
+# Invoices are encoded this many at a time, so memory stays bounded for large batches
+_CHUNK_ROWS = 65536
+
+_numpy = None
+
+
+def _load_numpy():
+    """Import NumPy once, returning False when it is not installed."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+    return _numpy
+
+
+def to_halalas(amount: Any) -> int:
+    """
+    Convert an amount in riyals to integer halalas.
+    
+    Args:
+        amount: The amount as a Decimal, str, int or float
+        
+    Returns:
+        int: The amount in halalas, rounded half up
+    """
+    return int(Decimal(str(amount)).quantize(_HALALA, rounding=ROUND_HALF_UP) * 100)
+
+
+def to_epoch(invoice_date: Union[datetime.datetime, int, float, str]) -> int:
+    """
+    Convert an invoice date to epoch seconds.
+    
+    Naive datetimes are taken as UTC.
+    
+    Args:
+        invoice_date: A datetime, epoch seconds or an ISO 8601 string
+        
+    Returns:
+        int: Whole seconds since the epoch
+    """
+    if isinstance(invoice_date, str):
+        invoice_date = datetime.datetime.fromisoformat(invoice_date.replace('Z', '+00:00'))
+    if isinstance(invoice_date, datetime.datetime):
+        if invoice_date.tzinfo is None:
+            invoice_date = invoice_date.replace(tzinfo=_UTC)
+        return int(invoice_date.timestamp())
+    return int(invoice_date)
+
+
+def _int64_column(values: Iterable) -> array:
+    """Copy integers into an int64 column, taking NumPy arrays through ``tolist``."""
+    if hasattr(values, 'tolist'):
+        values = values.tolist()
+    return array('q', values)
+
+
+class InvoiceBatch:
+    """
+    Phase 1 invoice fields stored column-wise.
+    
+    Amounts are integer halalas and dates are epoch seconds, each in an
+    ``array('q')`` column. Sellers are dictionary-encoded: every distinct
+    seller name and tax number pair is stored and TLV encoded once, and
+    invoices refer to it by index.
+    
+    With NumPy installed (``pip install fatoora[numpy]``) payloads are
+    built column by column: dates are formatted in bulk, amounts once per
+    distinct value, and the fields of all rows are joined without a Python
+    loop per row. Without it the same payloads are built row by row.
+    """
+    
+    def __init__(self):
+        """Initialize an empty batch."""
+        self.sellers: List[Tuple[str, str]] = []
+        self.seller_ids = array('I')
+        self.dates = array('q')
+        self.totals = array('q')
+        self.taxes = array('q')
+        self._seller_index: Dict[Tuple[str, str], int] = {}
+        self._seller_prefixes: List[bytes] = []
+    
+    @classmethod
+    def from_rows(cls, rows: Iterable[Union[Sequence[Any], Mapping[str, Any]]]) -> 'InvoiceBatch':
+        """
+        Create a batch from invoice rows.
+        
+        Args:
+            rows (Iterable): Rows as accepted by ``extend``
+            
+        Returns:
+            InvoiceBatch: A new InvoiceBatch instance
+        """
+        batch = cls()
+        batch.extend(rows)
+        return batch
+    
+    @classmethod
+    def from_columns(cls, sellers: Sequence[str], tax_numbers: Sequence[str], dates: Iterable[int],
+                     totals: Iterable[int], taxes: Iterable[int]) -> 'InvoiceBatch':
+        """
+        Create a batch from whole columns.
+        
+        The numeric columns can be lists, arrays or NumPy arrays.
+        
+        Args:
+            sellers (Sequence[str]): Seller name of each invoice
+            tax_numbers (Sequence[str]): Seller tax number of each invoice
+            dates (Iterable[int]): Invoice dates in epoch seconds
+            totals (Iterable[int]): Invoice total amounts in halalas
+            taxes (Iterable[int]): Invoice tax amounts in halalas
+            
+        Returns:
+            InvoiceBatch: A new InvoiceBatch instance
+            
+        Raises:
+            ValueError: If the columns have different lengths or a value is too long
+        """
+        batch = cls()
+        add_seller = batch.add_seller
+        seller_index = batch._seller_index
+        batch.seller_ids = array('I', [
+            seller_index[key] if key in seller_index else add_seller(*key) for key in zip(sellers, tax_numbers)
+        ])
+        batch.dates = _int64_column(dates)
+        batch.totals = _int64_column(totals)
+        batch.taxes = _int64_column(taxes)
+        
+        lengths = {len(sellers), len(tax_numbers), len(batch.dates), len(batch.totals), len(batch.taxes)}
+        if len(lengths) != 1:
+            raise ValueError('columns must have the same length')
+        return batch
+    
+    def add_seller(self, seller: str, tax_number: str) -> int:
+        """
+        Get the index of a seller, adding it on first use.
+        
+        Args:
+            seller (str): The seller name
+            tax_number (str): The seller tax number
+            
+        Returns:
+            int: The seller index
+            
+        Raises:
+            ValueError: If a value does not fit in one TLV field
+        """
+        key = (str(seller), str(tax_number))
+        seller_id = self._seller_index.get(key)
+        if seller_id is None:
+            prefix = QrTemplate(*key).prefix
+            seller_id = self._seller_index[key] = len(self.sellers)
+            self.sellers.append(key)
+            self._seller_prefixes.append(prefix)
+        return seller_id
+    
+    def append(self, seller: str, tax_number: str, invoice_date: Union[datetime.datetime, int, str],
+               total: Any, tax: Any) -> 'InvoiceBatch':
+        """
+        Add an invoice.
+        
+        Args:
+            seller (str): The seller name
+            tax_number (str): The seller tax number
+            invoice_date: A datetime, epoch seconds or an ISO 8601 string
+            total: The invoice total amount in riyals
+            tax: The invoice tax amount in riyals
+            
+        Returns:
+            InvoiceBatch: Self for method chaining
+        """
+        self.seller_ids.append(self.add_seller(seller, tax_number))
+        self.dates.append(to_epoch(invoice_date))
+        self.totals.append(to_halalas(total))
+        self.taxes.append(to_halalas(tax))
+        return self
+    
+    def extend(self, rows: Iterable[Union[Sequence[Any], Mapping[str, Any]]]) -> 'InvoiceBatch':
+        """
+        Add many invoices.
+        
+        Each row holds the seller name, seller tax number, invoice date,
+        invoice total amount and invoice tax amount, either as a sequence in
+        that order or as a mapping keyed by ``GenerateQrCode.ROW_FIELDS``, with values as
+        accepted by ``append``.
+        
+        Args:
+            rows (Iterable): The invoice rows
+            
+        Returns:
+            InvoiceBatch: Self for method chaining
+        """
+        for row in rows:
+            if isinstance(row, Mapping):
+                row = [row[field] for field in GenerateQrCode.ROW_FIELDS]
+            self.append(*row)
+        return self
+    
+    def __len__(self) -> int:
+        return len(self.seller_ids)
+    
+    def iter_tlv_bytes(self) -> Iterator[bytes]:
+        """
+        Encode every invoice as TLV bytes in one pass over the columns.
+        
+        Amount fields are encoded once per distinct value and reused. Dates
+        are formatted in bulk with NumPy, or otherwise once per day and once
+        per time of day.
+        
+        Yields:
+            bytes: The encoded TLV data structure of each invoice, in order
+        """
+        for chunk in self._iter_chunks():
+            yield from chunk
+    
+    def _iter_chunks(self) -> Iterator[List[bytes]]:
+        """Encode the invoices as lists of TLV bytes of up to _CHUNK_ROWS invoices each."""
+        numpy = _load_numpy()
+        if numpy and len(self):
+            yield from self._iter_column_chunks(numpy)
+            return
+        
+        rows = self._iter_rows()
+        chunk = list(itertools.islice(rows, _CHUNK_ROWS))
+        while chunk:
+            yield chunk
+            chunk = list(itertools.islice(rows, _CHUNK_ROWS))
+    
+    def _iter_rows(self) -> Iterator[bytes]:
+        """Encode every invoice row by row, without NumPy."""
+        prefixes = self._seller_prefixes
+        date_headers = header_table(3)
+        total_headers = header_table(4)
+        tax_headers = header_table(5)
+        days = {}
+        times = {}
+        total_fields = {}
+        tax_fields = {}
+        join = b''.join
+        
+        for seller_id, date, total, tax in zip(self.seller_ids, self.dates, self.totals, self.taxes):
+            day, seconds = divmod(date, 86400)
+            day_text = days.get(day)
+            if day_text is None:
+                day_date = datetime.datetime.fromtimestamp(day * 86400, _UTC)
+                day_text = days[day] = '%04d-%02d-%02dT' % (day_date.year, day_date.month, day_date.day)
+            time_text = times.get(seconds)
+            if time_text is None:
+                hours, rest = divmod(seconds, 3600)
+                time_text = times[seconds] = '%02d:%02d:%02dZ' % (hours, rest // 60, rest % 60)
+            
+            total_field = total_fields.get(total)
+            if total_field is None:
+                total_field = total_fields[total] = self._amount_field(total_headers, total)
+            tax_field = tax_fields.get(tax)
+            if tax_field is None:
+                tax_field = tax_fields[tax] = self._amount_field(tax_headers, tax)
+            
+            yield join((prefixes[seller_id], encode_field(date_headers, day_text + time_text), total_field, tax_field))
+    
+    def _iter_column_chunks(self, numpy) -> Iterator[List[bytes]]:
+        """Encode every invoice by gathering per-column field tables with NumPy."""
+        def field_table(values, encode):
+            distinct, indexes = numpy.unique(numpy.frombuffer(values, dtype=numpy.int64), return_inverse=True)
+            return numpy.array([encode(value) for value in distinct.tolist()], dtype=object), indexes
+        
+        date_headers = header_table(3)
+        total_headers = header_table(4)
+        tax_headers = header_table(5)
+        dates, date_ids = numpy.unique(numpy.frombuffer(self.dates, dtype=numpy.int64), return_inverse=True)
+        date_texts = numpy.char.add(numpy.datetime_as_string(dates.astype('datetime64[s]'), unit='s'), 'Z')
+        if (numpy.char.str_len(date_texts) == 20).all():
+            # Dates of the years 1 to 9999 share one length, so one header fits them all
+            date_fields = numpy.char.add(date_headers[20], date_texts.astype('S20')).astype(object)
+        else:
+            date_fields = numpy.array([encode_field(date_headers, text) for text in date_texts.tolist()], dtype=object)
+        total_fields, total_ids = field_table(self.totals, functools.partial(self._amount_field, total_headers))
+        tax_fields, tax_ids = field_table(self.taxes, functools.partial(self._amount_field, tax_headers))
+        prefixes = numpy.array(self._seller_prefixes, dtype=object)
+        seller_ids = numpy.frombuffer(self.seller_ids, dtype=numpy.uintc)
+        
+        for start in range(0, len(seller_ids), _CHUNK_ROWS):
+            rows = slice(start, start + _CHUNK_ROWS)
+            # Adding object arrays concatenates the bytes of each row
+            yield (
+                prefixes[seller_ids[rows]] + date_fields[date_ids[rows]]
+                + total_fields[total_ids[rows]] + tax_fields[tax_ids[rows]]
+            ).tolist()
+    
+    @staticmethod
+    def _amount_field(headers: Tuple[bytes, ...], halalas: int) -> bytes:
+        """Format halalas as a riyal amount with two decimals, behind its header."""
+        riyals, rest = divmod(abs(halalas), 100)
+        return encode_field(headers, '%s%d.%02d' % ('-' if halalas < 0 else '', riyals, rest))
+    
+    def iter_base64(self) -> Iterator[str]:
+        """
+        Encode every invoice as a base64 TLV payload.
+        
+        Yields:
+            str: The TLV as base64 encoded string of each invoice, in order
+        """
+        b2a_base64 = binascii.b2a_base64
+        for chunk in self._iter_chunks():
+            yield from [b2a_base64(tlv, newline=False).decode('ascii') for tlv in chunk]
+    
+    def to_base64(self) -> List[str]:
+        """
+        Encode every invoice as a base64 TLV payload.
+        
+        Returns:
+            List[str]: The TLV as base64 encoded string of each invoice, in order
+        """
+        return list(self.iter_base64())
@@ -2,11 +2,25 @@
 Invoice Sign model for ZATCA.
 """
 
-import hashlib
 import base64
-from typing import List
+import datetime
+import os
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional, Union
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+from .. import instrumentation
 from .invoice import Invoice
 from ..helpers.certificate import Certificate
+from ..helpers.rotating_certificate import RotatingCertificate
+from ..helpers.invoice_hasher import CAC_NAMESPACE, CBC_NAMESPACE, InvoiceHasher, iter_chunks
+from ..helpers.xades import SignatureTemplate, split_invoice
+from ..tags.seller import Seller
+from ..tags.tax_number import TaxNumber
+from ..tags.invoice_date import InvoiceDate
+from ..tags.invoice_total_amount import InvoiceTotalAmount
+from ..tags.invoice_tax_amount import InvoiceTaxAmount
 from ..tags.invoice_hash import InvoiceHash
 from ..tags.invoice_digital_signature import InvoiceDigitalSignature
 from ..tags.public_key import PublicKey
@@ -14,6 +28,34 @@ from ..tags.certificate_signature import CertificateSignature
 from ..generate_qr_code import GenerateQrCode
 
 
+SignedInvoice = namedtuple('SignedInvoice', ['xml', 'hash', 'qr_code'])
+SignedInvoice.__doc__ = """A signed invoice: the signed XML, its base64 hash and the QR payload."""
+
+_SUPPLIER_PARTY = ((CAC_NAMESPACE, 'AccountingSupplierParty'), (CAC_NAMESPACE, 'Party'))
+
+# Invoice fields for QR tags 1 to 5, collected while the invoice is hashed
+QR_FIELDS = {
+    _SUPPLIER_PARTY + ((CAC_NAMESPACE, 'PartyLegalEntity'), (CBC_NAMESPACE, 'RegistrationName')): 'seller',
+    _SUPPLIER_PARTY + ((CAC_NAMESPACE, 'PartyTaxScheme'), (CBC_NAMESPACE, 'CompanyID')): 'tax_number',
+    ((CBC_NAMESPACE, 'IssueDate'),): 'issue_date',
+    ((CBC_NAMESPACE, 'IssueTime'),): 'issue_time',
+    ((CAC_NAMESPACE, 'LegalMonetaryTotal'), (CBC_NAMESPACE, 'TaxInclusiveAmount')): 'total',
+    ((CAC_NAMESPACE, 'TaxTotal'), (CBC_NAMESPACE, 'TaxAmount')): 'tax',
+}
+
+
+def _sign_one(xml_invoice: str, certificate: Union[Certificate, RotatingCertificate]) -> SignedInvoice:
+    """Sign a single invoice inside a worker thread."""
+    signer = InvoiceSign(xml_invoice, certificate).sign()
+    return SignedInvoice(signer.get_invoice(), signer.get_hash(), signer.get_qr_code())
+
+
+def _sign_signer(signer: 'InvoiceSign') -> 'InvoiceSign':
+    """Sign an invoice and build its signed XML inside a worker."""
+    signer.sign().get_invoice()
+    return signer
+
+
 class InvoiceSign:
     """
     Invoice signing for ZATCA e-invoicing.
@@ -21,65 +63,251 @@ class InvoiceSign:
     This class handles the signing of invoices and generation of QR codes.
     """
     
-    def __init__(self, xml_invoice: str, certificate: Certificate):
+    def __init__(self, xml_invoice: Union[str, Invoice], certificate: Union[Certificate, RotatingCertificate],
+                 signing_time: Union[datetime.datetime, str, None] = None):
         """
         Initialize the invoice signer.
         
         Args:
-            xml_invoice (str): The invoice XML content
-            certificate (Certificate): The certificate for signing
+            xml_invoice (Union[str, Invoice]): The invoice XML content, or an Invoice
+            certificate (Union[Certificate, RotatingCertificate]): The certificate
+                for signing; the current one of a RotatingCertificate is kept
+                for the life of the signer
+            signing_time (Union[datetime, str], optional): The XAdES signing time;
+                the current UTC time when the invoice is signed by default
+        """
+        self.certificate = certificate.current()
+        self.invoice = xml_invoice if isinstance(xml_invoice, Invoice) else Invoice(xml_invoice)
+        self.signing_time = signing_time
+        self.signature = None
+        self._digest = None
+        self._fields = None
+        self._qr_code = None
+        self._signed_xml = None
+    
+    @classmethod
+    def from_path(cls, path: str, certificate: Union[Certificate, RotatingCertificate]) -> 'InvoiceSign':
         """
-        self.xml_invoice = xml_invoice
-        self.certificate = certificate
-        self.invoice = Invoice(xml_invoice)
+        Create an invoice signer for an XML file.
+        
+        The file is hashed as a stream, and only read whole if the signed
+        XML is asked for.
+        
+        Args:
+            path (str): The invoice XML file
+            certificate (Union[Certificate, RotatingCertificate]): The certificate for signing
+            
+        Returns:
+            InvoiceSign: A new invoice signer
+        """
+        return cls(Invoice.from_path(path), certificate)
+    
+    @property
+    def xml_invoice(self) -> str:
+        """The invoice XML content."""
+        return self.invoice.get_xml_content()
+    
+    @classmethod
+    def sign_many(cls, xml_invoices: Iterable[str], certificate: Union[Certificate, RotatingCertificate],
+                  workers: Optional[int] = None) -> Iterator[SignedInvoice]:
+        """
+        Sign many invoices with one certificate across a thread pool.
+        
+        Hashing and ECDSA signing in ``cryptography`` release the GIL, so the
+        threads sign in parallel while sharing the loaded certificate and
+        private key. Only a bounded number of invoices is in flight at a
+        time, so the input can be an arbitrarily long iterator. Results are
+        yielded in input order as soon as they are ready. With a
+        RotatingCertificate each invoice is signed with the certificate that
+        is current when its worker starts on it.
+        
+        Args:
+            xml_invoices (Iterable[str]): The invoice XML contents
+            certificate (Union[Certificate, RotatingCertificate]): The certificate for signing
+            workers (int, optional): Number of worker threads; defaults to the CPU count
+            
+        Yields:
+            SignedInvoice: The signed XML, hash and QR payload of each invoice
+            
+        Raises:
+            ValueError: If workers is not positive
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError('workers must be positive')
+        
+        max_pending = workers * 4
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                for xml_invoice in xml_invoices:
+                    if len(pending) >= max_pending:
+                        yield pending.popleft().result()
+                    pending.append(executor.submit(_sign_one, xml_invoice, certificate))
+                
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
     
     def sign(self) -> 'InvoiceSign':
         """
         Sign the invoice.
         
+        The invoice hash is signed with ECDSA over SHA-256 using the
+        certificate private key. The signed XML and the QR code are built
+        from the signature on demand.
+        
         Returns:
             InvoiceSign: Self for method chaining
+            
+        Raises:
+            ValueError: If the invoice XML is not well-formed
         """
-        # In a real implementation, this would involve XML signing
-        # For now, we'll create a basic implementation
+        digest = self._get_digest()
+        with instrumentation.stage('invoice.sign'):
+            signature = self.certificate.get_private_key().sign(
+                digest, ec.ECDSA(hashes.SHA256())
+            )
+        self.signature = base64.b64encode(signature).decode('ascii')
+        if self.signing_time is None:
+            self.signing_time = datetime.datetime.now(datetime.timezone.utc)
+        self._qr_code = self._signed_xml = None
         return self
     
+    async def sign_async(self, runner=None) -> SignedInvoice:
+        """
+        Sign the invoice without blocking the event loop.
+        
+        The signer itself is signed, with its signing time, so it holds the
+        signature and the signed XML afterwards. With a process pool runner
+        a copy is signed in the worker, rebuilding the certificate from its
+        PEM text, and its results are kept; thread pools are cheaper for
+        signing.
+        
+        Args:
+            runner (AsyncRunner, optional): Runner to sign on; defaults to ``aio.get_runner()``
+            
+        Returns:
+            SignedInvoice: The signed XML, hash and QR payload
+        """
+        from ..aio import get_runner
+        
+        runner = get_runner(runner)
+        if runner.uses_processes:
+            signed = await runner.run(_sign_signer, self)
+            for name in ('signature', 'signing_time', '_digest', '_fields', '_qr_code', '_signed_xml'):
+                setattr(self, name, getattr(signed, name))
+        else:
+            await runner.run(_sign_signer, self)
+        return SignedInvoice(self._signed_xml, self.get_hash(), self._qr_code)
+    
+    def _get_digest(self) -> bytes:
+        """Get the raw SHA-256 digest of the canonical invoice, collecting the QR fields on the way."""
+        if self._digest is None:
+            with instrumentation.stage('invoice.hash'):
+                hasher = InvoiceHasher(capture=QR_FIELDS)
+                if self.invoice.xml_content is None:
+                    for chunk in iter_chunks(self.invoice.path):
+                        hasher.update(chunk)
+                else:
+                    hasher.update(self.invoice.xml_content)
+                self._digest = hasher.digest()
+                self._fields = hasher.captured
+        return self._digest
+    
     def get_hash(self) -> str:
         """
         Get the invoice hash.
         
+        The hash covers the invoice canonicalized with C14N 1.1, without
+        the UBLExtensions, the Signature and the QR document reference.
+        
         Returns:
-            str: The invoice hash
+            str: The base64 encoded invoice hash
+            
+        Raises:
+            ValueError: If the invoice XML is not well-formed
         """
-        # Generate hash of the XML content
-        return base64.b64encode(
-            hashlib.sha256(self.xml_invoice.encode('utf-8')).digest()
-        ).decode('ascii')
+        return base64.b64encode(self._get_digest()).decode('ascii')
+    
+    def get_signature(self) -> Optional[str]:
+        """
+        Get the invoice signature.
+        
+        Returns:
+            str: The base64 encoded signature, or None before signing
+        """
+        return self.signature
+    
+    def get_signing_time(self) -> Optional[str]:
+        """
+        Get the XAdES signing time.
+        
+        Returns:
+            str: The signing time, e.g. '2025-08-05T07:21:06', or None before signing
+        """
+        if isinstance(self.signing_time, datetime.datetime):
+            return self.signing_time.strftime('%Y-%m-%dT%H:%M:%S')
+        return self.signing_time
     
     def get_invoice(self) -> str:
         """
         Get the signed invoice XML.
         
+        The XAdES signature is put in ext:UBLExtensions and the QR code in
+        the QR document reference, adding them and cac:Signature if the
+        invoice lacks them. The invoice is signed first if needed.
+        
         Returns:
             str: The signed invoice XML
+            
+        Raises:
+            ValueError: If the invoice XML is not well-formed
         """
-        # In a real implementation, this would return the signed XML
-        # For now, return the original XML
-        return self.xml_invoice
+        if self._signed_xml is None:
+            qr_code = self.get_qr_code()
+            with instrumentation.stage('invoice.xades'):
+                slots = split_invoice(self.xml_invoice)
+                extensions = SignatureTemplate.for_certificate(self.certificate).extensions(
+                    self.get_hash(), self.signature, self.get_signing_time(), slots.extension_namespaces
+                )
+                self._signed_xml = ''.join((slots.head, extensions, slots.middle, qr_code, slots.tail))
+        return self._signed_xml
     
     def get_qr_code(self) -> str:
         """
         Get the QR code as base64.
         
+        Tags 1 to 5 are taken from the invoice when it has the seller name,
+        VAT number, issue date and time, total and VAT amount; tags 6 to 9
+        carry the hash, the signature, the public key and the certificate
+        signature. The invoice is signed first if needed.
+        
         Returns:
             str: The QR code as base64 encoded string
         """
-        # Create tags for QR code
-        tags = [
-            InvoiceHash(self.get_hash()),
-            InvoiceDigitalSignature("signature_placeholder"),  # Would be actual signature
-            PublicKey(self.certificate.get_plain_public_key()),
-            CertificateSignature(self.certificate.get_certificate_signature())
-        ]
+        if self.signature is None:
+            self.sign()
         
-        return GenerateQrCode.from_array(tags).to_base64() 
\ No newline at end of file
+        if self._qr_code is None:
+            with instrumentation.stage('invoice.qr'):
+                tags = []
+                fields = self._fields
+                if len(fields) == len(QR_FIELDS):
+                    tags = [
+                        Seller(fields['seller']),
+                        TaxNumber(fields['tax_number']),
+                        InvoiceDate(f"{fields['issue_date']}T{fields['issue_time']}"),
+                        InvoiceTotalAmount(fields['total']),
+                        InvoiceTaxAmount(fields['tax']),
+                    ]
+                tags += [
+                    InvoiceHash(self.get_hash()),
+                    InvoiceDigitalSignature(self.signature),
+                    PublicKey(self.certificate.get_plain_public_key()),
+                    CertificateSignature(self.certificate.get_certificate_signature())
+                ]
+                self._qr_code = GenerateQrCode.from_array(tags).to_base64()
+        return self._qr_code
@@ -0,0 +1,295 @@
+"""
+Single-file store of QR code payloads with a fixed-width index.
+
+Layout of a store file:
+
+    header   magic ``PZQS``, format version, key width, image format
+    data     TLV payloads and optional images, back to back
+    index    one fixed-width entry per invoice, sorted by key:
+             key (NUL padded), TLV offset and length, image offset and length
+    trailer  index offset, entry count, magic
+    
+The writer builds the file under a temporary name and moves it into place
+on close, so readers only ever see complete stores. The reader maps the
+file and binary searches the index, returning memoryviews into the map.
+"""
+
+import mmap
+import os
+import struct
+from typing import Iterator, Optional, Tuple, Union
+
+
+MAGIC = b'PZQS'
+VERSION = 1
+IMAGE_FORMATS = ('', 'png', 'svg')
+
+_HEADER = struct.Struct('<4sHHB7x')
+_LOCATION = struct.Struct('<QIQI')
+_TRAILER = struct.Struct('<QQ4s')
+
+
+def _encode_key(invoice_number: Union[str, int], key_width: int) -> bytes:
+    key = str(invoice_number).encode('utf-8')
+    if not key or len(key) > key_width or b'\0' in key:
+        raise ValueError(f'invoice number must be 1 to {key_width} bytes without NUL')
+    return key.ljust(key_width, b'\0')
+
+
+class PayloadStoreWriter:
+    """
+    Appends payloads, and optionally rendered images, to a store file.
+    """
+    
+    def __init__(self, path: str, key_width: int = 32, image_format: Optional[str] = None):
+        """
+        Open a store for writing.
+        
+        Args:
+            path (str): The store file path
+            key_width (int): Maximum invoice number length in bytes
+            image_format (str, optional): 'png' or 'svg' to store an image per payload
+            
+        Raises:
+            ValueError: If the key width or image format is invalid
+        """
+        if not 1 <= key_width <= 255:
+            raise ValueError('key_width must be between 1 and 255')
+        if (image_format or '') not in IMAGE_FORMATS:
+            raise ValueError(f"image_format must be one of {', '.join(IMAGE_FORMATS[1:])}")
+        self.path = path
+        self.key_width = key_width
+        self.image_format = image_format or None
+        self._entries = {}
+        self._temp_path = f'{path}.tmp'
+        self._file = open(self._temp_path, 'wb')
+        self._file.write(_HEADER.pack(MAGIC, VERSION, key_width, IMAGE_FORMATS.index(image_format or '')))
+        self._offset = _HEADER.size
+    
+    def _append(self, data: Union[bytes, bytearray, memoryview]) -> Tuple[int, int]:
+        offset = self._offset
+        self._file.write(data)
+        self._offset += len(data)
+        return offset, len(data)
+    
+    def add(self, invoice_number: Union[str, int], tlv: Union[bytes, bytearray, memoryview],
+            image: Union[bytes, str, None] = None) -> None:
+        """
+        Add the payload of one invoice.
+        
+        Args:
+            invoice_number (Union[str, int]): The invoice number used as key
+            tlv (bytes): The encoded TLV data structure
+            image (Union[bytes, str], optional): The rendered image; SVG text is stored as UTF-8
+            
+        Raises:
+            ValueError: If the invoice number is invalid or already stored, or an
+                image is given to a store without an image format
+        """
+        key = _encode_key(invoice_number, self.key_width)
+        if key in self._entries:
+            raise ValueError(f'duplicate invoice number: {invoice_number}')
+        if image is not None and self.image_format is None:
+            raise ValueError('store has no image format')
+        
+        tlv_location = self._append(tlv)
+        image_location = (0, 0)
+        if image is not None:
+            image_location = self._append(image.encode('utf-8') if isinstance(image, str) else image)
+        self._entries[key] = tlv_location + image_location
+    
+    def add_qr_code(self, invoice_number: Union[str, int], qr_code, options: Optional[dict] = None) -> None:
+        """
+        Add a QR code, rendering it when the store keeps images.
+        
+        Args:
+            invoice_number (Union[str, int]): The invoice number used as key
+            qr_code (GenerateQrCode): The QR code
+            options (dict, optional): QR code options for the image
+        """
+        tlv = qr_code.to_tlv_bytes()
+        image = None
+        if self.image_format == 'png':
+            from .rendering.qr_image import render_png
+            image = render_png(qr_code.to_base64(), options)
+        elif self.image_format == 'svg':
+            from .rendering.targets import render_svg
+            image = render_svg(qr_code.to_base64(), options)
+        self.add(invoice_number, tlv, image)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def close(self) -> None:
+        """Write the sorted index and trailer, and move the store into place."""
+        if self._file is None:
+            return
+        index_offset = self._offset
+        pack = _LOCATION.pack
+        self._file.write(b''.join(
+            key + pack(*location) for key, location in sorted(self._entries.items())
+        ))
+        self._file.write(_TRAILER.pack(index_offset, len(self._entries), MAGIC))
+        self._file.close()
+        self._file = None
+        os.replace(self._temp_path, self.path)
+    
+    def abort(self) -> None:
+        """Discard the store being written."""
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        os.unlink(self._temp_path)
+    
+    def __enter__(self) -> 'PayloadStoreWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class PayloadStore:
+    """
+    Random access to a store file through ``mmap``.
+    
+    Payloads and images are returned as memoryviews into the mapped file,
+    without copying. Release them before closing the store.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Open a store for reading.
+        
+        Args:
+            path (str): The store file path
+            
+        Raises:
+            ValueError: If the file is not a complete store
+        """
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        try:
+            if len(self._map) < _HEADER.size + _TRAILER.size:
+                raise ValueError('not a payload store')
+            magic, version, self.key_width, image_format = _HEADER.unpack_from(self._map, 0)
+            index_offset, self._count, end_magic = _TRAILER.unpack_from(self._map, len(self._map) - _TRAILER.size)
+            if magic != MAGIC or end_magic != MAGIC or version != VERSION:
+                raise ValueError('not a payload store')
+        except BaseException:
+            self.close()
+            raise
+        self.image_format = IMAGE_FORMATS[image_format] or None
+        self._entry_size = self.key_width + _LOCATION.size
+        self._index_offset = index_offset
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def _key_at(self, position: int) -> bytes:
+        start = self._index_offset + position * self._entry_size
+        return self._map[start:start + self.key_width]
+    
+    def _find(self, invoice_number: Union[str, int]) -> Optional[tuple]:
+        """Binary search the index; returns the locations of an invoice."""
+        try:
+            key = _encode_key(invoice_number, self.key_width)
+        except ValueError:
+            return None
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and self._key_at(low) == key:
+            return _LOCATION.unpack_from(self._map, self._index_offset + low * self._entry_size + self.key_width)
+        return None
+    
+    def __contains__(self, invoice_number: Union[str, int]) -> bool:
+        return self._find(invoice_number) is not None
+    
+    def __getitem__(self, invoice_number: Union[str, int]) -> memoryview:
+        """
+        Get the TLV payload of an invoice.
+        
+        Raises:
+            KeyError: If the invoice is not stored
+        """
+        location = self._find(invoice_number)
+        if location is None:
+            raise KeyError(invoice_number)
+        offset, length = location[:2]
+        return self._view[offset:offset + length]
+    
+    def get(self, invoice_number: Union[str, int]) -> Optional[memoryview]:
+        """
+        Get the TLV payload of an invoice.
+        
+        Returns:
+            memoryview: The TLV bytes, or None if the invoice is not stored
+        """
+        try:
+            return self[invoice_number]
+        except KeyError:
+            return None
+    
+    def get_image(self, invoice_number: Union[str, int]) -> Optional[memoryview]:
+        """
+        Get the rendered image of an invoice.
+        
+        Returns:
+            memoryview: The image bytes, or None if there is no image
+            
+        Raises:
+            KeyError: If the invoice is not stored
+        """
+        location = self._find(invoice_number)
+        if location is None:
+            raise KeyError(invoice_number)
+        offset, length = location[2:]
+        if not length:
+            return None
+        return self._view[offset:offset + length]
+    
+    def get_qr_code(self, invoice_number: Union[str, int]):
+        """
+        Decode the stored payload of an invoice.
+        
+        Returns:
+            GenerateQrCode: A new GenerateQrCode instance holding the decoded tags
+            
+        Raises:
+            KeyError: If the invoice is not stored
+        """
+        from .generate_qr_code import GenerateQrCode
+        return GenerateQrCode(list(GenerateQrCode.decode_tlv(self[invoice_number])))
+    
+    def keys(self) -> Iterator[str]:
+        """Iterate over the stored invoice numbers in sorted key order."""
+        for position in range(self._count):
+            yield self._key_at(position).rstrip(b'\0').decode('utf-8')
+    
+    def __iter__(self) -> Iterator[str]:
+        return self.keys()
+    
+    def close(self) -> None:
+        """
+        Unmap the store.
+        
+        Raises:
+            BufferError: If memoryviews returned by the store are still alive
+        """
+        self._view.release()
+        self._map.close()
+    
+    def __enter__(self) -> 'PayloadStore':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,123 @@
+"""
+Per-merchant QR code templates for ZATCA e-invoicing.
+"""
+
+import base64
+from functools import lru_cache
+from typing import Any, Optional
+from .tags.tag import encode_field, header_table
+
+
+# Templates kept by ``qr_template``; sized for tens of thousands of merchants.
+TEMPLATE_CACHE_SIZE = 32768
+
+_DATE_HEADERS = header_table(3)
+_TOTAL_HEADERS = header_table(4)
+_TAX_HEADERS = header_table(5)
+
+
+class QrTemplate:
+    """
+    Pre-encoded Seller and TaxNumber tags of one merchant.
+    
+    The constant prefix is TLV encoded once, and each invoice only encodes
+    its own date, amounts and, for Phase 2, hash, signature, public key
+    and certificate signature.
+    """
+    
+    __slots__ = ('seller', 'tax_number', 'prefix')
+    
+    def __init__(self, seller: str, tax_number: str):
+        """
+        Initialize a template.
+        
+        Args:
+            seller (str): The seller name
+            tax_number (str): The seller tax number
+            
+        Raises:
+            ValueError: If a value does not fit in one TLV field
+        """
+        self.seller = str(seller)
+        self.tax_number = str(tax_number)
+        self.prefix = encode_field(header_table(1), self.seller) + encode_field(header_table(2), self.tax_number)
+    
+    def to_tlv_bytes(self, invoice_date: Any, invoice_total_amount: Any, invoice_tax_amount: Any,
+                     invoice_hash: Optional[str] = None, invoice_signature: Optional[str] = None,
+                     public_key: Optional[str] = None, certificate_signature: Optional[str] = None) -> bytes:
+        """
+        Encode an invoice as TLV bytes.
+        
+        Args:
+            invoice_date: The invoice date in ISO8601 format
+            invoice_total_amount: The invoice total amount
+            invoice_tax_amount: The invoice tax amount
+            invoice_hash (str, optional): The Phase 2 invoice hash (Tag 6)
+            invoice_signature (str, optional): The Phase 2 invoice signature (Tag 7)
+            public_key (str, optional): The Phase 2 public key (Tag 8)
+            certificate_signature (str, optional): The Phase 2 certificate signature (Tag 9)
+            
+        Returns:
+            bytes: The encoded TLV data structure
+            
+        Raises:
+            ValueError: If a value does not fit in one TLV field
+        """
+        tlv = b''.join((
+            self.prefix,
+            encode_field(_DATE_HEADERS, invoice_date),
+            encode_field(_TOTAL_HEADERS, invoice_total_amount),
+            encode_field(_TAX_HEADERS, invoice_tax_amount),
+        ))
+        
+        phase_two = (invoice_hash, invoice_signature, public_key, certificate_signature)
+        if phase_two == (None, None, None, None):
+            return tlv
+        return tlv + b''.join([
+            encode_field(header_table(tag), value) for tag, value in zip(range(6, 10), phase_two) if value is not None
+        ])
+    
+    def to_base64(self, *args, **kwargs) -> str:
+        """
+        Encode an invoice as a base64 TLV payload.
+        
+        Takes the same arguments as ``to_tlv_bytes``.
+        
+        Returns:
+            str: The TLV as base64 encoded string
+        """
+        return base64.b64encode(self.to_tlv_bytes(*args, **kwargs)).decode('ascii')
+    
+    def build(self, *args, **kwargs):
+        """
+        Build a QR code generator for an invoice, e.g. to render it.
+        
+        Takes the same arguments as ``to_tlv_bytes``.
+        
+        Returns:
+            GenerateQrCode: A new GenerateQrCode instance holding the invoice tags
+        """
+        from .generate_qr_code import GenerateQrCode
+        
+        return GenerateQrCode.from_array(list(GenerateQrCode.decode_tlv(self.to_tlv_bytes(*args, **kwargs))))
+    
+    def __repr__(self) -> str:
+        return f"QrTemplate(seller='{self.seller}', tax_number='{self.tax_number}')"
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def qr_template(seller: str, tax_number: str) -> QrTemplate:
+    """
+    Get the template of a merchant, keeping recently used templates.
+    
+    Use ``qr_template.cache_info()`` and ``qr_template.cache_clear()`` to
+    inspect and reset the cache.
+    
+    Args:
+        seller (str): The seller name
+        tax_number (str): The seller tax number
+        
+    Returns:
+        QrTemplate: The shared template
+    """
+    return QrTemplate(seller, tax_number)
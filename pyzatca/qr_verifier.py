@@ -0,0 +1,329 @@
+"""
+Verification of Phase 2 QR code signatures.
+
+A Phase 2 payload carries the invoice hash (tag 6), the ECDSA signature
+of that hash (tag 7), the signer's public key (tag 8) and the signature
+of the signer's certificate (tag 9). ``QrVerifier`` checks tag 7 against
+tag 8 and, for public keys of known certificates, tag 9 against the
+certificate. Across many invoices only a few hundred distinct public keys
+occur, so deserialized keys are kept in an LRU cache keyed by their bytes.
+"""
+
+import base64
+import binascii
+import os
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional, Tuple, Union
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from . import instrumentation
+from .generate_qr_code import GenerateQrCode
+from .helpers.certificate import Certificate, certificate_registry
+
+
+VerificationResult = namedtuple(
+    'VerificationResult', ['invoice', 'valid', 'signature_valid', 'certificate_valid', 'error']
+)
+VerificationResult.__doc__ = """
+The verification of one payload.
+
+``certificate_valid`` is None when the public key belongs to no known
+certificate, and ``error`` describes why an invalid payload failed.
+"""
+
+_ECDSA_SHA256 = ec.ECDSA(hashes.SHA256())
+
+
+class PublicKeyCache:
+    """
+    Thread-safe LRU cache of deserialized EC public keys, keyed by DER bytes.
+    """
+    
+    def __init__(self, maxsize: int = 1024):
+        """
+        Initialize the cache.
+        
+        Args:
+            maxsize (int): The number of public keys to keep
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, public_der: bytes) -> ec.EllipticCurvePublicKey:
+        """
+        Get the public key for DER encoded SubjectPublicKeyInfo bytes, loading it on a miss.
+        
+        Args:
+            public_der (bytes): The DER encoded public key
+            
+        Returns:
+            EllipticCurvePublicKey: The shared public key object
+            
+        Raises:
+            ValueError: If the bytes are not an EC public key
+        """
+        with self._lock:
+            key = self._entries.get(public_der)
+            if key is not None:
+                self._entries.move_to_end(public_der)
+                self.hits += 1
+                return key
+            self.misses += 1
+        
+        key = serialization.load_der_public_key(public_der)
+        if not isinstance(key, ec.EllipticCurvePublicKey):
+            raise ValueError('public key is not an elliptic curve key')
+        with self._lock:
+            key = self._entries.setdefault(public_der, key)
+            self._entries.move_to_end(public_der)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return key
+    
+    def clear(self) -> None:
+        """Remove every public key and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class VerificationReport:
+    """
+    Aggregate counts and throughput of a verification run.
+    """
+    
+    def __init__(self):
+        """Initialize an empty report; the clock starts now."""
+        self.total = 0
+        self.valid = 0
+        self.invalid_signatures = 0
+        self.invalid_certificates = 0
+        self.unknown_certificates = 0
+        self.errors = 0
+        self.start = time.perf_counter()
+        self.end = None
+    
+    def add(self, result: VerificationResult) -> None:
+        """
+        Count a verification result.
+        
+        Args:
+            result (VerificationResult): The result to count
+        """
+        self.total += 1
+        if result.valid:
+            self.valid += 1
+        if result.signature_valid is None:
+            self.errors += 1
+            return
+        if not result.signature_valid:
+            self.invalid_signatures += 1
+        if result.certificate_valid is None:
+            self.unknown_certificates += 1
+        elif not result.certificate_valid:
+            self.invalid_certificates += 1
+    
+    def finish(self) -> 'VerificationReport':
+        """
+        Stop the clock.
+        
+        Returns:
+            VerificationReport: Self for method chaining
+        """
+        self.end = time.perf_counter()
+        return self
+    
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the report was started, up to finish()."""
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+    
+    @property
+    def per_second(self) -> float:
+        """Payloads verified per second."""
+        return self.total / max(self.elapsed, 1e-9)
+    
+    def to_dict(self) -> dict:
+        """
+        Get the report as a plain dictionary, e.g. for JSON output.
+        
+        Returns:
+            dict: The counts, elapsed seconds and payloads per second
+        """
+        return {
+            'total': self.total,
+            'valid': self.valid,
+            'invalid_signatures': self.invalid_signatures,
+            'invalid_certificates': self.invalid_certificates,
+            'unknown_certificates': self.unknown_certificates,
+            'errors': self.errors,
+            'elapsed': round(self.elapsed, 6),
+            'per_second': round(self.per_second, 1),
+        }
+
+
+class QrVerifier:
+    """
+    Verifies the signatures in Phase 2 QR payloads.
+    """
+    
+    def __init__(self, certificates: Iterable[Union[Certificate, str]] = (),
+                 key_cache: Optional[PublicKeyCache] = None):
+        """
+        Initialize the verifier.
+        
+        Args:
+            certificates (Iterable[Union[Certificate, str]]): Known signing
+                certificates, as Certificate objects or PEM text, to check tag 9 against
+            key_cache (PublicKeyCache, optional): Cache of public keys; a private one by default
+        """
+        self.key_cache = key_cache if key_cache is not None else PublicKeyCache()
+        self._certificate_signatures = {}
+        for certificate in certificates:
+            self.add_certificate(certificate)
+    
+    def add_certificate(self, certificate: Union[Certificate, str]) -> 'QrVerifier':
+        """
+        Register a known signing certificate.
+        
+        Args:
+            certificate (Union[Certificate, str]): The certificate or its PEM text
+            
+        Returns:
+            QrVerifier: Self for method chaining
+        """
+        data = certificate.data if isinstance(certificate, Certificate) else certificate_registry.get(certificate)
+        public_der = base64.b64decode(data.get_plain_public_key())
+        self._certificate_signatures[public_der] = data.get_certificate_signature()
+        return self
+    
+    def verify(self, payload: Union[str, bytes], invoice: Optional[str] = None) -> VerificationResult:
+        """
+        Verify one base64 encoded payload.
+        
+        Malformed payloads do not raise; they are reported with an error
+        and ``signature_valid`` set to None.
+        
+        Args:
+            payload (Union[str, bytes]): The base64 encoded TLV payload
+            invoice (str, optional): The invoice the payload belongs to, copied into the result
+            
+        Returns:
+            VerificationResult: The outcome of the checks
+        """
+        with instrumentation.stage('qr.verify'):
+            try:
+                fields = {}
+                for tag, value in GenerateQrCode.iter_tlv(base64.b64decode(payload, validate=True)):
+                    if 6 <= tag <= 9:
+                        fields[tag] = value
+                missing = [str(tag) for tag in (6, 7, 8) if tag not in fields]
+                if missing:
+                    raise ValueError(f'payload has no tag {", ".join(missing)}')
+                digest = base64.b64decode(bytes(fields[6]), validate=True)
+                signature = base64.b64decode(bytes(fields[7]), validate=True)
+                public_der = base64.b64decode(bytes(fields[8]), validate=True)
+                public_key = self.key_cache.get(public_der)
+            except (ValueError, binascii.Error) as e:
+                return VerificationResult(invoice, False, None, None, str(e))
+            
+            try:
+                public_key.verify(signature, digest, _ECDSA_SHA256)
+                signature_valid = True
+            except InvalidSignature:
+                signature_valid = False
+            
+            certificate_valid = None
+            expected = self._certificate_signatures.get(public_der)
+            if expected is not None:
+                certificate_valid = 9 in fields and str(fields[9], 'utf-8', 'replace') == expected
+            
+            error = None
+            if not signature_valid:
+                error = 'invoice signature does not match the public key'
+            elif certificate_valid is False:
+                error = 'certificate signature does not match the known certificate'
+            return VerificationResult(
+                invoice, signature_valid and certificate_valid is not False, signature_valid, certificate_valid, error
+            )
+    
+    def verify_many(self, payloads: Iterable[Union[str, bytes, Tuple[str, Union[str, bytes]]]],
+                    workers: Optional[int] = None,
+                    report: Optional[VerificationReport] = None) -> Iterator[VerificationResult]:
+        """
+        Verify many payloads across a thread pool.
+        
+        ECDSA verification in ``cryptography`` releases the GIL, so threads
+        verify in parallel while sharing the cached public keys. Only a
+        bounded number of payloads is in flight at a time, and results are
+        yielded in input order.
+        
+        Args:
+            payloads (Iterable): Base64 encoded payloads, or (invoice, payload) pairs
+            workers (int, optional): Number of worker threads; defaults to the CPU count
+            report (VerificationReport, optional): Report to count every result into
+            
+        Yields:
+            VerificationResult: The outcome for each payload
+            
+        Raises:
+            ValueError: If workers is not positive
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError('workers must be positive')
+        
+        max_pending = workers * 4
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                for item in payloads:
+                    if len(pending) >= max_pending:
+                        result = pending.popleft().result()
+                        if report is not None:
+                            report.add(result)
+                        yield result
+                    if isinstance(item, tuple):
+                        pending.append(executor.submit(self.verify, item[1], item[0]))
+                    else:
+                        pending.append(executor.submit(self.verify, item))
+                
+                while pending:
+                    result = pending.popleft().result()
+                    if report is not None:
+                        report.add(result)
+                    yield result
+            finally:
+                for future in pending:
+                    future.cancel()
+                if report is not None:
+                    report.finish()
+    
+    def audit(self, payloads: Iterable[Union[str, bytes, Tuple[str, Union[str, bytes]]]],
+              workers: Optional[int] = None) -> Tuple[list, VerificationReport]:
+        """
+        Verify payloads and collect every result with the aggregate report.
+        
+        Use verify_many() directly to stream results for very large runs.
+        
+        Args:
+            payloads (Iterable): Base64 encoded payloads, or (invoice, payload) pairs
+            workers (int, optional): Number of worker threads; defaults to the CPU count
+            
+        Returns:
+            Tuple[list, VerificationReport]: The per-invoice results and the report
+        """
+        report = VerificationReport()
+        results = list(self.verify_many(payloads, workers, report))
+        return results, report
@@ -0,0 +1,28 @@
+"""
+ZATCA Rendering module
+
+This module contains the QR code image rendering backends used by GenerateQrCode.
+"""
+
+from .encoder import QrSymbol, encode
+from .qr_image import DEFAULT_OPTIONS, make_qr, make_image, render_png, render_data_uri
+from .pool import render_many
+from .cache import RenderCache
+from .targets import qr_matrix, render_svg, render_bitmap, render_pbm, render_escpos
+
+__all__ = [
+    'QrSymbol',
+    'encode',
+    'DEFAULT_OPTIONS',
+    'make_qr',
+    'make_image',
+    'render_png',
+    'render_data_uri',
+    'render_many',
+    'RenderCache',
+    'qr_matrix',
+    'render_svg',
+    'render_bitmap',
+    'render_pbm',
+    'render_escpos'
+]
@@ -0,0 +1,224 @@
+"""
+Content-addressed cache for rendered QR code images.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional, Union
+
+from .qr_image import resolve_options
+
+
+class RenderCache:
+    """
+    Two-tier cache of rendered PNG images.
+    
+    Images are keyed by a SHA-256 hash of the TLV bytes and the render
+    options. Recently used images stay in an in-memory LRU; with a
+    directory, every image is also written to disk, atomically, and the
+    least recently used files are removed once the directory grows past
+    its size limit.
+    
+    The on-disk tier can be shared by several processes. Each process
+    tracks the size of the files it knows about, so the limit is enforced
+    per process rather than exactly.
+    """
+    
+    def __init__(self, directory: Optional[str] = None, max_items: int = 1024,
+                 max_disk_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize the cache.
+        
+        Args:
+            directory (str, optional): Directory for the on-disk tier; memory only if omitted
+            max_items (int): Number of images kept in memory
+            max_disk_bytes (int): Total size of the files kept on disk
+            
+        Raises:
+            ValueError: If a limit is negative
+        """
+        if max_items < 0 or max_disk_bytes < 0:
+            raise ValueError('cache limits must not be negative')
+        self.directory = directory
+        self.max_items = max_items
+        self.max_disk_bytes = max_disk_bytes
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._memory = OrderedDict()
+        self._files = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._load_index()
+    
+    @staticmethod
+    def key(tlv: Union[bytes, str], options: Optional[dict] = None) -> str:
+        """
+        Get the cache key of a payload rendered with some options.
+        
+        Args:
+            tlv (Union[bytes, str]): The TLV bytes, or the base64 TLV payload
+            options (dict, optional): QR code options
+            
+        Returns:
+            str: The hex SHA-256 digest of the payload and the complete options
+        """
+        if isinstance(tlv, str):
+            tlv = tlv.encode('utf-8')
+        options = resolve_options(options)
+        digest = hashlib.sha256(tlv)
+        digest.update(repr(sorted(options.items())).encode('utf-8'))
+        return digest.hexdigest()
+    
+    @property
+    def hits(self) -> int:
+        """Number of lookups answered from either tier."""
+        return self.memory_hits + self.disk_hits
+    
+    def stats(self) -> dict:
+        """
+        Get the cache counters.
+        
+        Returns:
+            dict: Hits per tier, misses, evictions and the current tier sizes
+        """
+        with self._lock:
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'memory_items': len(self._memory),
+                'disk_files': len(self._files),
+                'disk_bytes': self._disk_bytes,
+            }
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f'{key}.png')
+    
+    def _load_index(self) -> None:
+        """Index the files already on disk, least recently used first."""
+        entries = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.png'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._files[key] = size
+            self._disk_bytes += size
+        self._evict_files()
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Look up a rendered image.
+        
+        Args:
+            key (str): The cache key
+            
+        Returns:
+            bytes: The PNG image data, or None on a miss
+        """
+        with self._lock:
+            png = self._memory.get(key)
+            if png is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return png
+        
+        if self.directory is not None:
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as f:
+                    png = f.read()
+            except FileNotFoundError:
+                png = None
+            if png is not None:
+                try:
+                    # Mark the file as recently used for eviction
+                    os.utime(path)
+                except FileNotFoundError:
+                    pass
+                with self._lock:
+                    self.disk_hits += 1
+                    if key not in self._files:
+                        self._disk_bytes += len(png)
+                    self._files[key] = len(png)
+                    self._files.move_to_end(key)
+                    self._remember(key, png)
+                return png
+        
+        with self._lock:
+            self.misses += 1
+        return None
+    
+    def put(self, key: str, png: bytes) -> None:
+        """
+        Store a rendered image.
+        
+        Args:
+            key (str): The cache key
+            png (bytes): The PNG image data
+        """
+        with self._lock:
+            self._remember(key, png)
+        if self.directory is None:
+            return
+        
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so readers never see a partial image
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(png)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        
+        with self._lock:
+            self._disk_bytes += len(png) - self._files.pop(key, 0)
+            self._files[key] = len(png)
+            self._evict_files()
+    
+    def _remember(self, key: str, png: bytes) -> None:
+        """Put an image in the memory tier; the lock must be held."""
+        if self.max_items == 0:
+            return
+        self._memory[key] = png
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+    
+    def _evict_files(self) -> None:
+        """Remove the least recently used files over the size limit; the lock must be held."""
+        while self._disk_bytes > self.max_disk_bytes and self._files:
+            key, size = self._files.popitem(last=False)
+            self._disk_bytes -= size
+            self.evictions += 1
+            try:
+                os.unlink(self._path(key))
+            except FileNotFoundError:
+                pass
+    
+    def clear(self) -> None:
+        """Remove every cached image from both tiers and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            for key in self._files:
+                try:
+                    os.unlink(self._path(key))
+                except FileNotFoundError:
+                    pass
+            self._files.clear()
+            self._disk_bytes = 0
+            self.memory_hits = self.disk_hits = self.misses = self.evictions = 0
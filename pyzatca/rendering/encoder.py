@@ -0,0 +1,658 @@
+"""
+Built-in QR code encoder tuned for ZATCA payloads.
+
+The encoder produces the same module matrices as the ``qrcode`` library
+does for ``QRCode(version=1).add_data(payload)`` followed by
+``make(fit=True)``: the same segmenting of the data, the same version
+choice and the same mask choice. It picks the version from a precomputed
+capacity table, uses precomputed Reed-Solomon generator polynomials and
+caches the function patterns of every version, and scores the eight mask
+patterns with NumPy when it is installed.
+"""
+
+import re
+from bisect import bisect_left
+from collections import namedtuple
+from typing import List, Optional, Union
+
+
+QrSymbol = namedtuple('QrSymbol', ['version', 'error_correction', 'mask_pattern', 'modules', 'codewords'])
+
+# Format information values of the error correction levels
+ERROR_CORRECTION_LEVELS = {'L': 1, 'M': 0, 'Q': 3, 'H': 2}
+
+# Error correction blocks per version: (EC codewords per block, group 1 blocks,
+# group 1 data codewords, group 2 blocks, group 2 data codewords)
+EC_BLOCKS = {
+    1: (  # L
+        None,
+        (7, 1, 19, 0, 0), (10, 1, 34, 0, 0), (15, 1, 55, 0, 0), (20, 1, 80, 0, 0), (26, 1, 108, 0, 0),
+        (18, 2, 68, 0, 0), (20, 2, 78, 0, 0), (24, 2, 97, 0, 0), (30, 2, 116, 0, 0), (18, 2, 68, 2, 69),
+        (20, 4, 81, 0, 0), (24, 2, 92, 2, 93), (26, 4, 107, 0, 0), (30, 3, 115, 1, 116), (22, 5, 87, 1, 88),
+        (24, 5, 98, 1, 99), (28, 1, 107, 5, 108), (30, 5, 120, 1, 121), (28, 3, 113, 4, 114), (28, 3, 107, 5, 108),
+        (28, 4, 116, 4, 117), (28, 2, 111, 7, 112), (30, 4, 121, 5, 122), (30, 6, 117, 4, 118), (26, 8, 106, 4, 107),
+        (28, 10, 114, 2, 115), (30, 8, 122, 4, 123), (30, 3, 117, 10, 118), (30, 7, 116, 7, 117), (30, 5, 115, 10, 116),
+        (30, 13, 115, 3, 116), (30, 17, 115, 0, 0), (30, 17, 115, 1, 116), (30, 13, 115, 6, 116), (30, 12, 121, 7, 122),
+        (30, 6, 121, 14, 122), (30, 17, 122, 4, 123), (30, 4, 122, 18, 123), (30, 20, 117, 4, 118), (30, 19, 118, 6, 119),
+    ),
+    0: (  # M
+        None,
+        (10, 1, 16, 0, 0), (16, 1, 28, 0, 0), (26, 1, 44, 0, 0), (18, 2, 32, 0, 0), (24, 2, 43, 0, 0),
+        (16, 4, 27, 0, 0), (18, 4, 31, 0, 0), (22, 2, 38, 2, 39), (22, 3, 36, 2, 37), (26, 4, 43, 1, 44),
+        (30, 1, 50, 4, 51), (22, 6, 36, 2, 37), (22, 8, 37, 1, 38), (24, 4, 40, 5, 41), (24, 5, 41, 5, 42),
+        (28, 7, 45, 3, 46), (28, 10, 46, 1, 47), (26, 9, 43, 4, 44), (26, 3, 44, 11, 45), (26, 3, 41, 13, 42),
+        (26, 17, 42, 0, 0), (28, 17, 46, 0, 0), (28, 4, 47, 14, 48), (28, 6, 45, 14, 46), (28, 8, 47, 13, 48),
+        (28, 19, 46, 4, 47), (28, 22, 45, 3, 46), (28, 3, 45, 23, 46), (28, 21, 45, 7, 46), (28, 19, 47, 10, 48),
+        (28, 2, 46, 29, 47), (28, 10, 46, 23, 47), (28, 14, 46, 21, 47), (28, 14, 46, 23, 47), (28, 12, 47, 26, 48),
+        (28, 6, 47, 34, 48), (28, 29, 46, 14, 47), (28, 13, 46, 32, 47), (28, 40, 47, 7, 48), (28, 18, 47, 31, 48),
+    ),
+    3: (  # Q
+        None,
+        (13, 1, 13, 0, 0), (22, 1, 22, 0, 0), (18, 2, 17, 0, 0), (26, 2, 24, 0, 0), (18, 2, 15, 2, 16),
+        (24, 4, 19, 0, 0), (18, 2, 14, 4, 15), (22, 4, 18, 2, 19), (20, 4, 16, 4, 17), (24, 6, 19, 2, 20),
+        (28, 4, 22, 4, 23), (26, 4, 20, 6, 21), (24, 8, 20, 4, 21), (20, 11, 16, 5, 17), (30, 5, 24, 7, 25),
+        (24, 15, 19, 2, 20), (28, 1, 22, 15, 23), (28, 17, 22, 1, 23), (26, 17, 21, 4, 22), (30, 15, 24, 5, 25),
+        (28, 17, 22, 6, 23), (30, 7, 24, 16, 25), (30, 11, 24, 14, 25), (30, 11, 24, 16, 25), (30, 7, 24, 22, 25),
+        (28, 28, 22, 6, 23), (30, 8, 23, 26, 24), (30, 4, 24, 31, 25), (30, 1, 23, 37, 24), (30, 15, 24, 25, 25),
+        (30, 42, 24, 1, 25), (30, 10, 24, 35, 25), (30, 29, 24, 19, 25), (30, 44, 24, 7, 25), (30, 39, 24, 14, 25),
+        (30, 46, 24, 10, 25), (30, 49, 24, 10, 25), (30, 48, 24, 14, 25), (30, 43, 24, 22, 25), (30, 34, 24, 34, 25),
+    ),
+    2: (  # H
+        None,
+        (17, 1, 9, 0, 0), (28, 1, 16, 0, 0), (22, 2, 13, 0, 0), (16, 4, 9, 0, 0), (22, 2, 11, 2, 12),
+        (28, 4, 15, 0, 0), (26, 4, 13, 1, 14), (26, 4, 14, 2, 15), (24, 4, 12, 4, 13), (28, 6, 15, 2, 16),
+        (24, 3, 12, 8, 13), (28, 7, 14, 4, 15), (22, 12, 11, 4, 12), (24, 11, 12, 5, 13), (24, 11, 12, 7, 13),
+        (30, 3, 15, 13, 16), (28, 2, 14, 17, 15), (28, 2, 14, 19, 15), (26, 9, 13, 16, 14), (28, 15, 15, 10, 16),
+        (30, 19, 16, 6, 17), (24, 34, 13, 0, 0), (30, 16, 15, 14, 16), (30, 30, 16, 2, 17), (30, 22, 15, 13, 16),
+        (30, 33, 16, 4, 17), (30, 12, 15, 28, 16), (30, 11, 15, 31, 16), (30, 19, 15, 26, 16), (30, 23, 15, 25, 16),
+        (30, 23, 15, 28, 16), (30, 19, 15, 35, 16), (30, 11, 15, 46, 16), (30, 59, 16, 1, 17), (30, 22, 15, 41, 16),
+        (30, 2, 15, 64, 16), (30, 24, 15, 46, 16), (30, 42, 15, 32, 16), (30, 10, 15, 67, 16), (30, 20, 15, 61, 16),
+    ),
+}
+
+# Data capacity in bits, indexed by [error correction][version]
+CAPACITY_BITS = {
+    level: [0] + [8 * (blocks[1] * blocks[2] + blocks[3] * blocks[4]) for blocks in table[1:]]
+    for level, table in EC_BLOCKS.items()
+}
+
+ALIGNMENT_POSITIONS = (
+    None,
+    (), (6, 18), (6, 22), (6, 26), (6, 30), (6, 34), (6, 22, 38), (6, 24, 42), (6, 26, 46), (6, 28, 50),
+    (6, 30, 54), (6, 32, 58), (6, 34, 62), (6, 26, 46, 66), (6, 26, 48, 70), (6, 26, 50, 74), (6, 30, 54, 78),
+    (6, 30, 56, 82), (6, 30, 58, 86), (6, 34, 62, 90), (6, 28, 50, 72, 94), (6, 26, 50, 74, 98),
+    (6, 30, 54, 78, 102), (6, 28, 54, 80, 106), (6, 32, 58, 84, 110), (6, 30, 58, 86, 114),
+    (6, 34, 62, 90, 118), (6, 26, 50, 74, 98, 122), (6, 30, 54, 78, 102, 126), (6, 26, 52, 78, 104, 130),
+    (6, 30, 56, 82, 108, 134), (6, 34, 60, 86, 112, 138), (6, 30, 58, 86, 114, 142), (6, 34, 62, 90, 118, 146),
+    (6, 30, 54, 78, 102, 126, 150), (6, 24, 50, 76, 102, 128, 154), (6, 28, 54, 80, 106, 132, 158),
+    (6, 32, 58, 84, 110, 136, 162), (6, 26, 54, 82, 110, 138, 166), (6, 30, 58, 86, 114, 142, 170),
+)
+
+MODE_NUMBER = 1
+MODE_ALPHA_NUM = 2
+MODE_8BIT_BYTE = 4
+
+# Character count indicator lengths for versions 1-9, 10-26 and 27-40
+LENGTH_BITS = {
+    MODE_NUMBER: (10, 12, 14),
+    MODE_ALPHA_NUM: (9, 11, 13),
+    MODE_8BIT_BYTE: (8, 16, 16),
+}
+
+ALPHA_NUM = b'0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:'
+_ALPHA_NUM_VALUES = {char: value for value, char in enumerate(ALPHA_NUM)}
+_ALPHA_NUM_CLASS = b'[' + re.escape(ALPHA_NUM) + b']'
+
+_RUN = re.compile('0{5,}|1{5,}')
+_FINDER_LIKE = re.compile('(?=10111010000|00001011101)')
+
+# GF(256) arithmetic over the QR code polynomial x^8 + x^4 + x^3 + x^2 + 1
+_EXP = [0] * 512
+_LOG = [0] * 256
+_value = 1
+for _index in range(255):
+    _EXP[_index] = _EXP[_index + 255] = _value
+    _LOG[_value] = _index
+    _value <<= 1
+    if _value & 0x100:
+        _value ^= 0x11D
+del _index, _value
+
+
+def _generator_polynomial(degree: int) -> List[int]:
+    """Return the generator polynomial coefficients, as logarithms, without the leading term."""
+    polynomial = [1]
+    for i in range(degree):
+        product = [0] * (len(polynomial) + 1)
+        for j, coefficient in enumerate(polynomial):
+            product[j] ^= coefficient
+            if coefficient:
+                product[j + 1] ^= _EXP[_LOG[coefficient] + i]
+        polynomial = product
+    return [_LOG[coefficient] for coefficient in polynomial[1:]]
+
+
+GENERATOR_POLYNOMIALS = {
+    blocks[0]: _generator_polynomial(blocks[0])
+    for table in EC_BLOCKS.values()
+    for blocks in table[1:]
+}
+
+_numpy = None
+_templates = {}
+
+
+def _load_numpy():
+    """Import NumPy once, returning False when it is not installed."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+    return _numpy
+
+
+def resolve_error_correction(error_correction: Union[str, int]) -> int:
+    """
+    Resolve an error correction level given as a letter or a qrcode constant.
+    
+    Args:
+        error_correction (Union[str, int]): 'L', 'M', 'Q', 'H' or a ``qrcode.constants`` value
+        
+    Returns:
+        int: The format information value of the level
+    """
+    if isinstance(error_correction, str):
+        return ERROR_CORRECTION_LEVELS[error_correction.upper()]
+    if error_correction not in EC_BLOCKS:
+        raise ValueError(f'Invalid error correction level: {error_correction}')
+    return error_correction
+
+
+def _split(data: bytes, pattern) -> list:
+    chunks = []
+    while data:
+        match = pattern.search(data)
+        if not match:
+            break
+        start, end = match.span()
+        if start:
+            chunks.append((False, data[:start]))
+        chunks.append((True, data[start:end]))
+        data = data[end:]
+    if data:
+        chunks.append((False, data))
+    return chunks
+
+
+def make_segments(data: bytes, minimum: int = 20) -> list:
+    """
+    Split data into numeric, alphanumeric and byte segments.
+    
+    Runs of at least ``minimum`` digits, then runs of at least ``minimum``
+    alphanumeric characters, get their own segments, the way
+    ``qrcode.util.optimal_data_chunks`` splits them.
+    
+    Args:
+        data (bytes): The data to encode
+        minimum (int): The shortest run worth its own segment; 0 disables splitting
+        
+    Returns:
+        list: (mode, data) pairs
+    """
+    if not minimum:
+        if data.isdigit():
+            return [(MODE_NUMBER, data)]
+        if re.match(b'^' + _ALPHA_NUM_CLASS + b'*\\Z', data):
+            return [(MODE_ALPHA_NUM, data)]
+        return [(MODE_8BIT_BYTE, data)]
+    
+    if len(data) <= minimum:
+        numbers = re.compile(rb'^\d+$')
+        alpha_numbers = re.compile(b'^' + _ALPHA_NUM_CLASS + b'+$')
+    else:
+        repeat = b'{%d,}' % minimum
+        numbers = re.compile(rb'\d' + repeat)
+        alpha_numbers = re.compile(_ALPHA_NUM_CLASS + repeat)
+    
+    segments = []
+    for is_number, chunk in _split(data, numbers):
+        if is_number:
+            segments.append((MODE_NUMBER, chunk))
+            continue
+        for is_alpha_number, sub_chunk in _split(chunk, alpha_numbers):
+            segments.append((MODE_ALPHA_NUM if is_alpha_number else MODE_8BIT_BYTE, sub_chunk))
+    return segments
+
+
+def _size_class(version: int) -> int:
+    return 0 if version < 10 else 1 if version < 27 else 2
+
+
+def _segment_bits(mode: int, data: bytes) -> int:
+    length = len(data)
+    if mode == MODE_NUMBER:
+        return 10 * (length // 3) + (0, 4, 7)[length % 3]
+    if mode == MODE_ALPHA_NUM:
+        return 11 * (length // 2) + 6 * (length % 2)
+    return 8 * length
+
+
+def choose_version(segments: list, error_correction: int, start: int = 1) -> int:
+    """
+    Pick the smallest version, from ``start`` up, that fits the segments.
+    
+    Args:
+        segments (list): (mode, data) pairs
+        error_correction (int): The format information value of the level
+        start (int): The smallest version to consider
+        
+    Returns:
+        int: The version
+        
+    Raises:
+        ValueError: If the data does not fit in a version 40 symbol
+    """
+    capacity = CAPACITY_BITS[error_correction]
+    version = start
+    while True:
+        size_class = _size_class(version)
+        needed = sum(
+            4 + LENGTH_BITS[mode][size_class] + _segment_bits(mode, data)
+            for mode, data in segments
+        )
+        fitted = bisect_left(capacity, needed, version)
+        if fitted > 40:
+            raise ValueError('data too long for a QR code')
+        if _size_class(fitted) == size_class:
+            return fitted
+        version = fitted
+
+
+def make_codewords(segments: list, version: int, error_correction: int) -> List[int]:
+    """
+    Encode the segments into the final interleaved data and EC codewords.
+    
+    Args:
+        segments (list): (mode, data) pairs
+        version (int): The symbol version
+        error_correction (int): The format information value of the level
+        
+    Returns:
+        List[int]: The codewords in placement order
+    """
+    size_class = _size_class(version)
+    bits = 0
+    length = 0
+    for mode, data in segments:
+        count_bits = LENGTH_BITS[mode][size_class]
+        bits = (((bits << 4) | mode) << count_bits) | len(data)
+        length += 4 + count_bits
+        if mode == MODE_NUMBER:
+            for i in range(0, len(data), 3):
+                group = data[i:i + 3]
+                group_bits = (0, 4, 7, 10)[len(group)]
+                bits = (bits << group_bits) | int(group)
+                length += group_bits
+        elif mode == MODE_ALPHA_NUM:
+            for i in range(0, len(data) - 1, 2):
+                bits = (bits << 11) | (_ALPHA_NUM_VALUES[data[i]] * 45 + _ALPHA_NUM_VALUES[data[i + 1]])
+                length += 11
+            if len(data) % 2:
+                bits = (bits << 6) | _ALPHA_NUM_VALUES[data[-1]]
+                length += 6
+        else:
+            bits = (bits << (8 * len(data))) | int.from_bytes(data, 'big')
+            length += 8 * len(data)
+    
+    ec_count, group1_blocks, group1_data, group2_blocks, group2_data = EC_BLOCKS[error_correction][version]
+    capacity = CAPACITY_BITS[error_correction][version]
+    if length > capacity:
+        raise ValueError('data too long for a QR code')
+    
+    # Terminator, then zero bits up to the next codeword boundary
+    padding = min(capacity - length, 4)
+    padding += -(length + padding) % 8
+    bits <<= padding
+    length += padding
+    
+    data_codewords = list(bits.to_bytes(length // 8, 'big'))
+    data_codewords += [0xEC, 0x11] * ((capacity - length) // 16) + [0xEC] * (((capacity - length) // 8) % 2)
+    
+    generator = GENERATOR_POLYNOMIALS[ec_count]
+    data_blocks = []
+    ec_blocks = []
+    offset = 0
+    for block_data in [group1_data] * group1_blocks + [group2_data] * group2_blocks:
+        block = data_codewords[offset:offset + block_data]
+        offset += block_data
+        remainder = [0] * ec_count
+        for codeword in block:
+            factor = codeword ^ remainder[0]
+            del remainder[0]
+            remainder.append(0)
+            if factor:
+                factor_log = _LOG[factor]
+                for i, coefficient in enumerate(generator):
+                    remainder[i] ^= _EXP[factor_log + coefficient]
+        data_blocks.append(block)
+        ec_blocks.append(remainder)
+    
+    codewords = []
+    for i in range(max(group1_data, group2_data)):
+        for block in data_blocks:
+            if i < len(block):
+                codewords.append(block[i])
+    for i in range(ec_count):
+        for block in ec_blocks:
+            codewords.append(block[i])
+    return codewords
+
+
+def _bch(data: int, generator: int, degree: int) -> int:
+    remainder = data << degree
+    for shift in range(remainder.bit_length() - generator.bit_length(), -1, -1):
+        if remainder & (1 << (shift + generator.bit_length() - 1)):
+            remainder ^= generator << shift
+    return (data << degree) | remainder
+
+
+def format_bits(error_correction: int, mask_pattern: int) -> int:
+    """Return the 15 format information bits for a level and mask pattern."""
+    return _bch((error_correction << 3) | mask_pattern, 0x537, 10) ^ 0x5412
+
+
+def version_bits(version: int) -> int:
+    """Return the 18 version information bits for versions 7 and up."""
+    return _bch(version, 0x1F25, 12)
+
+
+def _format_positions(size: int) -> tuple:
+    """Return the (vertical, horizontal) module positions of format bits 0-14."""
+    vertical = [(i, 8) if i < 6 else (i + 1, 8) if i < 8 else (size - 15 + i, 8) for i in range(15)]
+    horizontal = [(8, size - i - 1) if i < 8 else (8, 15 - i) if i < 9 else (8, 15 - i - 1) for i in range(15)]
+    return vertical, horizontal
+
+
+def _mask_function(pattern: int):
+    return (
+        lambda i, j: (i + j) % 2 == 0,
+        lambda i, j: i % 2 == 0,
+        lambda i, j: j % 3 == 0,
+        lambda i, j: (i + j) % 3 == 0,
+        lambda i, j: (i // 2 + j // 3) % 2 == 0,
+        lambda i, j: (i * j) % 2 + (i * j) % 3 == 0,
+        lambda i, j: ((i * j) % 2 + (i * j) % 3) % 2 == 0,
+        lambda i, j: ((i * j) % 3 + (i + j) % 2) % 2 == 0,
+    )[pattern]
+
+
+class _Template:
+    """Function patterns, data module order and masks of one version."""
+    
+    def __init__(self, version: int):
+        size = version * 4 + 17
+        grid = [[None] * size for _ in range(size)]
+        
+        for row, col in ((0, 0), (size - 7, 0), (0, size - 7)):
+            for r in range(-1, 8):
+                for c in range(-1, 8):
+                    if 0 <= row + r < size and 0 <= col + c < size:
+                        grid[row + r][col + c] = (
+                            (0 <= r <= 6 and c in (0, 6))
+                            or (0 <= c <= 6 and r in (0, 6))
+                            or (2 <= r <= 4 and 2 <= c <= 4)
+                        )
+        
+        positions = ALIGNMENT_POSITIONS[version]
+        for row in positions:
+            for col in positions:
+                if grid[row][col] is not None:
+                    continue
+                for r in range(-2, 3):
+                    for c in range(-2, 3):
+                        grid[row + r][col + c] = r in (-2, 2) or c in (-2, 2) or (r == 0 and c == 0)
+        
+        for i in range(8, size - 8):
+            if grid[i][6] is None:
+                grid[i][6] = i % 2 == 0
+            if grid[6][i] is None:
+                grid[6][i] = i % 2 == 0
+        
+        # Format and version information are reserved, and light while masks are scored
+        vertical, horizontal = _format_positions(size)
+        reserved = vertical + horizontal + [(size - 8, 8)]
+        if version >= 7:
+            for i in range(18):
+                reserved.append((i // 3, i % 3 + size - 11))
+                reserved.append((i % 3 + size - 11, i // 3))
+        for row, col in reserved:
+            grid[row][col] = False
+        
+        data_positions = []
+        step = -1
+        row = size - 1
+        for col in range(size - 1, 0, -2):
+            if col <= 6:
+                col -= 1
+            while True:
+                for c in (col, col - 1):
+                    if grid[row][c] is None:
+                        data_positions.append((row, c))
+                row += step
+                if row < 0 or row >= size:
+                    row -= step
+                    step = -step
+                    break
+        
+        self.version = version
+        self.size = size
+        self.data_positions = data_positions
+        self.function_rows = [
+            sum(1 << (size - 1 - c) for c in range(size) if grid[r][c]) for r in range(size)
+        ]
+        self.mask_rows = []
+        for pattern in range(8):
+            mask = _mask_function(pattern)
+            rows = [0] * size
+            for r, c in data_positions:
+                if mask(r, c):
+                    rows[r] |= 1 << (size - 1 - c)
+            self.mask_rows.append(rows)
+        self._arrays = None
+    
+    def arrays(self, numpy):
+        """Return the NumPy form of the template, built on first use."""
+        if self._arrays is None:
+            rows = numpy.array([r for r, c in self.data_positions], dtype=numpy.intp)
+            cols = numpy.array([c for r, c in self.data_positions], dtype=numpy.intp)
+            self._arrays = (
+                _rows_to_array(numpy, self.function_rows, self.size),
+                [_rows_to_array(numpy, mask, self.size) for mask in self.mask_rows],
+                rows,
+                cols,
+            )
+        return self._arrays
+
+
+def _template(version: int) -> _Template:
+    template = _templates.get(version)
+    if template is None:
+        template = _templates[version] = _Template(version)
+    return template
+
+
+def _rows_to_array(numpy, rows: List[int], size: int):
+    width = (size + 7) // 8
+    packed = b''.join((row << (width * 8 - size)).to_bytes(width, 'big') for row in rows)
+    bits = numpy.unpackbits(numpy.frombuffer(packed, dtype=numpy.uint8))
+    return bits.reshape(size, width * 8)[:, :size].astype(bool)
+
+
+def penalty(rows: List[int], size: int) -> int:
+    """
+    Score a symbol given as row bit masks, the way ``qrcode.util.lost_point`` does.
+    
+    Args:
+        rows (List[int]): The module rows, most significant bit first
+        size (int): The number of modules per side
+        
+    Returns:
+        int: The penalty points
+    """
+    lines = [format(row, '0%db' % size) for row in rows]
+    lines += [''.join(column) for column in zip(*lines)]
+    
+    points = 0
+    for line in lines:
+        for run in _RUN.finditer(line):
+            points += run.end() - run.start() - 2
+        points += 40 * len(_FINDER_LIKE.findall(line))
+    
+    pair_mask = (1 << (size - 1)) - 1
+    for upper, lower in zip(rows, rows[1:]):
+        vertical = ~(upper ^ lower)
+        horizontal = ~(upper ^ (upper >> 1))
+        points += 3 * bin(vertical & (vertical >> 1) & horizontal & pair_mask).count('1')
+    
+    dark = sum(bin(row).count('1') for row in rows)
+    return points + int(abs(float(dark) / (size ** 2) * 100 - 50) / 5) * 10
+
+
+def _penalty_runs(numpy, lines) -> int:
+    size = lines.shape[1]
+    flat = numpy.concatenate((lines.astype(numpy.int8), numpy.full((lines.shape[0], 1), 2, numpy.int8)), axis=1)
+    flat = flat.ravel()
+    starts = numpy.flatnonzero(numpy.concatenate(([True], flat[1:] != flat[:-1], [True])))
+    lengths = numpy.diff(starts)
+    lengths = lengths[(lengths >= 5) & (lengths <= size)]
+    return int((lengths - 2).sum())
+
+
+def _penalty_finder_like(numpy, lines) -> int:
+    width = lines.shape[1] - 10
+    if width <= 0:
+        return 0
+    first = numpy.ones((lines.shape[0], width), dtype=bool)
+    second = numpy.ones((lines.shape[0], width), dtype=bool)
+    for k, (a, b) in enumerate(zip('10111010000', '00001011101')):
+        window = lines[:, k:k + width]
+        first &= window if a == '1' else ~window
+        second &= window if b == '1' else ~window
+    return 40 * int(numpy.count_nonzero(first | second))
+
+
+def penalty_array(numpy, modules) -> int:
+    """
+    Score a symbol given as a boolean NumPy matrix, the way ``qrcode.util.lost_point`` does.
+    
+    Args:
+        numpy: The NumPy module
+        modules: The (size, size) boolean module matrix
+        
+    Returns:
+        int: The penalty points
+    """
+    size = modules.shape[0]
+    points = _penalty_runs(numpy, modules) + _penalty_runs(numpy, modules.T)
+    
+    top_left = modules[:-1, :-1]
+    blocks = (top_left == modules[1:, :-1]) & (top_left == modules[:-1, 1:]) & (top_left == modules[1:, 1:])
+    points += 3 * int(numpy.count_nonzero(blocks))
+    
+    points += _penalty_finder_like(numpy, modules) + _penalty_finder_like(numpy, modules.T)
+    
+    dark = int(numpy.count_nonzero(modules))
+    return points + int(abs(float(dark) / (size ** 2) * 100 - 50) / 5) * 10
+
+
+def _choose_mask(template: _Template, codewords: List[int], use_numpy: Optional[bool]) -> tuple:
+    """Return the best mask pattern and the data module rows."""
+    size = template.size
+    bit_count = min(len(codewords) * 8, len(template.data_positions))
+    data_value = int.from_bytes(bytes(codewords), 'big') >> (len(codewords) * 8 - bit_count)
+    
+    data_rows = [0] * size
+    for index, (r, c) in enumerate(template.data_positions[:bit_count]):
+        if (data_value >> (bit_count - 1 - index)) & 1:
+            data_rows[r] |= 1 << (size - 1 - c)
+    
+    numpy = _load_numpy() if use_numpy is not False else False
+    if use_numpy and not numpy:
+        raise ImportError('NumPy is required for vectorized mask scoring')
+    
+    scores = []
+    if numpy:
+        function_array, mask_arrays, _, _ = template.arrays(numpy)
+        data_array = _rows_to_array(numpy, data_rows, size)
+        for pattern in range(8):
+            scores.append(penalty_array(numpy, function_array | (data_array ^ mask_arrays[pattern])))
+    else:
+        function_rows = template.function_rows
+        for mask_rows in template.mask_rows:
+            rows = [
+                function_row | (data_row ^ mask_row)
+                for function_row, data_row, mask_row in zip(function_rows, data_rows, mask_rows)
+            ]
+            scores.append(penalty(rows, size))
+    
+    return scores.index(min(scores)), data_rows
+
+
+def encode(data: Union[str, bytes], error_correction: Union[str, int] = 'L', version: int = 1,
+           optimize: int = 20, use_numpy: Optional[bool] = None) -> QrSymbol:
+    """
+    Encode data into a QR code symbol.
+    
+    Args:
+        data (Union[str, bytes]): The data to encode; text is UTF-8 encoded
+        error_correction (Union[str, int]): The error correction level
+        version (int): The smallest version to use
+        optimize (int): The shortest numeric or alphanumeric run given its own segment
+        use_numpy (bool, optional): Force (True) or avoid (False) NumPy mask scoring;
+            by default NumPy is used when it is installed
+            
+    Returns:
+        QrSymbol: The version, level, mask pattern, module matrix (without border) and codewords
+        
+    Raises:
+        ValueError: If the data does not fit in a QR code
+    """
+    if not isinstance(data, bytes):
+        data = str(data).encode('utf-8')
+    if not 1 <= version <= 40:
+        raise ValueError(f'Invalid version (was {version}, expected 1 to 40)')
+    error_correction = resolve_error_correction(error_correction)
+    
+    segments = make_segments(data, optimize)
+    version = choose_version(segments, error_correction, version)
+    codewords = make_codewords(segments, version, error_correction)
+    
+    template = _template(version)
+    mask_pattern, data_rows = _choose_mask(template, codewords, use_numpy)
+    
+    size = template.size
+    mask_rows = template.mask_rows[mask_pattern]
+    modules = [
+        [bit == '1' for bit in format(function_row | (data_row ^ mask_row), '0%db' % size)]
+        for function_row, data_row, mask_row in zip(template.function_rows, data_rows, mask_rows)
+    ]
+    
+    bits = format_bits(error_correction, mask_pattern)
+    vertical, horizontal = _format_positions(size)
+    for i in range(15):
+        dark = (bits >> i) & 1 == 1
+        modules[vertical[i][0]][vertical[i][1]] = dark
+        modules[horizontal[i][0]][horizontal[i][1]] = dark
+    modules[size - 8][8] = True
+    
+    if version >= 7:
+        bits = version_bits(version)
+        for i in range(18):
+            dark = (bits >> i) & 1 == 1
+            modules[i // 3][i % 3 + size - 11] = dark
+            modules[i % 3 + size - 11][i // 3] = dark
+    
+    return QrSymbol(version, error_correction, mask_pattern, modules, codewords)
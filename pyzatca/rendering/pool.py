@@ -0,0 +1,103 @@
+"""
+Process pool engine for rendering many QR code images.
+"""
+
+import base64
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import count, islice
+from typing import Iterable, Iterator, List, Optional
+
+from .qr_image import load_qrcode, render_png
+
+
+def _init_worker():
+    """Import qrcode once per worker process instead of once per chunk."""
+    load_qrcode()
+
+
+def _render_chunk(payloads: List[str], options: Optional[dict], directory: Optional[str],
+                  names: Optional[List[str]]) -> List[str]:
+    """
+    Render a chunk of payloads inside a worker process.
+    
+    Returns:
+        List[str]: PNG data URIs, or the written file paths when a directory is given
+    """
+    results = []
+    for index, payload in enumerate(payloads):
+        png = render_png(payload, options)
+        if directory is None:
+            results.append(f"data:image/png;base64,{base64.b64encode(png).decode('ascii')}")
+        else:
+            path = os.path.join(directory, names[index])
+            with open(path, 'wb') as f:
+                f.write(png)
+            results.append(path)
+    return results
+
+
+def render_many(payloads: Iterable, options: Optional[dict] = None, directory: Optional[str] = None,
+                names: Optional[Iterable[str]] = None, workers: Optional[int] = None,
+                chunk_size: int = 64) -> Iterator[str]:
+    """
+    Render many QR code images across a process pool.
+    
+    Payloads are sent to the workers in chunks to amortize the IPC cost,
+    and only a bounded number of chunks is in flight at a time, so the
+    input can be an arbitrarily long iterator. Results are yielded in
+    input order.
+    
+    Args:
+        payloads (Iterable): GenerateQrCode instances or base64 TLV strings
+        options (dict, optional): QR code options
+        directory (str, optional): Directory to write PNG files into
+        names (Iterable[str], optional): File names, in input order; defaults to
+            the zero-padded input index
+        workers (int, optional): Number of worker processes; defaults to the CPU count
+        chunk_size (int): Number of payloads rendered per task
+        
+    Yields:
+        str: PNG data URIs, or the written file paths when a directory is given
+        
+    Raises:
+        ValueError: If chunk_size or workers is not positive, or names run out
+    """
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be positive')
+    workers = workers or os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError('workers must be positive')
+    
+    payloads = iter(
+        payload if isinstance(payload, str) else payload.to_base64()
+        for payload in payloads
+    )
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+        names = iter(names) if names is not None else (f'{index:08d}.png' for index in count())
+    
+    max_pending = workers * 2
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        try:
+            while True:
+                chunk = list(islice(payloads, chunk_size))
+                if not chunk:
+                    break
+                chunk_names = None
+                if directory is not None:
+                    chunk_names = list(islice(names, len(chunk)))
+                    if len(chunk_names) != len(chunk):
+                        raise ValueError('fewer names than payloads')
+                
+                if len(pending) >= max_pending:
+                    yield from pending.popleft().result()
+                pending.append(executor.submit(_render_chunk, chunk, options, directory, chunk_names))
+            
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
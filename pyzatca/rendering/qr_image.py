@@ -0,0 +1,159 @@
+"""
+QR code image rendering for ZATCA payloads.
+"""
+
+import base64
+from io import BytesIO
+from typing import Optional
+
+from .. import instrumentation
+from .encoder import encode
+
+
+DEFAULT_OPTIONS = {
+    'version': 1,
+    'error_correction': 'L',
+    'box_size': 10,
+    'border': 4,
+    'fill_color': 'black',
+    'back_color': 'white',
+}
+
+_qrcode = None
+
+
+def load_qrcode():
+    """
+    Import the qrcode library once and keep a reference to it.
+    
+    Returns:
+        module: The qrcode module
+        
+    Raises:
+        ImportError: If qrcode is not installed
+    """
+    global _qrcode
+    if _qrcode is None:
+        try:
+            import qrcode
+        except ImportError:
+            raise ImportError(
+                "qrcode library is required for QR code rendering. "
+                "Install it with: pip install qrcode[pil]"
+            )
+        _qrcode = qrcode
+    return _qrcode
+
+
+def resolve_options(options: Optional[dict] = None) -> dict:
+    """
+    Merge render options over the defaults.
+    
+    Args:
+        options (dict, optional): QR code options
+        
+    Returns:
+        dict: The complete set of options
+    """
+    if not options:
+        return DEFAULT_OPTIONS
+    resolved = dict(DEFAULT_OPTIONS)
+    resolved.update(options)
+    return resolved
+
+
+def make_qr(payload: str, options: Optional[dict] = None):
+    """
+    Build the QR code for a payload.
+    
+    The module matrix comes from the built-in encoder, which matches what
+    ``qrcode`` builds with ``make(fit=True)``; the qrcode object is only
+    used for its image factories.
+    
+    Args:
+        payload (str): The data to encode, usually the base64 TLV
+        options (dict, optional): QR code options
+        
+    Returns:
+        qrcode.QRCode: The QR code with its module matrix built
+    """
+    qrcode = load_qrcode()
+    options = resolve_options(options)
+    with instrumentation.stage('qr.matrix'):
+        symbol = encode(payload, options['error_correction'], options['version'])
+    
+    qr = qrcode.QRCode(
+        version=symbol.version,
+        error_correction=symbol.error_correction,
+        box_size=options['box_size'],
+        border=options['border'],
+        mask_pattern=symbol.mask_pattern,
+    )
+    qr.modules = symbol.modules
+    qr.modules_count = len(symbol.modules)
+    qr.data_cache = symbol.codewords
+    return qr
+
+
+def make_image(payload: str, options: Optional[dict] = None):
+    """
+    Build the QR code image for a payload.
+    
+    Args:
+        payload (str): The data to encode, usually the base64 TLV
+        options (dict, optional): QR code options
+        
+    Returns:
+        The QR code image
+    """
+    options = resolve_options(options)
+    qr = make_qr(payload, options)
+    with instrumentation.stage('qr.image'):
+        return qr.make_image(fill_color=options['fill_color'], back_color=options['back_color'])
+
+
+def render_png(payload: str, options: Optional[dict] = None) -> bytes:
+    """
+    Render the QR code for a payload as PNG.
+    
+    Args:
+        payload (str): The data to encode, usually the base64 TLV
+        options (dict, optional): QR code options
+        
+    Returns:
+        bytes: The PNG image data
+    """
+    image = make_image(payload, options)
+    buffer = BytesIO()
+    with instrumentation.stage('qr.png'):
+        image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def render_data_uri(payload: str, options: Optional[dict] = None, file_path: Optional[str] = None) -> str:
+    """
+    Render the QR code for a payload as a PNG data URI.
+    
+    Args:
+        payload (str): The data to encode, usually the base64 TLV
+        options (dict, optional): QR code options
+        file_path (str, optional): File path to also save the image to
+        
+    Returns:
+        str: Base64 encoded PNG image data
+    """
+    with instrumentation.stage('qr.render'):
+        # Create image
+        img = make_image(payload, options)
+        
+        # Convert to base64
+        with instrumentation.stage('qr.png'):
+            buffer = BytesIO()
+            img.save(buffer, format='PNG')
+        img_data = base64.b64encode(buffer.getvalue()).decode('ascii')
+        
+        # Save to file if specified
+        if file_path:
+            img.save(file_path)
+    
+    return f"data:image/png;base64,{img_data}"
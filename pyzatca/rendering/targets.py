@@ -0,0 +1,141 @@
+"""
+PIL-free render targets built directly from the QR module matrix.
+"""
+
+from typing import List, Optional, Tuple
+
+from .encoder import encode
+from .qr_image import resolve_options
+
+
+def qr_matrix(payload: str, options: Optional[dict] = None) -> List[List[bool]]:
+    """
+    Build the QR module matrix for a payload, including the border.
+    
+    Args:
+        payload (str): The data to encode, usually the base64 TLV
+        options (dict, optional): QR code options
+        
+    Returns:
+        List[List[bool]]: The module rows, True for dark modules
+    """
+    options = resolve_options(options)
+    modules = encode(payload, options['error_correction'], options['version']).modules
+    border = options['border']
+    if not border:
+        return modules
+    
+    width = len(modules) + border * 2
+    side = [False] * border
+    return (
+        [[False] * width for _ in range(border)]
+        + [side + row + side for row in modules]
+        + [[False] * width for _ in range(border)]
+    )
+
+
+def render_svg(payload: str, options: Optional[dict] = None) -> str:
+    """
+    Render the QR code as an SVG document.
+    
+    Dark modules are merged into horizontal runs and drawn as a single path.
+    
+    Args:
+        payload (str): The data to encode, usually the base64 TLV
+        options (dict, optional): QR code options; ``box_size`` is the module size in pixels
+        
+    Returns:
+        str: The SVG document
+    """
+    options = resolve_options(options)
+    matrix = qr_matrix(payload, options)
+    size = len(matrix)
+    
+    path = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < size:
+            if row[x]:
+                start = x
+                while x < size and row[x]:
+                    x += 1
+                path.append(f'M{start} {y}h{x - start}v1h-{x - start}z')
+            else:
+                x += 1
+    
+    pixels = size * options['box_size']
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{pixels}" height="{pixels}" '
+        f'viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+        f'<rect width="{size}" height="{size}" fill="{options["back_color"]}"/>'
+        f'<path fill="{options["fill_color"]}" d="{"".join(path)}"/>'
+        '</svg>'
+    )
+
+
+def render_bitmap(payload: str, options: Optional[dict] = None) -> Tuple[int, int, bytes]:
+    """
+    Render the QR code as a raw 1-bit bitmap.
+    
+    Rows are packed most significant bit first and padded to whole bytes,
+    with set bits for dark pixels. Each module is ``box_size`` pixels wide.
+    
+    Args:
+        payload (str): The data to encode, usually the base64 TLV
+        options (dict, optional): QR code options
+        
+    Returns:
+        Tuple[int, int, bytes]: The width and height in pixels, and the packed rows
+    """
+    options = resolve_options(options)
+    matrix = qr_matrix(payload, options)
+    scale = options['box_size']
+    width = len(matrix) * scale
+    row_bytes = (width + 7) // 8
+    padding = '0' * (row_bytes * 8 - width)
+    dark = '1' * scale
+    light = '0' * scale
+    
+    rows = []
+    for row in matrix:
+        bits = ''.join(dark if module else light for module in row) + padding
+        rows.append(int(bits, 2).to_bytes(row_bytes, 'big') * scale)
+    return width, width, b''.join(rows)
+
+
+def render_pbm(payload: str, options: Optional[dict] = None) -> bytes:
+    """
+    Render the QR code as a binary PBM (P4) image.
+    
+    Args:
+        payload (str): The data to encode, usually the base64 TLV
+        options (dict, optional): QR code options
+        
+    Returns:
+        bytes: The PBM image data
+    """
+    width, height, bitmap = render_bitmap(payload, options)
+    return b'P4\n%d %d\n' % (width, height) + bitmap
+
+
+def render_escpos(payload: str, options: Optional[dict] = None) -> bytes:
+    """
+    Render the QR code as an ESC/POS ``GS v 0`` raster bit image command.
+    
+    ``box_size`` is the module size in printer dots; the defaults give a
+    410 dot image for a typical Phase 1 payload, which fits an 80mm (576 dot) head.
+    
+    Args:
+        payload (str): The data to encode, usually the base64 TLV
+        options (dict, optional): QR code options
+        
+    Returns:
+        bytes: The printer command, ready to be written to the device
+    """
+    width, height, bitmap = render_bitmap(payload, options)
+    row_bytes = (width + 7) // 8
+    return bytes((
+        0x1D, 0x76, 0x30, 0x00,
+        row_bytes & 0xFF, row_bytes >> 8,
+        height & 0xFF, height >> 8,
+    )) + bitmap
@@ -2,18 +2,39 @@
 ZATCA Tags module
 
 This module contains all the tag classes used for TLV encoding in ZATCA QR codes.
+Tag classes are imported on first access.
 """
 
-from .tag import Tag
-from .seller import Seller
-from .tax_number import TaxNumber
-from .invoice_date import InvoiceDate
-from .invoice_total_amount import InvoiceTotalAmount
-from .invoice_tax_amount import InvoiceTaxAmount
-from .invoice_hash import InvoiceHash
-from .invoice_digital_signature import InvoiceDigitalSignature
-from .public_key import PublicKey
-from .certificate_signature import CertificateSignature
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .tag import Tag
+    from .seller import Seller
+    from .tax_number import TaxNumber
+    from .invoice_date import InvoiceDate
+    from .invoice_total_amount import InvoiceTotalAmount
+    from .invoice_tax_amount import InvoiceTaxAmount
+    from .invoice_hash import InvoiceHash
+    from .invoice_digital_signature import InvoiceDigitalSignature
+    from .public_key import PublicKey
+    from .certificate_signature import CertificateSignature
+    from .registry import TAG_CLASSES, make_tag
+
+_LAZY_IMPORTS = {
+    'Tag': '.tag',
+    'Seller': '.seller',
+    'TaxNumber': '.tax_number',
+    'InvoiceDate': '.invoice_date',
+    'InvoiceTotalAmount': '.invoice_total_amount',
+    'InvoiceTaxAmount': '.invoice_tax_amount',
+    'InvoiceHash': '.invoice_hash',
+    'InvoiceDigitalSignature': '.invoice_digital_signature',
+    'PublicKey': '.public_key',
+    'CertificateSignature': '.certificate_signature',
+    'TAG_CLASSES': '.registry',
+    'make_tag': '.registry',
+}
 
 __all__ = [
     'Tag',
@@ -25,5 +46,20 @@ __all__ = [
     'InvoiceHash',
     'InvoiceDigitalSignature',
     'PublicKey',
-    'CertificateSignature'
-] 
\ No newline at end of file
+    'CertificateSignature',
+    'TAG_CLASSES',
+    'make_tag'
+]
+
+
+def __getattr__(name):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
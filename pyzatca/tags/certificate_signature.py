@@ -5,11 +5,13 @@ Certificate Signature tag for ZATCA QR code.
 from .tag import Tag
 
 
-class CertificateSignature(Tag):
+class CertificateSignature(Tag, tag=9):
     """
-    Certificate Signature tag (Tag 8) - represents the certificate signature.
+    Certificate Signature tag (Tag 9) - represents the certificate signature.
     """
     
+    __slots__ = ()
+    
     def __init__(self, value: str):
         """
         Initialize a CertificateSignature tag.
@@ -17,4 +19,4 @@ class CertificateSignature(Tag):
         Args:
             value (str): The certificate signature
         """
-        super().__init__(8, value) 
\ No newline at end of file
+        self._set_value(value) 
\ No newline at end of file
@@ -5,11 +5,13 @@ Invoice Date tag for ZATCA QR code.
 from .tag import Tag
 
 
-class InvoiceDate(Tag):
+class InvoiceDate(Tag, tag=3):
     """
     Invoice Date tag (Tag 3) - represents the invoice date in ISO8601 format.
     """
     
+    __slots__ = ()
+    
     def __init__(self, value: str):
         """
         Initialize an InvoiceDate tag.
@@ -17,4 +19,4 @@ class InvoiceDate(Tag):
         Args:
             value (str): The invoice date in ISO8601 format (e.g., '2021-07-12T14:25:09Z')
         """
-        super().__init__(3, value) 
\ No newline at end of file
+        self._set_value(value) 
\ No newline at end of file
@@ -5,11 +5,13 @@ Invoice Digital Signature tag for ZATCA QR code.
 from .tag import Tag
 
 
-class InvoiceDigitalSignature(Tag):
+class InvoiceDigitalSignature(Tag, tag=7):
     """
-    Invoice Digital Signature tag (Tag 6) - represents the invoice digital signature.
+    Invoice Digital Signature tag (Tag 7) - represents the invoice digital signature.
     """
     
+    __slots__ = ()
+    
     def __init__(self, value: str):
         """
         Initialize an InvoiceDigitalSignature tag.
@@ -17,4 +19,4 @@ class InvoiceDigitalSignature(Tag):
         Args:
             value (str): The invoice digital signature
         """
-        super().__init__(6, value) 
\ No newline at end of file
+        self._set_value(value) 
\ No newline at end of file
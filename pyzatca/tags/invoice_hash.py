@@ -5,11 +5,13 @@ Invoice Hash tag for ZATCA QR code.
 from .tag import Tag
 
 
-class InvoiceHash(Tag):
+class InvoiceHash(Tag, tag=6):
     """
-    Invoice Hash tag (Tag 5) - represents the invoice hash.
+    Invoice Hash tag (Tag 6) - represents the invoice hash.
     """
     
+    __slots__ = ()
+    
     def __init__(self, value: str):
         """
         Initialize an InvoiceHash tag.
@@ -17,4 +19,4 @@ class InvoiceHash(Tag):
         Args:
             value (str): The invoice hash
         """
-        super().__init__(5, value) 
\ No newline at end of file
+        self._set_value(value) 
\ No newline at end of file
@@ -5,11 +5,13 @@ Invoice Tax Amount tag for ZATCA QR code.
 from .tag import Tag
 
 
-class InvoiceTaxAmount(Tag):
+class InvoiceTaxAmount(Tag, tag=5):
     """
     Invoice Tax Amount tag (Tag 5) - represents the invoice tax amount.
     """
     
+    __slots__ = ()
+    
     def __init__(self, value: str):
         """
         Initialize an InvoiceTaxAmount tag.
@@ -17,4 +19,4 @@ class InvoiceTaxAmount(Tag):
         Args:
             value (str): The invoice tax amount (e.g., '15.00')
         """
-        super().__init__(5, value) 
\ No newline at end of file
+        self._set_value(value) 
\ No newline at end of file
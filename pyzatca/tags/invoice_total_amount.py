@@ -5,11 +5,13 @@ Invoice Total Amount tag for ZATCA QR code.
 from .tag import Tag
 
 
-class InvoiceTotalAmount(Tag):
+class InvoiceTotalAmount(Tag, tag=4):
     """
     Invoice Total Amount tag (Tag 4) - represents the invoice total amount.
     """
     
+    __slots__ = ()
+    
     def __init__(self, value: str):
         """
         Initialize an InvoiceTotalAmount tag.
@@ -17,4 +19,4 @@ class InvoiceTotalAmount(Tag):
         Args:
             value (str): The invoice total amount (e.g., '100.00')
         """
-        super().__init__(4, value) 
\ No newline at end of file
+        self._set_value(value) 
\ No newline at end of file
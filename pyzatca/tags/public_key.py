@@ -5,11 +5,13 @@ Public Key tag for ZATCA QR code.
 from .tag import Tag
 
 
-class PublicKey(Tag):
+class PublicKey(Tag, tag=8):
     """
-    Public Key tag (Tag 7) - represents the public key.
+    Public Key tag (Tag 8) - represents the public key.
     """
     
+    __slots__ = ()
+    
     def __init__(self, value: str):
         """
         Initialize a PublicKey tag.
@@ -17,4 +19,4 @@ class PublicKey(Tag):
         Args:
             value (str): The public key
         """
-        super().__init__(7, value) 
\ No newline at end of file
+        self._set_value(value) 
\ No newline at end of file
@@ -0,0 +1,45 @@
+"""
+Tag registry mapping ZATCA QR code tag numbers to tag classes.
+"""
+
+from typing import Dict, Type
+from .tag import Tag
+from .seller import Seller
+from .tax_number import TaxNumber
+from .invoice_date import InvoiceDate
+from .invoice_total_amount import InvoiceTotalAmount
+from .invoice_tax_amount import InvoiceTaxAmount
+from .invoice_hash import InvoiceHash
+from .invoice_digital_signature import InvoiceDigitalSignature
+from .public_key import PublicKey
+from .certificate_signature import CertificateSignature
+
+
+TAG_CLASSES: Dict[int, Type[Tag]] = {
+    1: Seller,
+    2: TaxNumber,
+    3: InvoiceDate,
+    4: InvoiceTotalAmount,
+    5: InvoiceTaxAmount,
+    6: InvoiceHash,
+    7: InvoiceDigitalSignature,
+    8: PublicKey,
+    9: CertificateSignature,
+}
+
+
+def make_tag(tag: int, value) -> Tag:
+    """
+    Create the tag instance registered for a tag number.
+    
+    Args:
+        tag (int): The tag number
+        value: The value to encode
+        
+    Returns:
+        Tag: An instance of the registered class, or a plain Tag for unknown numbers
+    """
+    tag_class = TAG_CLASSES.get(tag)
+    if tag_class is None:
+        return Tag(tag, value)
+    return tag_class(value)
@@ -5,11 +5,13 @@ Seller tag for ZATCA QR code.
 from .tag import Tag
 
 
-class Seller(Tag):
+class Seller(Tag, tag=1):
     """
     Seller tag (Tag 1) - represents the seller name.
     """
     
+    __slots__ = ()
+    
     def __init__(self, value: str):
         """
         Initialize a Seller tag.
@@ -17,4 +19,4 @@ class Seller(Tag):
         Args:
             value (str): The seller name
         """
-        super().__init__(1, value) 
\ No newline at end of file
+        self._set_value(value) 
\ No newline at end of file
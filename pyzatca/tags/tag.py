@@ -3,6 +3,59 @@ Base Tag class for TLV (Tag-Length-Value) encoding used in ZATCA QR codes.
 """
 
 import struct
+from typing import Any, Tuple
+
+
+# Packed tag and length headers, one table of 256 headers per tag number.
+_HEADER_TABLES = {}
+
+
+def header_table(tag: int) -> Tuple[bytes, ...]:
+    """
+    Get the packed TLV headers for a tag number, indexed by value length.
+    
+    Args:
+        tag (int): The tag number
+        
+    Returns:
+        Tuple[bytes, ...]: The two-byte headers for lengths 0 to 255
+        
+    Raises:
+        ValueError: If the tag number does not fit in one byte
+    """
+    table = _HEADER_TABLES.get(tag)
+    if table is None:
+        if not 0 <= tag <= 255:
+            raise ValueError('tag number and value length must fit in one byte')
+        table = _HEADER_TABLES[tag] = tuple(bytes((tag, length)) for length in range(256))
+    return table
+
+
+def encode_field(headers: Tuple[bytes, ...], value: Any) -> bytes:
+    """
+    Encode one TLV field, header included.
+    
+    Args:
+        headers (Tuple[bytes, ...]): The header table of the tag, from header_table()
+        value: The value, converted with str() and encoded as UTF-8
+        
+    Returns:
+        bytes: The TLV encoded field
+        
+    Raises:
+        ValueError: If the encoded value does not fit in one byte
+    """
+    encoded = str(value).encode('utf-8')
+    if len(encoded) > 255:
+        raise ValueError('tag number and value length must fit in one byte')
+    return headers[len(encoded)] + encoded
+
+
+def _restore(cls, tlv: bytes) -> 'Tag':
+    """Rebuild a tag from its TLV bytes, used when unpickling."""
+    tag = cls.__new__(cls)
+    set_tlv(tag, tlv)
+    return tag
 
 
 class Tag:
@@ -10,8 +63,23 @@ class Tag:
     Base class for TLV (Tag-Length-Value) encoding.
     
     Each tag has a tag number, a value, and automatically calculates the length.
+    
+    Tags are immutable and only keep their encoded TLV bytes, header
+    included. Subclasses for a fixed tag number declare it in the class
+    statement, e.g. ``class Seller(Tag, tag=1)``, and share one table of
+    pre-packed headers.
     """
     
+    __slots__ = ('_tlv',)
+    
+    # Pre-packed headers of a subclass with a fixed tag number
+    _headers = None
+    
+    def __init_subclass__(cls, tag: int = None, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if tag is not None:
+            cls._headers = header_table(tag)
+    
     def __init__(self, tag: int, value):
         """
         Initialize a Tag instance.
@@ -19,17 +87,58 @@ class Tag:
         Args:
             tag (int): The tag number
             value: The value to encode
+            
+        Raises:
+            ValueError: If the tag number or the encoded value does not fit in one byte
         """
-        self.tag = tag
-        self.value = str(value)
+        set_tlv(self, encode_field(header_table(tag), value))
+    
+    def _set_value(self, value) -> None:
+        """
+        Encode the value of a subclass with a fixed tag number.
+        
+        Args:
+            value: The value to encode
+            
+        Raises:
+            ValueError: If the encoded value does not fit in one byte
+        """
+        set_tlv(self, encode_field(self._headers, value))
+    
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+    
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+    
+    def __reduce__(self):
+        return (_restore, (type(self), self._tlv))
+    
+    def __eq__(self, other):
+        if not isinstance(other, Tag):
+            return NotImplemented
+        return type(self) is type(other) and self._tlv == other._tlv
+    
+    def __hash__(self):
+        return hash((type(self), self._tlv))
+    
+    @property
+    def tag(self) -> int:
+        """The tag number."""
+        return self._tlv[0]
+    
+    @property
+    def value(self) -> str:
+        """The tag value."""
+        return self._tlv[2:].decode('utf-8')
     
     def get_tag(self) -> int:
         """Get the tag number."""
-        return self.tag
+        return self._tlv[0]
     
     def get_value(self) -> str:
         """Get the tag value."""
-        return self.value
+        return self._tlv[2:].decode('utf-8')
     
     def get_length(self) -> int:
         """
@@ -37,7 +146,7 @@ class Tag:
         
         Important: Returns the number of bytes of the string, not the number of characters.
         """
-        return len(self.value.encode('utf-8'))
+        return len(self._tlv) - 2
     
     def to_hex(self, value: int) -> bytes:
         """
@@ -51,6 +160,17 @@ class Tag:
         """
         return struct.pack("B", value)
     
+    def to_bytes(self) -> bytes:
+        """
+        Convert the tag to its TLV byte representation.
+        
+        The TLV bytes are built once on construction.
+        
+        Returns:
+            bytes: The TLV encoded bytes
+        """
+        return self._tlv
+    
     def __str__(self) -> str:
         """
         Convert the tag to its TLV string representation.
@@ -58,12 +178,12 @@ class Tag:
         Returns:
             str: The TLV encoded string
         """
-        value = str(self.get_value())
-        return (
-            self.to_hex(self.get_tag()).decode('latin1') +
-            self.to_hex(self.get_length()).decode('latin1') +
-            value
-        )
+        tlv = self._tlv
+        return tlv[:2].decode('latin1') + tlv[2:].decode('utf-8')
     
     def __repr__(self) -> str:
-        return f"Tag(tag={self.tag}, value='{self.value}')" 
\ No newline at end of file
+        return f"Tag(tag={self.tag}, value='{self.value}')"
+
+
+# Writes the TLV slot, bypassing Tag.__setattr__ which keeps tags immutable.
+set_tlv = Tag._tlv.__set__
@@ -5,11 +5,13 @@ Tax Number tag for ZATCA QR code.
 from .tag import Tag
 
 
-class TaxNumber(Tag):
+class TaxNumber(Tag, tag=2):
     """
     Tax Number tag (Tag 2) - represents the seller tax number.
     """
     
+    __slots__ = ()
+    
     def __init__(self, value: str):
         """
         Initialize a TaxNumber tag.
@@ -17,4 +19,4 @@ class TaxNumber(Tag):
         Args:
             value (str): The seller tax number
         """
-        super().__init__(2, value) 
\ No newline at end of file
+        self._set_value(value) 
\ No newline at end of file
@@ -37,6 +37,9 @@ setup(
         "qrcode[pil]>=7.3.1",
     ],
     extras_require={
+        "numpy": [
+            "numpy>=1.17",
+        ],
         "dev": [
             "pytest>=6.0",
             "pytest-cov>=2.10",
@@ -45,6 +48,11 @@ setup(
             "mypy>=0.800",
         ],
     },
+    entry_points={
+        "console_scripts": [
+            "fatoora=pyzatca.cli:main",
+        ],
+    },
     keywords="fatoora, zatca, e-invoicing, qr-code, saudi-arabia, arabic",
     project_urls={
         "Bug Reports": "https://github.com/MohammedAlmajed/fatoora/issues",
@@ -0,0 +1,113 @@
+"""
+Shared fixtures for pyzatca tests.
+"""
+
+import datetime
+
+import pytest
+
+
+def make_certificate_pair(common_name: str = 'Test EGS') -> tuple:
+    """Create a self-signed SECP256K1 certificate and its private key, both as PEM text."""
+    from cryptography import x509
+    from cryptography.x509.oid import NameOID
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    
+    private_key = ec.generate_private_key(ec.SECP256K1())
+    subject = x509.Name([
+        x509.NameAttribute(NameOID.COMMON_NAME, common_name),
+        x509.NameAttribute(NameOID.COUNTRY_NAME, 'SA'),
+    ])
+    issuer = x509.Name([
+        x509.NameAttribute(NameOID.COMMON_NAME, 'TSZEINVOICE-SubCA-1'),
+        x509.NameAttribute(NameOID.DOMAIN_COMPONENT, 'gov'),
+    ])
+    now = datetime.datetime(2025, 1, 1)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(subject)
+        .issuer_name(issuer)
+        .public_key(private_key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=365))
+        .sign(private_key, hashes.SHA256())
+    )
+    return (
+        certificate.public_bytes(serialization.Encoding.PEM).decode('utf-8'),
+        private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        ).decode('utf-8'),
+    )
+
+
+@pytest.fixture(scope='session')
+def certificate_pair() -> tuple:
+    """A (certificate PEM, private key PEM) pair shared by the session."""
+    return make_certificate_pair()
+
+
+def make_ubl_invoice(number: int = 1, lines: int = 2, placeholders: bool = False) -> str:
+    """Build a simplified tax invoice in UBL, optionally with empty signature and QR placeholders."""
+    invoice_lines = ''.join(
+        f'\n    <cac:InvoiceLine>\n        <cbc:ID>{line}</cbc:ID>\n'
+        f'        <cbc:InvoicedQuantity unitCode="PCE">1.000000</cbc:InvoicedQuantity>\n'
+        f'        <cbc:LineExtensionAmount currencyID="SAR">100.00</cbc:LineExtensionAmount>\n'
+        f'        <cac:Item>\n            <cbc:Name>منتج {line}</cbc:Name>\n        </cac:Item>\n'
+        f'    </cac:InvoiceLine>'
+        for line in range(1, lines + 1)
+    )
+    total = f'{lines * 115}.00'
+    tax = f'{lines * 15}.00'
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2" '
+        'xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2" '
+        'xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2" '
+        'xmlns:ext="urn:oasis:names:specification:ubl:schema:xsd:CommonExtensionComponents-2">'
+        + ('<ext:UBLExtensions/>' if placeholders else '') +
+        '\n    <cbc:ProfileID>reporting:1.0</cbc:ProfileID>\n'
+        f'    <cbc:ID>SME{number:05d}</cbc:ID>\n'
+        '    <cbc:IssueDate>2025-08-05</cbc:IssueDate>\n'
+        '    <cbc:IssueTime>07:21:06</cbc:IssueTime>\n'
+        '    <cbc:InvoiceTypeCode name="0200000">388</cbc:InvoiceTypeCode>\n'
+        '    <cac:AdditionalDocumentReference>\n'
+        '        <cbc:ID>PIH</cbc:ID>\n'
+        '        <cac:Attachment>\n'
+        '            <cbc:EmbeddedDocumentBinaryObject mimeCode="text/plain">'
+        'NWZlY2ViNjZmZmM4NmYzOGQ5NTI3ODZjNmQ2OTZjNzljMmRiYzIzOWRkNGU5MWI0NjcyOWQ3M2EyN2ZiNTdlOQ=='
+        '</cbc:EmbeddedDocumentBinaryObject>\n'
+        '        </cac:Attachment>\n'
+        '    </cac:AdditionalDocumentReference>'
+        + (
+            '\n    <cac:AdditionalDocumentReference>\n        <cbc:ID>QR</cbc:ID>\n        <cac:Attachment>\n'
+            '            <cbc:EmbeddedDocumentBinaryObject mimeCode="text/plain"/>\n'
+            '        </cac:Attachment>\n    </cac:AdditionalDocumentReference>\n'
+            '    <cac:Signature>\n        <cbc:ID>urn:oasis:names:specification:ubl:signature:Invoice</cbc:ID>\n'
+            '        <cbc:SignatureMethod>urn:oasis:names:specification:ubl:dsig:enveloped:xades</cbc:SignatureMethod>\n'
+            '    </cac:Signature>'
+            if placeholders else ''
+        ) +
+        '\n    <cac:AccountingSupplierParty>\n'
+        '        <cac:Party>\n'
+        '            <cac:PartyTaxScheme>\n'
+        '                <cbc:CompanyID>310461435700003</cbc:CompanyID>\n'
+        '                <cac:TaxScheme><cbc:ID>VAT</cbc:ID></cac:TaxScheme>\n'
+        '            </cac:PartyTaxScheme>\n'
+        '            <cac:PartyLegalEntity>\n'
+        '                <cbc:RegistrationName>شركة سلة</cbc:RegistrationName>\n'
+        '            </cac:PartyLegalEntity>\n'
+        '        </cac:Party>\n'
+        '    </cac:AccountingSupplierParty>\n'
+        '    <cac:TaxTotal>\n'
+        f'        <cbc:TaxAmount currencyID="SAR">{tax}</cbc:TaxAmount>\n'
+        '    </cac:TaxTotal>\n'
+        '    <cac:LegalMonetaryTotal>\n'
+        f'        <cbc:TaxInclusiveAmount currencyID="SAR">{total}</cbc:TaxInclusiveAmount>\n'
+        '    </cac:LegalMonetaryTotal>'
+        f'{invoice_lines}\n'
+        '</Invoice>\n'
+    )
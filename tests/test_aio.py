@@ -0,0 +1,131 @@
+"""
+Tests for the asyncio API.
+"""
+
+import asyncio
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from cryptography import x509
+from pyzatca import Certificate, CSRRequest, GenerateCSR, GenerateQrCode, InvoiceSign
+from pyzatca.aio import AsyncRunner, get_runner
+from pyzatca.tags import Seller, TaxNumber
+
+
+def make_request() -> CSRRequest:
+    return (CSRRequest.make()
+        .set_common_name('Test EGS')
+        .set_organization_name('Test Organization')
+        .set_organizational_unit_name('Riyadh Branch')
+        .set_country_name('SA'))
+
+
+class TestAsyncMethods:
+    """Test cases for the async counterparts."""
+    
+    def test_should_render_async(self):
+        """Test render_async matches render."""
+        pytest.importorskip('qrcode')
+        qr_code = GenerateQrCode.from_array([Seller('Salla'), TaxNumber('310461435700003')])
+        
+        assert asyncio.run(qr_code.render_async()) == qr_code.render()
+    
+    def test_should_sign_async(self, certificate_pair):
+        """Test sign_async returns the signed invoice."""
+        signer = InvoiceSign('<Invoice/>', Certificate(*certificate_pair))
+        signed = asyncio.run(signer.sign_async())
+        
+        assert signed.hash == signer.get_hash()
+        assert GenerateQrCode.from_base64(signed.qr_code).data[0].get_value() == signed.hash
+    
+    def test_should_sign_async_with_signing_time(self, certificate_pair):
+        """Test sign_async signs the signer itself with its signing time."""
+        signer = InvoiceSign('<Invoice/>', Certificate(*certificate_pair), '2025-08-05T07:21:06')
+        signed = asyncio.run(signer.sign_async())
+        
+        assert '<xades:SigningTime>2025-08-05T07:21:06</xades:SigningTime>' in signed.xml
+        assert signer.get_signature() is not None
+        assert signer.get_invoice() == signed.xml
+    
+    def test_should_sign_async_in_processes(self, certificate_pair):
+        """Test signing on a process pool runner."""
+        certificate = Certificate(*certificate_pair).set_secret_key('secret')
+        restored = pickle.loads(pickle.dumps(certificate))
+        assert restored.get_authorization_header() == certificate.get_authorization_header()
+        
+        signer = InvoiceSign('<Invoice/>', certificate, '2025-08-05T07:21:06')
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            runner = AsyncRunner(executor, max_concurrency=1)
+            signed = asyncio.run(signer.sign_async(runner))
+        
+        assert signed.hash == InvoiceSign('<Invoice/>', certificate).get_hash()
+        assert '<xades:SigningTime>2025-08-05T07:21:06</xades:SigningTime>' in signed.xml
+        assert signer.get_invoice() == signed.xml
+    
+    def test_should_generate_async(self):
+        """Test generate_async returns a signed CSR."""
+        csr = asyncio.run(GenerateCSR.from_request(make_request()).generate_async())
+        
+        assert x509.load_pem_x509_csr(csr.get_csr_content().encode('utf-8')).is_signature_valid
+    
+    def test_should_use_default_runner(self):
+        """Test the default runner is created once."""
+        assert get_runner() is get_runner()
+
+
+class TestAsyncRunner:
+    """Test cases for AsyncRunner class."""
+    
+    def test_should_bound_concurrency(self):
+        """Test no more than max_concurrency calls run at once."""
+        runner = AsyncRunner(max_concurrency=2)
+        lock = threading.Lock()
+        running = []
+        peak = []
+        
+        def work():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.pop()
+        
+        async def main():
+            await asyncio.gather(*(runner.run(work) for _ in range(6)))
+        
+        asyncio.run(main())
+        runner.shutdown()
+        
+        assert len(peak) == 6
+        assert max(peak) == 2
+    
+    def test_should_drop_cancelled_waiting_calls(self):
+        """Test a cancelled call that has not started never runs."""
+        runner = AsyncRunner(max_concurrency=1)
+        release = threading.Event()
+        calls = []
+        
+        async def main():
+            first = asyncio.ensure_future(runner.run(release.wait))
+            second = asyncio.ensure_future(runner.run(calls.append, 'second'))
+            await asyncio.sleep(0.01)
+            second.cancel()
+            release.set()
+            assert await first is True
+            with pytest.raises(asyncio.CancelledError):
+                await second
+            assert await runner.run(calls.append, 'third') is None
+        
+        asyncio.run(main())
+        runner.shutdown()
+        
+        assert calls == ['third']
+    
+    def test_should_reject_invalid_concurrency(self):
+        """Test exception for a negative limit."""
+        with pytest.raises(ValueError, match='max_concurrency must be positive'):
+            AsyncRunner(max_concurrency=-1)
@@ -0,0 +1,121 @@
+"""
+Tests for Certificate class.
+"""
+
+import base64
+import hashlib
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from pyzatca import Certificate
+from pyzatca.helpers.certificate import CertificateRegistry, certificate_registry
+from tests.conftest import make_certificate_pair
+
+
+class TestCertificate:
+    """Test cases for Certificate class."""
+    
+    def test_should_load_certificate(self, certificate_pair):
+        """Test loading a certificate and private key."""
+        certificate = Certificate(*certificate_pair)
+        assert certificate.get_plain_certificate() == certificate_pair[0]
+        assert certificate.get_certificate().issuer is not None
+    
+    def test_should_get_plain_public_key(self, certificate_pair):
+        """Test the public key matches the PEM body."""
+        certificate = Certificate(*certificate_pair)
+        public_pem = certificate.get_certificate().public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode('utf-8')
+        expected = public_pem.replace(
+            '-----BEGIN PUBLIC KEY-----\n', ''
+        ).replace(
+            '\n-----END PUBLIC KEY-----\n', ''
+        ).replace('\n', '')
+        
+        assert certificate.get_plain_public_key() == expected
+    
+    def test_should_get_hash_and_signature(self, certificate_pair):
+        """Test the certificate hash and signature."""
+        certificate = Certificate(*certificate_pair)
+        
+        assert certificate.get_hash() == base64.b64encode(
+            hashlib.sha256(certificate_pair[0].encode('utf-8')).digest()
+        ).decode('ascii')
+        assert certificate.get_certificate_signature() == certificate.get_certificate().signature[1:].hex()
+    
+    def test_should_refresh_authorization_header_on_new_secret(self, certificate_pair):
+        """Test the cached authorization header follows the secret key."""
+        certificate = Certificate(*certificate_pair).set_secret_key('first')
+        first = certificate.get_authorization_header()
+        
+        assert certificate.get_authorization_header() is first
+        
+        second = certificate.set_secret_key('second').get_authorization_header()
+        decoded = base64.b64decode(second[len('Basic '):]).decode('utf-8')
+        assert decoded.endswith(':second')
+        assert second != first
+    
+    def test_should_throw_exception_without_secret_key(self, certificate_pair):
+        """Test exception for missing secret key."""
+        with pytest.raises(ValueError, match='Secret key must be set'):
+            Certificate(*certificate_pair).get_authorization_header()
+    
+    def test_should_throw_exception_for_invalid_private_key(self, certificate_pair):
+        """Test a private key that cannot be parsed is rejected up front."""
+        with pytest.raises(ValueError):
+            Certificate(certificate_pair[0], 'garbage')
+    
+    def test_should_check_matching_private_key(self, certificate_pair):
+        """Test the private key is checked against the certificate."""
+        _, other_private_key = make_certificate_pair('Other EGS')
+        
+        assert Certificate(*certificate_pair).has_matching_key()
+        assert not Certificate(certificate_pair[0], other_private_key).has_matching_key()
+    
+    def test_should_share_parsed_certificate(self, certificate_pair):
+        """Test the same PEM is parsed once across instances."""
+        first = Certificate(*certificate_pair)
+        second = Certificate(*certificate_pair)
+        
+        assert second.get_certificate() is first.get_certificate()
+        assert first.get_fingerprint() in certificate_registry
+
+
+class TestCertificateRegistry:
+    """Test cases for CertificateRegistry class."""
+    
+    def test_should_count_hits_and_misses(self, certificate_pair):
+        """Test registry counters."""
+        registry = CertificateRegistry()
+        registry.get(certificate_pair[0])
+        registry.get(certificate_pair[0])
+        
+        assert (registry.hits, registry.misses) == (1, 1)
+        assert len(registry) == 1
+    
+    def test_should_evict_least_recently_used(self, certificate_pair):
+        """Test LRU eviction."""
+        registry = CertificateRegistry(maxsize=2)
+        other_pem = make_certificate_pair('Other EGS')[0]
+        third_pem = make_certificate_pair('Third EGS')[0]
+        
+        first = registry.get(certificate_pair[0])
+        registry.get(other_pem)
+        registry.get(certificate_pair[0])
+        registry.get(third_pem)
+        
+        assert len(registry) == 2
+        assert first.fingerprint in registry
+        assert registry.get(other_pem) is not None
+        assert registry.misses == 4
+    
+    def test_should_clear(self, certificate_pair):
+        """Test clearing the registry."""
+        registry = CertificateRegistry()
+        registry.get(certificate_pair[0])
+        registry.clear()
+        
+        assert len(registry) == 0
+        assert registry.hits == registry.misses == 0
@@ -0,0 +1,143 @@
+"""
+Tests for the lazily loading certificate store.
+"""
+
+import threading
+
+import pytest
+from pyzatca.helpers import Certificate, CertificateStore
+from pyzatca.helpers.certificate_store import DirectorySource, SqliteSource, estimate_size
+from tests.conftest import make_certificate_pair
+
+
+@pytest.fixture(scope='module')
+def certificate_pairs():
+    return {f'egs-{number}': make_certificate_pair(f'EGS {number}') for number in range(4)}
+
+
+@pytest.fixture
+def directory(tmp_path, certificate_pairs):
+    for egs_id, (certificate, private_key) in certificate_pairs.items():
+        (tmp_path / f'{egs_id}.pem').write_text(certificate, encoding='utf-8')
+        (tmp_path / f'{egs_id}.key').write_text(private_key, encoding='utf-8')
+    (tmp_path / 'egs-0.secret').write_text('secret\n', encoding='utf-8')
+    (tmp_path / 'orphan.pem').write_text('no key', encoding='utf-8')
+    return tmp_path
+
+
+class TestCertificateStore:
+    """Test cases for CertificateStore."""
+    
+    def test_should_load_from_directory_on_first_use(self, directory, certificate_pairs):
+        """Test certificates are parsed on first access and then served from memory."""
+        store = CertificateStore.from_directory(str(directory))
+        assert store.stats()['items'] == 0
+        
+        certificate = store.get('egs-1')
+        assert isinstance(certificate, Certificate)
+        assert certificate.get_plain_certificate() == certificate_pairs['egs-1'][0]
+        assert store['egs-1'] is certificate
+        assert store.stats() == {
+            'hits': 1, 'misses': 1, 'evictions': 0, 'items': 1, 'bytes': estimate_size(certificate)
+        }
+    
+    def test_should_set_secret_key(self, directory):
+        """Test a secret file next to the certificate sets the secret key."""
+        store = CertificateStore.from_directory(str(directory))
+        
+        assert store.get('egs-0').get_secret_key() == 'secret'
+        assert store.get('egs-1').get_secret_key() is None
+    
+    def test_should_list_units_without_loading(self, directory):
+        """Test the index only covers units with both files, and loads nothing."""
+        store = CertificateStore.from_directory(str(directory))
+        
+        assert store.ids() == ['egs-0', 'egs-1', 'egs-2', 'egs-3']
+        assert 'egs-2' in store and 'orphan' not in store
+        assert store.stats()['misses'] == 0
+    
+    def test_should_raise_for_unknown_units(self, directory):
+        """Test unknown or path-like identifiers raise KeyError."""
+        store = CertificateStore.from_directory(str(directory))
+        
+        for egs_id in ('missing', 'orphan', '../egs-1', ''):
+            with pytest.raises(KeyError):
+                store.get(egs_id)
+    
+    def test_should_evict_by_count(self, directory):
+        """Test the least recently used certificate is evicted past max_items."""
+        store = CertificateStore.from_directory(str(directory), max_items=2)
+        store.get('egs-0')
+        store.get('egs-1')
+        store.get('egs-0')
+        store.get('egs-2')
+        
+        assert store.stats()['evictions'] == 1
+        store.get('egs-0')
+        assert store.stats()['hits'] == 2
+        store.get('egs-1')
+        assert store.stats()['misses'] == 4
+    
+    def test_should_evict_by_memory(self, directory):
+        """Test the estimated memory stays under max_bytes."""
+        store = CertificateStore.from_directory(str(directory))
+        size = estimate_size(store.get('egs-0'))
+        store = CertificateStore.from_directory(str(directory), max_bytes=int(size * 2.5))
+        for egs_id in store.ids():
+            store.get(egs_id)
+        
+        stats = store.stats()
+        assert stats['items'] == 2 and stats['evictions'] == 2
+        assert stats['bytes'] <= size * 2.5
+    
+    def test_should_invalidate_and_clear(self, directory):
+        """Test dropped certificates are loaded again."""
+        store = CertificateStore.from_directory(str(directory))
+        first = store.get('egs-0')
+        store.invalidate('egs-0')
+        
+        assert store.get('egs-0') is not first
+        store.clear()
+        assert store.stats() == {'hits': 0, 'misses': 0, 'evictions': 0, 'items': 0, 'bytes': 0}
+    
+    def test_should_load_from_sqlite(self, tmp_path, certificate_pairs):
+        """Test a SQLite table works as a source across threads."""
+        source = SqliteSource(str(tmp_path / 'csids.db'))
+        for egs_id, (certificate, private_key) in certificate_pairs.items():
+            source.put(egs_id, certificate, private_key, 'secret' if egs_id == 'egs-3' else None)
+        store = CertificateStore.from_sqlite(str(tmp_path / 'csids.db'))
+        
+        results = {}
+        threads = [
+            threading.Thread(target=lambda egs_id=egs_id: results.update({egs_id: store.get(egs_id)}))
+            for egs_id in certificate_pairs
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert store.ids() == sorted(certificate_pairs)
+        assert results['egs-2'].get_plain_certificate() == certificate_pairs['egs-2'][0]
+        assert results['egs-3'].get_secret_key() == 'secret'
+        with pytest.raises(KeyError):
+            store.get('missing')
+    
+    def test_should_reject_invalid_keys(self, directory, certificate_pairs):
+        """Test a broken or mismatched key raises and is not cached."""
+        (directory / 'egs-1.key').write_text('garbage', encoding='utf-8')
+        (directory / 'egs-2.key').write_text(certificate_pairs['egs-3'][1], encoding='utf-8')
+        store = CertificateStore.from_directory(str(directory))
+        
+        with pytest.raises(ValueError):
+            store.get('egs-1')
+        with pytest.raises(ValueError, match='does not match'):
+            store.get('egs-2')
+        assert store.stats()['items'] == 0 and store.stats()['bytes'] == 0
+    
+    def test_should_reject_invalid_settings(self, directory):
+        """Test limits must be positive and table names plain identifiers."""
+        with pytest.raises(ValueError):
+            CertificateStore(DirectorySource(str(directory)), max_items=0)
+        with pytest.raises(ValueError):
+            SqliteSource(':memory:', table='bad name')
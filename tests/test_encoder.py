@@ -0,0 +1,102 @@
+"""
+Tests for the built-in QR code encoder.
+"""
+
+import base64
+import random
+from io import BytesIO
+
+import pytest
+import qrcode
+from qrcode.util import lost_point
+from pyzatca import GenerateQrCode
+from pyzatca.rendering import encode, render_png
+from pyzatca.rendering.encoder import penalty, penalty_array
+from pyzatca.tags import Seller, TaxNumber, InvoiceDate, InvoiceTotalAmount, InvoiceTaxAmount
+
+
+def reference(data, error_correction=qrcode.constants.ERROR_CORRECT_L):
+    """Build the symbol the way GenerateQrCode.render used to."""
+    qr = qrcode.QRCode(version=1, error_correction=error_correction, box_size=10, border=4)
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr
+
+
+def payloads():
+    generator = random.Random(20210712)
+    phase_one = GenerateQrCode.from_array([
+        Seller('شركة حدث لتقنية المعلومات'),
+        TaxNumber('312087593400003'),
+        InvoiceDate('2025-08-05T07:21:06Z'),
+        InvoiceTotalAmount('100.00'),
+        InvoiceTaxAmount('15.00')
+    ]).to_base64()
+    cases = [phase_one, 'AQVTYWxsYQ==']
+    # Phase 1 and Phase 2 sized payloads
+    for length in (60, 110, 180, 250, 400, 550, 700, 1200):
+        cases.append(base64.b64encode(bytes(generator.getrandbits(8) for _ in range(length))).decode('ascii'))
+    # Long alphanumeric and numeric runs get their own segments
+    cases.append('ab' + 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123' + 'cd' + '1' * 45 + 'ef')
+    cases.append('1234567890' * 3)
+    cases.append('HELLO WORLD')
+    return cases
+
+
+class TestEncoder:
+    """Differential tests against the qrcode library."""
+    
+    @pytest.mark.parametrize('use_numpy', [False, True])
+    @pytest.mark.parametrize('payload', payloads())
+    def test_should_match_qrcode_matrix(self, payload, use_numpy):
+        """Test the encoder builds the same symbol as qrcode."""
+        if use_numpy:
+            pytest.importorskip('numpy')
+        
+        expected = reference(payload)
+        symbol = encode(payload, use_numpy=use_numpy)
+        
+        assert symbol.version == expected.version
+        assert symbol.modules == expected.modules
+    
+    @pytest.mark.parametrize('level', ['L', 'M', 'Q', 'H'])
+    def test_should_match_qrcode_for_every_level(self, level):
+        """Test every error correction level."""
+        error_correction = getattr(qrcode.constants, 'ERROR_CORRECT_' + level)
+        for payload in payloads()[:6]:
+            assert encode(payload, level).modules == reference(payload, error_correction).modules
+    
+    def test_should_render_same_png_as_qrcode(self):
+        """Test the PNG output is unchanged."""
+        payload = payloads()[0]
+        buffer = BytesIO()
+        reference(payload).make_image(fill_color='black', back_color='white').save(buffer, format='PNG')
+        
+        assert render_png(payload) == buffer.getvalue()
+    
+    def test_should_throw_exception_when_data_does_not_fit(self):
+        """Test exception for data beyond version 40."""
+        with pytest.raises(ValueError, match='data too long'):
+            encode('a' * 3000)
+
+
+class TestPenalty:
+    """Test cases for mask penalty scoring."""
+    
+    def matrices(self):
+        generator = random.Random(7)
+        for size in (21, 25, 45, 57):
+            for _ in range(5):
+                yield [[generator.random() < 0.5 for _ in range(size)] for _ in range(size)]
+    
+    def test_should_score_like_qrcode(self):
+        """Test the bit mask scorer matches qrcode.util.lost_point."""
+        for modules in self.matrices():
+            rows = [int(''.join('1' if module else '0' for module in row), 2) for row in modules]
+            assert penalty(rows, len(modules)) == lost_point(modules)
+    
+    def test_should_score_arrays_like_qrcode(self):
+        """Test the NumPy scorer matches qrcode.util.lost_point."""
+        numpy = pytest.importorskip('numpy')
+        for modules in self.matrices():
+            assert penalty_array(numpy, numpy.array(modules, dtype=bool)) == lost_point(modules)
@@ -0,0 +1,104 @@
+"""
+Tests for GenerateCSR class.
+"""
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+from pyzatca import CSRRequest, GenerateCSR
+from pyzatca.helpers import KeyPool
+
+
+def make_request(unit: str = 'Riyadh Branch') -> CSRRequest:
+    """Build a complete CSR request."""
+    return (CSRRequest.make()
+        .set_uid('310461435700003')
+        .set_common_name('Test EGS')
+        .set_organization_name('Test Organization')
+        .set_organizational_unit_name(unit)
+        .set_country_name('SA'))
+
+
+def load_subject(csr) -> x509.Name:
+    """Parse a generated CSR and return its subject."""
+    request = x509.load_pem_x509_csr(csr.get_csr_content().encode('utf-8'))
+    assert request.is_signature_valid
+    return request.subject
+
+
+class TestGenerateCSR:
+    """Test cases for GenerateCSR class."""
+    
+    def test_should_generate_csr(self):
+        """Test generating a signed CSR on SECP256K1."""
+        csr = GenerateCSR.from_request(make_request()).initialize().generate()
+        subject = load_subject(csr)
+        
+        assert subject.get_attributes_for_oid(NameOID.ORGANIZATIONAL_UNIT_NAME)[0].value == 'Riyadh Branch'
+        assert isinstance(csr.get_private_key().curve, ec.SECP256K1)
+    
+    def test_should_share_subject_between_requests(self):
+        """Test the subject name is built once per DN."""
+        first = GenerateCSR.from_request(make_request()).get_subject()
+        
+        assert GenerateCSR.from_request(make_request()).get_subject() is first
+    
+    def test_should_wrap_generation_errors(self):
+        """Test exception for an incomplete request."""
+        with pytest.raises(RuntimeError, match='Error Generating New Certificate Signing Request'):
+            GenerateCSR.from_request(CSRRequest.make()).generate()
+    
+    def test_should_take_keys_from_pool(self):
+        """Test generating with a key pool."""
+        with KeyPool(size=2, start=False) as pool:
+            pool.start()
+            csr = GenerateCSR.from_request(make_request(), key_pool=pool).generate()
+            load_subject(csr)
+            
+            assert pool.hits + pool.misses == 1
+
+
+class TestKeyPool:
+    """Test cases for KeyPool class."""
+    
+    def test_should_fill_in_background(self):
+        """Test the pool hands out distinct pre-generated keys."""
+        with KeyPool(size=3) as pool:
+            keys = [pool.get(timeout=5) for _ in range(3)]
+            
+            assert pool.hits == 3
+            assert len({key.private_numbers().private_value for key in keys}) == 3
+    
+    def test_should_generate_when_empty(self):
+        """Test a key is generated inline when no key is ready."""
+        pool = KeyPool(size=1, start=False)
+        key = pool.get()
+        
+        assert isinstance(key.curve, ec.SECP256K1)
+        assert (pool.hits, pool.misses) == (0, 1)
+    
+    def test_should_reject_invalid_size(self):
+        """Test exception for an empty pool size."""
+        with pytest.raises(ValueError, match='size must be positive'):
+            KeyPool(size=0)
+
+
+class TestGenerateMany:
+    """Test cases for GenerateCSR.generate_many."""
+    
+    def test_should_generate_many_in_order(self):
+        """Test batch CSRs across processes, in input order."""
+        units = [f'Branch {number}' for number in range(10)]
+        csrs = list(GenerateCSR.generate_many((make_request(unit) for unit in units), workers=2, chunk_size=3))
+        
+        assert len(csrs) == 10
+        for unit, csr in zip(units, csrs):
+            subject = load_subject(csr)
+            assert subject.get_attributes_for_oid(NameOID.ORGANIZATIONAL_UNIT_NAME)[0].value == unit
+            assert isinstance(csr.get_private_key(), ec.EllipticCurvePrivateKey)
+    
+    def test_should_reject_invalid_chunk_size(self):
+        """Test exception for an empty chunk size."""
+        with pytest.raises(ValueError, match='chunk_size must be positive'):
+            list(GenerateCSR.generate_many([make_request()], chunk_size=0))
@@ -2,6 +2,8 @@
 Tests for GenerateQrCode class.
 """
 
+import io
+
 import pytest
 from pyzatca import GenerateQrCode, Tag
 from pyzatca.tags import Seller, TaxNumber, InvoiceDate, InvoiceTotalAmount, InvoiceTaxAmount
@@ -79,4 +81,133 @@ class TestGenerateQrCode:
         
         # Should be a non-empty string
         assert isinstance(tlv_string, str)
-        assert len(tlv_string) > 0 
\ No newline at end of file
+        assert len(tlv_string) > 0
+    
+    def test_should_generate_tlv_bytes(self):
+        """Test TLV bytes generation."""
+        tlv_bytes = GenerateQrCode.from_array([
+            Seller('سلة'),
+            TaxNumber('1234567891'),
+        ]).to_tlv_bytes()
+        
+        assert tlv_bytes == b'\x01\x06' + 'سلة'.encode('utf-8') + b'\x02\n1234567891'
+
+
+class TestEncodeMany:
+    """Test cases for GenerateQrCode.encode_many."""
+    
+    ROWS = [
+        ('Salla', '1234567891', '2021-07-12T14:25:09Z', '100.00', '15.00'),
+        ('سلة', '1234567891', '2021-07-12T14:25:09Z', '100.00', '15.00'),
+        ('سلة', '1234567891', '2021-07-13T10:00:00Z', 250, 37.5),
+    ]
+    
+    def per_object(self, row):
+        seller, tax_number, date, total, tax = row
+        return GenerateQrCode.from_array([
+            Seller(seller),
+            TaxNumber(tax_number),
+            InvoiceDate(date),
+            InvoiceTotalAmount(total),
+            InvoiceTaxAmount(tax)
+        ]).to_base64()
+    
+    def test_should_match_per_object_path(self):
+        """Test batch output matches GenerateQrCode.to_base64."""
+        payloads = list(GenerateQrCode.encode_many(self.ROWS))
+        
+        assert payloads[0] == 'AQVTYWxsYQIKMTIzNDU2Nzg5MQMUMjAyMS0wNy0xMlQxNDoyNTowOVoEBjEwMC4wMAUFMTUuMDA='
+        assert payloads == [self.per_object(row) for row in self.ROWS]
+    
+    def test_should_accept_mapping_rows(self):
+        """Test rows given as mappings."""
+        rows = [dict(zip(GenerateQrCode.ROW_FIELDS, row)) for row in self.ROWS]
+        assert list(GenerateQrCode.encode_many(rows)) == [self.per_object(row) for row in self.ROWS]
+    
+    def test_should_yield_nothing_for_empty_batch(self):
+        """Test an empty batch."""
+        assert list(GenerateQrCode.encode_many([])) == []
+    
+    def test_should_throw_exception_with_wrong_rows(self):
+        """Test exception handling with malformed rows."""
+        with pytest.raises(ValueError, match='malformed data structure'):
+            list(GenerateQrCode.encode_many([('Salla', '1234567891')]))
+        with pytest.raises(ValueError, match='malformed data structure'):
+            list(GenerateQrCode.encode_many([{'seller': 'Salla'}]))
+    
+    def test_should_throw_exception_with_wrong_later_row(self):
+        """Test every row is checked for its fields, not only the first one."""
+        rows = [dict(zip(GenerateQrCode.ROW_FIELDS, row)) for row in self.ROWS]
+        del rows[2]['invoice_tax_amount']
+        payloads = GenerateQrCode.encode_many(rows)
+        
+        assert next(payloads) == self.per_object(self.ROWS[0])
+        with pytest.raises(ValueError, match="row 2 has no 'invoice_tax_amount'"):
+            list(payloads)
+        with pytest.raises(ValueError, match='row 1 is not a row of five values'):
+            list(GenerateQrCode.encode_many([self.ROWS[0], self.ROWS[1][:4]]))
+    
+    def test_should_throw_exception_for_oversized_value(self):
+        """Test exception for values longer than 255 bytes."""
+        with pytest.raises(ValueError, match='must fit in one byte'):
+            list(GenerateQrCode.encode_many([('a' * 256,) + self.ROWS[0][1:]]))
+    
+    def test_should_throw_exception_for_oversized_value_in_later_row(self):
+        """Test every row is checked, not only the first one."""
+        payloads = GenerateQrCode.encode_many([self.ROWS[0], self.ROWS[0][:4] + ('1' * 256,)])
+        
+        assert next(payloads) == self.per_object(self.ROWS[0])
+        with pytest.raises(ValueError, match='must fit in one byte'):
+            next(payloads)
+
+
+class TestDecode:
+    """Test cases for decoding TLV payloads."""
+    
+    PAYLOAD = 'AQbYs9mE2KkCCjEyMzQ1Njc4OTEDFDIwMjEtMDctMTJUMTQ6MjU6MDlaBAYxMDAuMDAFBTE1LjAw'
+    
+    def test_should_decode_base64_into_typed_tags(self):
+        """Test decoding a payload back into tag classes."""
+        qr_code = GenerateQrCode.from_base64(self.PAYLOAD)
+        
+        assert [type(tag) for tag in qr_code.data] == [
+            Seller, TaxNumber, InvoiceDate, InvoiceTotalAmount, InvoiceTaxAmount
+        ]
+        assert qr_code.data[0].get_value() == 'سلة'
+        assert qr_code.to_base64() == self.PAYLOAD
+    
+    def test_should_walk_buffer_without_copies(self):
+        """Test iter_tlv yields views into the original buffer."""
+        data = bytearray(b'\x01\x05Salla\x02\x0a1234567891')
+        values = list(GenerateQrCode.iter_tlv(data))
+        
+        assert [(tag, bytes(value)) for tag, value in values] == [(1, b'Salla'), (2, b'1234567891')]
+        data[2:7] = b'Noon!'
+        assert bytes(values[0][1]) == b'Noon!'
+    
+    def test_should_decode_unknown_tags_as_plain_tags(self):
+        """Test unknown tag numbers fall back to Tag."""
+        tags = list(GenerateQrCode.decode_tlv(b'\x1e\x02ok'))
+        assert type(tags[0]) is Tag
+        assert tags[0].get_tag() == 30
+    
+    def test_should_throw_exception_for_truncated_data(self):
+        """Test exception handling with truncated TLV data."""
+        with pytest.raises(ValueError, match='truncated TLV data'):
+            list(GenerateQrCode.decode_tlv(b'\x01\x05Sal'))
+        with pytest.raises(ValueError, match='truncated TLV data'):
+            list(GenerateQrCode.decode_tlv(b'\x01\x05Salla\x02'))
+    
+    def test_should_throw_exception_for_invalid_base64(self):
+        """Test exception handling with invalid base64."""
+        with pytest.raises(ValueError):
+            GenerateQrCode.from_base64('not base64!')
+    
+    def test_should_decode_stream_lazily(self):
+        """Test decoding a file of payloads line by line."""
+        stream = io.StringIO(self.PAYLOAD + '\n\n' + self.PAYLOAD + '\n')
+        decoded = GenerateQrCode.iter_base64(stream)
+        
+        assert next(decoded).to_base64() == self.PAYLOAD
+        assert stream.tell() < len(stream.getvalue())
+        assert len(list(decoded)) == 1
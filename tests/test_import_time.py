@@ -0,0 +1,89 @@
+"""
+Import-time budget for the lightweight parts of pyzatca.
+"""
+
+import subprocess
+import sys
+
+# Cumulative import time allowed for QR code generation, in microseconds
+IMPORT_TIME_BUDGET_US = 50000
+
+QR_ONLY = (
+    "import pyzatca\n"
+    "from pyzatca import GenerateQrCode\n"
+    "from pyzatca.tags import Seller, TaxNumber, InvoiceDate, InvoiceTotalAmount, InvoiceTaxAmount\n"
+)
+
+
+def import_times(code: str) -> dict:
+    """
+    Run code under ``python -X importtime`` and return the cumulative time of
+    each top-level import, in microseconds, keyed by module name.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        stderr=subprocess.PIPE, universal_newlines=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name[1:].startswith(' '):
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def modules_loaded(code: str) -> set:
+    result = subprocess.run(
+        [sys.executable, '-c', code + "import sys\nprint('\\n'.join(sys.modules))"],
+        stdout=subprocess.PIPE, universal_newlines=True, check=True
+    )
+    return set(result.stdout.split())
+
+
+class TestImportTime:
+    """Test cases for lazy imports."""
+    
+    def test_should_not_load_cryptography_for_qr_codes(self):
+        """Test QR code generation does not pull in cryptography."""
+        loaded = modules_loaded(QR_ONLY)
+        
+        assert 'pyzatca.generate_qr_code' in loaded
+        assert not any(module.split('.')[0] == 'cryptography' for module in loaded)
+    
+    def test_should_not_load_cryptography_for_invoice_batches(self):
+        """Test the columnar Phase 1 batch does not pull in cryptography."""
+        loaded = modules_loaded("from pyzatca import InvoiceBatch\n")
+        
+        assert 'pyzatca.models.invoice_batch' in loaded
+        assert not any(module.split('.')[0] == 'cryptography' for module in loaded)
+    
+    def test_should_load_heavy_classes_on_access(self):
+        """Test the signing classes are still reachable from the package."""
+        loaded = modules_loaded("import pyzatca\npyzatca.Certificate\n")
+        assert 'cryptography.x509' in loaded
+    
+    def test_should_stay_within_import_time_budget(self):
+        """Test the import time of QR code generation."""
+        baseline = import_times('pass')
+        times = import_times(QR_ONLY)
+        
+        total = sum(cumulative for name, cumulative in times.items() if name not in baseline)
+        
+        assert total <= IMPORT_TIME_BUDGET_US, sorted(times.items(), key=lambda item: -item[1])
+    
+    def test_should_keep_public_names(self):
+        """Test __all__ names resolve and show up in dir()."""
+        import pyzatca
+        import pyzatca.models
+        import pyzatca.tags
+        
+        for name in pyzatca.__all__:
+            assert getattr(pyzatca, name) is not None
+            assert name in dir(pyzatca)
+        for name in pyzatca.tags.__all__:
+            assert getattr(pyzatca.tags, name) is not None
+        for name in pyzatca.models.__all__:
+            assert getattr(pyzatca.models, name) is not None
+            assert name in dir(pyzatca.models)
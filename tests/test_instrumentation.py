@@ -0,0 +1,105 @@
+"""
+Tests for the instrumentation module.
+"""
+
+import pytest
+from pyzatca import Certificate, CSRRequest, GenerateCSR, GenerateQrCode, InvoiceSign, instrumentation
+from pyzatca.instrumentation import HistogramSink
+from pyzatca.tags import Seller, TaxNumber
+
+
+class RecordingSink:
+    """Sink that keeps every stage name it receives."""
+    
+    def __init__(self):
+        self.stages = []
+    
+    def __call__(self, name, seconds):
+        assert seconds >= 0
+        self.stages.append(name)
+
+
+def make_qr_code() -> GenerateQrCode:
+    return GenerateQrCode.from_array([Seller('Salla'), TaxNumber('310461435700003')])
+
+
+class TestInstrumentation:
+    """Test cases for stage events."""
+    
+    def test_should_not_emit_without_sinks(self):
+        """Test no stage is timed while no sink is registered."""
+        assert instrumentation.stage('qr.tlv') is instrumentation.stage('qr.base64')
+    
+    def test_should_emit_base64_stages(self):
+        """Test to_base64 reports TLV building and base64 separately."""
+        with instrumentation.attached(RecordingSink()) as sink:
+            payload = make_qr_code().to_base64()
+        
+        assert payload == make_qr_code().to_base64()
+        assert sink.stages == ['qr.tlv', 'qr.base64']
+        assert not instrumentation.sinks
+    
+    def test_should_emit_render_stages(self):
+        """Test render reports the matrix, image and PNG stages."""
+        pytest.importorskip('qrcode')
+        with instrumentation.attached(RecordingSink()) as sink:
+            make_qr_code().render()
+        
+        assert sink.stages == ['qr.tlv', 'qr.base64', 'qr.matrix', 'qr.image', 'qr.png', 'qr.render']
+    
+    def test_should_emit_signing_stages(self, certificate_pair):
+        """Test invoice signing reports hashing, signing, the QR payload and the signed XML."""
+        certificate = Certificate(*certificate_pair)
+        with instrumentation.attached(RecordingSink()) as sink:
+            InvoiceSign('<Invoice/>', certificate).get_invoice()
+        
+        assert sink.stages == ['invoice.hash', 'invoice.sign', 'qr.tlv', 'qr.base64', 'invoice.qr', 'invoice.xades']
+    
+    def test_should_emit_csr_stages(self):
+        """Test CSR generation reports key generation and signing."""
+        request = (CSRRequest.make()
+            .set_common_name('Test EGS')
+            .set_organization_name('Test Organization')
+            .set_organizational_unit_name('Riyadh Branch')
+            .set_country_name('SA'))
+        with instrumentation.attached(RecordingSink()) as sink:
+            GenerateCSR.from_request(request).generate()
+        
+        assert sink.stages == ['csr.key', 'csr.sign', 'csr.generate']
+
+
+class TestHistogramSink:
+    """Test cases for HistogramSink class."""
+    
+    def test_should_count_into_buckets(self):
+        """Test cumulative bucket counts and sums."""
+        sink = HistogramSink(buckets=(0.001, 0.01))
+        sink('qr.png', 0.0005)
+        sink('qr.png', 0.001)
+        sink('qr.png', 0.5)
+        histogram = sink.snapshot()['qr.png']
+        
+        assert histogram['buckets'] == {0.001: 2, 0.01: 2, float('inf'): 3}
+        assert histogram['count'] == 3
+        assert histogram['sum'] == pytest.approx(0.5015)
+        assert sink.quantile('qr.png', 0.5) == 0.001
+        assert sink.quantile('qr.tlv', 0.5) is None
+    
+    def test_should_dump_prometheus_text(self):
+        """Test the Prometheus text exposition output."""
+        sink = HistogramSink(buckets=(0.001,))
+        sink('qr.tlv', 0.0002)
+        
+        assert sink.to_prometheus() == (
+            '# HELP pyzatca_stage_duration_seconds Time spent in each pyzatca stage.\n'
+            '# TYPE pyzatca_stage_duration_seconds histogram\n'
+            'pyzatca_stage_duration_seconds_bucket{stage="qr.tlv",le="0.001"} 1\n'
+            'pyzatca_stage_duration_seconds_bucket{stage="qr.tlv",le="+Inf"} 1\n'
+            'pyzatca_stage_duration_seconds_sum{stage="qr.tlv"} 0.0002\n'
+            'pyzatca_stage_duration_seconds_count{stage="qr.tlv"} 1\n'
+        )
+    
+    def test_should_reject_unsorted_buckets(self):
+        """Test exception for buckets that are not increasing."""
+        with pytest.raises(ValueError, match='buckets must be increasing'):
+            HistogramSink(buckets=(0.1, 0.01))
@@ -0,0 +1,90 @@
+"""
+Tests for InvoiceBatch class.
+"""
+
+import datetime
+from array import array
+
+import pytest
+from pyzatca import GenerateQrCode, InvoiceBatch
+from pyzatca.models import invoice_batch
+from pyzatca.models.invoice_batch import to_epoch, to_halalas
+
+
+ROWS = [
+    ('شركة حدث لتقنية المعلومات', '312087593400003', '2025-08-05T07:21:06Z', '1150.00', '150.00'),
+    ('Salla', '310461435700003', '2025-08-05T23:59:59Z', '100.00', '15.00'),
+    ('شركة حدث لتقنية المعلومات', '312087593400003', '2025-08-06T00:00:00Z', '0.05', '0.00'),
+]
+
+
+class TestInvoiceBatch:
+    """Test cases for InvoiceBatch class."""
+    
+    def test_should_match_encode_many(self):
+        """Test batch payloads match the row encoder."""
+        batch = InvoiceBatch.from_rows(ROWS)
+        
+        assert len(batch) == 3
+        assert batch.to_base64() == list(GenerateQrCode.encode_many(ROWS))
+    
+    def test_should_dictionary_encode_sellers(self):
+        """Test repeated sellers are stored once."""
+        batch = InvoiceBatch.from_rows(ROWS)
+        
+        assert batch.sellers == [ROWS[0][:2], ROWS[1][:2]]
+        assert list(batch.seller_ids) == [0, 1, 0]
+    
+    def test_should_store_halalas_and_epoch_seconds(self):
+        """Test the numeric columns."""
+        batch = InvoiceBatch().append(
+            'Salla', '310461435700003', datetime.datetime(2025, 8, 5, 7, 21, 6), 100.005, 15
+        )
+        
+        assert isinstance(batch.totals, array)
+        assert list(batch.totals) == [10001]
+        assert list(batch.taxes) == [1500]
+        assert list(batch.dates) == [to_epoch('2025-08-05T07:21:06Z')]
+    
+    def test_should_build_from_columns(self):
+        """Test whole columns, including NumPy arrays."""
+        numpy = pytest.importorskip('numpy')
+        columns = list(zip(*ROWS))
+        batch = InvoiceBatch.from_columns(
+            columns[0],
+            columns[1],
+            numpy.array([to_epoch(date) for date in columns[2]], dtype=numpy.int64),
+            numpy.array([to_halalas(total) for total in columns[3]]),
+            [to_halalas(tax) for tax in columns[4]],
+        )
+        
+        assert batch.to_base64() == list(GenerateQrCode.encode_many(ROWS))
+    
+    def test_should_match_row_by_row_path(self, monkeypatch):
+        """Test the NumPy column path, across chunks, builds the same payloads as the row loop."""
+        pytest.importorskip('numpy')
+        rows = ROWS * 5 + [('Salla', '310461435700003', '0999-12-31T23:59:59Z', '-7.25', '0.01')]
+        batch = InvoiceBatch.from_rows(rows)
+        monkeypatch.setattr(invoice_batch, '_CHUNK_ROWS', 4)
+        columns = list(batch.iter_tlv_bytes())
+        
+        monkeypatch.setattr(invoice_batch, '_numpy', False)
+        assert list(batch.iter_tlv_bytes()) == columns
+        assert batch.to_base64() == list(GenerateQrCode.encode_many(rows))
+    
+    def test_should_format_negative_amounts(self):
+        """Test credit note amounts keep their sign."""
+        batch = InvoiceBatch.from_columns(['Salla'], ['310461435700003'], [0], [-150], [-5])
+        tags = GenerateQrCode.from_base64(batch.to_base64()[0]).data
+        
+        assert [tag.get_value() for tag in tags[2:]] == ['1970-01-01T00:00:00Z', '-1.50', '-0.05']
+    
+    def test_should_throw_exception_for_mismatched_columns(self):
+        """Test exception for columns of different lengths."""
+        with pytest.raises(ValueError, match='columns must have the same length'):
+            InvoiceBatch.from_columns(['Salla'], ['310461435700003'], [0, 1], [100], [15])
+    
+    def test_should_throw_exception_for_oversized_seller(self):
+        """Test exception for a seller name longer than 255 bytes."""
+        with pytest.raises(ValueError, match='must fit in one byte'):
+            InvoiceBatch().add_seller('a' * 256, '310461435700003')
@@ -0,0 +1,264 @@
+"""
+Tests for previous invoice hash chains.
+"""
+
+import json
+import re
+import threading
+
+import pytest
+from pyzatca import GenerateQrCode
+from pyzatca.helpers import Certificate, CertificateStore
+from pyzatca.helpers.certificate_store import SqliteSource
+from pyzatca.invoice_chain import (
+    INITIAL_PIH, ChainCheckpoints, ChainEngine, ChainState, InvoiceChain, set_chain_references
+)
+from pyzatca.models.invoice_sign import InvoiceSign
+from tests.conftest import make_certificate_pair, make_ubl_invoice
+
+SIGNING_TIME = '2025-08-05T07:21:06'
+
+
+@pytest.fixture(scope='module')
+def certificate(certificate_pair):
+    return Certificate(*certificate_pair)
+
+
+def links(results):
+    """The ICV, PIH and hash of each result; signatures differ between runs."""
+    return [(result.icv, result.pih, result.hash) for result in results]
+
+
+def without_pih(xml_invoice):
+    return re.sub(r'<cac:AdditionalDocumentReference>\s*<cbc:ID>PIH.*?</cac:AdditionalDocumentReference>\s*',
+                  '', xml_invoice, flags=re.S)
+
+
+class TestChainReferences:
+    """Test cases for set_chain_references."""
+    
+    def test_should_fill_pih_and_add_icv_before_it(self):
+        """Test an existing PIH is replaced and the ICV reference is added in front of it."""
+        xml = set_chain_references(make_ubl_invoice(), 7, 'cGloCg==')
+        
+        assert '<cbc:UUID>7</cbc:UUID>' in xml
+        assert 'mimeCode="text/plain">cGloCg==</cbc:EmbeddedDocumentBinaryObject>' in xml
+        assert INITIAL_PIH not in xml
+        assert xml.index('<cbc:ID>ICV</cbc:ID>') < xml.index('<cbc:ID>PIH</cbc:ID>')
+    
+    def test_should_add_missing_references_before_qr(self):
+        """Test both references are added before the QR reference, and filled in again later."""
+        xml = set_chain_references(without_pih(make_ubl_invoice(placeholders=True)), 1, INITIAL_PIH)
+        
+        assert xml.index('<cbc:ID>ICV</cbc:ID>') < xml.index('<cbc:ID>PIH</cbc:ID>') < xml.index('<cbc:ID>QR</cbc:ID>')
+        assert set_chain_references(xml, 2, 'cGloCg==') == xml.replace(
+            '<cbc:UUID>1</cbc:UUID>', '<cbc:UUID>2</cbc:UUID>'
+        ).replace(INITIAL_PIH, 'cGloCg==')
+    
+    def test_should_fill_references_with_spaced_ids(self):
+        """Test ICV and PIH references whose IDs have surrounding whitespace are filled in, not added again."""
+        xml_invoice = set_chain_references(make_ubl_invoice(), 1, INITIAL_PIH)
+        xml_invoice = xml_invoice.replace('<cbc:ID>ICV</cbc:ID>', '<cbc:ID> ICV </cbc:ID>').replace(
+            '<cbc:ID>PIH</cbc:ID>', '<cbc:ID>\n    PIH\n</cbc:ID>'
+        )
+        xml = set_chain_references(xml_invoice, 2, 'cGloCg==')
+        
+        assert xml.count('ICV') == 1 and xml.count('PIH') == 1
+        assert xml == xml_invoice.replace('<cbc:UUID>1</cbc:UUID>', '<cbc:UUID>2</cbc:UUID>').replace(
+            INITIAL_PIH, 'cGloCg=='
+        )
+    
+    def test_should_find_qr_reference_with_spaced_id(self):
+        """Test the references go before a QR reference whose ID has surrounding whitespace."""
+        xml_invoice = without_pih(make_ubl_invoice(placeholders=True)).replace(
+            '<cbc:ID>QR</cbc:ID>', '<cbc:ID> QR </cbc:ID>'
+        )
+        xml = set_chain_references(xml_invoice, 1, INITIAL_PIH)
+        
+        assert xml.index('<cbc:ID>PIH</cbc:ID>') < xml.index('<cbc:ID> QR </cbc:ID>')
+    
+    def test_should_raise_without_root(self):
+        """Test text without a root element is rejected."""
+        with pytest.raises(ValueError):
+            set_chain_references('not xml', 1, INITIAL_PIH)
+
+
+class TestInvoiceChain:
+    """Test cases for InvoiceChain."""
+    
+    def test_should_start_with_initial_pih(self):
+        """Test the initial PIH is the base64 encoded hex SHA-256 of '0'."""
+        assert INITIAL_PIH == 'NWZlY2ViNjZmZmM4NmYzOGQ5NTI3ODZjNmQ2OTZjNzljMmRiYzIzOWRkNGU5MWI0NjcyOWQ3M2EyN2ZiNTdlOQ=='
+    
+    def test_should_link_each_invoice_to_previous_hash(self, certificate):
+        """Test invoices get consecutive ICVs and the hash of the invoice before them."""
+        chain = InvoiceChain('egs-1', certificate)
+        
+        first = chain.sign(make_ubl_invoice(1), SIGNING_TIME)
+        second = chain.sign(make_ubl_invoice(2), SIGNING_TIME)
+        
+        assert (first.icv, first.pih) == (1, INITIAL_PIH)
+        assert (second.icv, second.pih) == (2, first.hash)
+        assert chain.state == ChainState(2, second.hash)
+        assert '<cbc:UUID>2</cbc:UUID>' in second.xml and first.hash in second.xml
+        assert InvoiceSign(second.xml, certificate).get_hash() == second.hash
+    
+    def test_should_resume_from_checkpoint(self, tmp_path, certificate):
+        """Test a new chain continues from the checkpoint exactly like an uninterrupted one."""
+        invoices = [make_ubl_invoice(number) for number in range(1, 5)]
+        uninterrupted = InvoiceChain('egs-1', certificate)
+        expected = [uninterrupted.sign(xml, SIGNING_TIME) for xml in invoices]
+        
+        chain = InvoiceChain('egs-1', certificate, ChainCheckpoints(str(tmp_path)))
+        for xml in invoices[:2]:
+            chain.sign(xml, SIGNING_TIME)
+        assert json.loads((tmp_path / 'egs-1.json').read_text()) == {'icv': 2, 'pih': expected[1].hash}
+        
+        resumed = InvoiceChain('egs-1', certificate, ChainCheckpoints(str(tmp_path)))
+        assert resumed.state == ChainState(2, expected[1].hash)
+        assert links(resumed.sign(xml, SIGNING_TIME) for xml in invoices[2:]) == links(expected[2:])
+    
+    def test_should_checkpoint_every_so_many_invoices(self, tmp_path, certificate):
+        """Test a larger interval saves less often, and flush() saves the rest."""
+        checkpoints = ChainCheckpoints(str(tmp_path))
+        chain = InvoiceChain('egs-1', certificate, checkpoints, checkpoint_every=2)
+        for number in range(1, 4):
+            chain.sign(make_ubl_invoice(number), SIGNING_TIME)
+        
+        assert checkpoints.load('egs-1').icv == 2
+        chain.flush()
+        assert checkpoints.load('egs-1') == chain.state
+    
+    def test_should_leave_failed_invoices_out_of_chain(self, certificate):
+        """Test an invoice that cannot be hashed does not move the chain on."""
+        chain = InvoiceChain('egs-1', certificate)
+        
+        with pytest.raises(ValueError):
+            chain.sign(make_ubl_invoice()[:-20])
+        assert chain.state == ChainState(0, INITIAL_PIH)
+        assert chain.sign(make_ubl_invoice()).icv == 1
+    
+    def test_should_reject_path_like_devices(self, tmp_path):
+        """Test device identifiers cannot escape the checkpoint directory."""
+        with pytest.raises(ValueError):
+            ChainCheckpoints(str(tmp_path)).load('../egs-1')
+
+
+class TestChainEngine:
+    """Test cases for ChainEngine."""
+    
+    def test_should_chain_many_devices_in_parallel(self, certificate):
+        """Test interleaved devices get the same chains as signing each device on its own."""
+        invoices = [(f'egs-{number % 3}', make_ubl_invoice(number)) for number in range(12)]
+        engine = ChainEngine(certificate)
+        
+        results = list(engine.sign_many(invoices, workers=4, signing_time=SIGNING_TIME))
+        
+        assert [result.device for result in results] == [device for device, _ in invoices]
+        for device in ('egs-0', 'egs-1', 'egs-2'):
+            chain = InvoiceChain(device, certificate)
+            expected = [chain.sign(xml, SIGNING_TIME) for name, xml in invoices if name == device]
+            assert links(result for result in results if result.device == device) == links(expected)
+            assert engine.state(device) == ChainState(4, expected[-1].hash)
+    
+    def test_should_use_certificate_per_device(self, certificate):
+        """Test a mapping of certificates is looked up by device."""
+        engine = ChainEngine({'egs-1': certificate})
+        
+        assert engine.chain('egs-1')._certificate() is certificate
+        with pytest.raises(KeyError):
+            engine.sign('egs-2', make_ubl_invoice())
+    
+    def test_should_look_up_certificates_for_every_invoice(self, tmp_path, certificate_pair):
+        """Test chains do not keep certificates the store evicted, and pick up renewed ones."""
+        source = SqliteSource(str(tmp_path / 'csids.db'))
+        for number in range(5):
+            source.put(f'egs-{number}', *certificate_pair)
+        store = CertificateStore(source, max_items=1)
+        engine = ChainEngine(store)
+        for number in range(5):
+            engine.sign(f'egs-{number}', make_ubl_invoice(), SIGNING_TIME)
+        
+        assert store.stats()['evictions'] == 4
+        assert all(chain.certificate is store for chain in engine._chains.values())
+        
+        renewed = Certificate(*make_certificate_pair('EGS renewed'))
+        source.put('egs-0', renewed.get_plain_certificate(), renewed.plain_private_key)
+        store.invalidate('egs-0')
+        signed = engine.sign('egs-0', make_ubl_invoice(), SIGNING_TIME)
+        
+        assert GenerateQrCode.from_base64(signed.qr_code).data[7].get_value() == renewed.get_plain_public_key()
+        assert (signed.icv, engine.state('egs-0').icv) == (2, 2)
+    
+    def test_should_drop_least_recently_used_chains(self, certificate):
+        """Test idle chains past max_chains are flushed, dropped and resumed from their checkpoints."""
+        checkpoints = ChainCheckpoints()
+        engine = ChainEngine(certificate, checkpoints, checkpoint_every=100, max_chains=2)
+        first = engine.sign('egs-0', make_ubl_invoice(), SIGNING_TIME)
+        engine.sign('egs-1', make_ubl_invoice(), SIGNING_TIME)
+        engine.sign('egs-2', make_ubl_invoice(), SIGNING_TIME)
+        
+        assert list(engine._chains) == ['egs-1', 'egs-2']
+        assert checkpoints.load('egs-0') == engine.state('egs-0') == ChainState(1, first.hash)
+        signed = engine.sign('egs-0', make_ubl_invoice(), SIGNING_TIME)
+        assert (signed.icv, signed.pih) == (2, first.hash)
+        with pytest.raises(ValueError, match='max_chains must be positive'):
+            ChainEngine(certificate, max_chains=0)
+    
+    def test_should_keep_busy_chains(self, certificate):
+        """Test a chain with invoices in flight is not dropped."""
+        engine = ChainEngine(certificate, max_chains=1)
+        busy, ticket = engine._reserve('egs-0')
+        engine.sign('egs-1', make_ubl_invoice(), SIGNING_TIME)
+        
+        assert engine.chain('egs-0') is busy
+        busy._release(ticket)
+    
+    def test_should_release_turns_of_cancelled_invoices(self, certificate):
+        """Test stopping sign_many early does not block the device's later invoices."""
+        engine = ChainEngine(certificate)
+        results = engine.sign_many((('egs-1', make_ubl_invoice(number)) for number in range(20)), workers=1)
+        next(results)
+        results.close()
+        
+        signed = []
+        thread = threading.Thread(target=lambda: signed.append(engine.sign('egs-1', make_ubl_invoice())))
+        thread.start()
+        thread.join(timeout=10)
+        assert signed and signed[0].icv == engine.state('egs-1').icv
+    
+    def test_should_continue_after_last_yielded_invoice(self, tmp_path, certificate):
+        """Test invoices hashed but not yielded before sign_many is closed are taken back."""
+        checkpoints = ChainCheckpoints(str(tmp_path))
+        engine = ChainEngine(certificate, checkpoints)
+        results = engine.sign_many((('egs-1', make_ubl_invoice(number)) for number in range(40)), workers=4)
+        yielded = [next(results), next(results)]
+        results.close()
+        
+        assert engine.state('egs-1') == ChainState(2, yielded[-1].hash)
+        assert checkpoints.load('egs-1') == engine.state('egs-1')
+        signed = engine.sign('egs-1', make_ubl_invoice(), SIGNING_TIME)
+        assert (signed.icv, signed.pih) == (yielded[-1].icv + 1, yielded[-1].hash)
+    
+    def test_should_continue_after_failed_invoice(self, certificate):
+        """Test a failing invoice stops sign_many without chaining the invoices after it."""
+        engine = ChainEngine(certificate)
+        invoices = [('egs-1', make_ubl_invoice(1)), ('egs-1', 'not xml'), ('egs-1', make_ubl_invoice(3))]
+        results = engine.sign_many(invoices, workers=2)
+        first = next(results)
+        with pytest.raises(ValueError):
+            next(results)
+        
+        signed = engine.sign('egs-1', make_ubl_invoice(), SIGNING_TIME)
+        assert (signed.icv, signed.pih) == (2, first.hash)
+    
+    def test_should_flush_on_exit(self, tmp_path, certificate):
+        """Test leaving the engine context saves every unit."""
+        checkpoints = ChainCheckpoints(str(tmp_path))
+        with ChainEngine(certificate, checkpoints, checkpoint_every=100) as engine:
+            engine.sign('egs-1', make_ubl_invoice())
+            engine.sign('egs-2', make_ubl_invoice())
+            assert checkpoints.load('egs-1') is None
+        
+        assert checkpoints.load('egs-1') == engine.state('egs-1')
+        assert checkpoints.load('egs-2').icv == 1
@@ -0,0 +1,173 @@
+"""
+Tests for the streaming canonical invoice hasher.
+"""
+
+import hashlib
+import io
+import itertools
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+import pytest
+from pyzatca import Certificate, InvoiceSign
+from pyzatca.helpers.invoice_hasher import InvoiceHasher, canonicalize
+
+
+NAMESPACES = (
+    'xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2" '
+    'xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2" '
+    'xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2" '
+    'xmlns:ext="urn:oasis:names:specification:ubl:schema:xsd:CommonExtensionComponents-2"'
+)
+
+
+def make_invoice(lines: int = 2, signature: str = 'signature', qr: str = 'AQ==') -> str:
+    """Build a UBL invoice with the sections the hash leaves out."""
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<Invoice {NAMESPACES}>\n'
+        f'    <ext:UBLExtensions><ext:UBLExtension><ext:ExtensionContent>{signature}</ext:ExtensionContent>'
+        '</ext:UBLExtension></ext:UBLExtensions>\n'
+        '    <cbc:ID>SME00010</cbc:ID>\n'
+        '    <cac:AdditionalDocumentReference>\n'
+        '        <cbc:ID>PIH</cbc:ID>\n'
+        '        <cac:Attachment><cbc:EmbeddedDocumentBinaryObject mimeCode="text/plain">MA==</cbc:EmbeddedDocumentBinaryObject></cac:Attachment>\n'
+        '    </cac:AdditionalDocumentReference>\n'
+        '    <cac:AdditionalDocumentReference>\n'
+        '        <cbc:ID>QR</cbc:ID>\n'
+        f'        <cac:Attachment><cbc:EmbeddedDocumentBinaryObject mimeCode="text/plain">{qr}</cbc:EmbeddedDocumentBinaryObject></cac:Attachment>\n'
+        '    </cac:AdditionalDocumentReference>\n'
+        '    <cac:Signature><cbc:ID>urn:oasis:names:specification:ubl:signature:Invoice</cbc:ID></cac:Signature>\n'
+        + ''.join(make_line(number) for number in range(lines))
+        + '</Invoice>\n'
+    )
+
+
+def make_line(number: int) -> str:
+    return (
+        f'    <cac:InvoiceLine><cbc:ID>{number}</cbc:ID>'
+        f'<cbc:LineExtensionAmount currencyID="SAR">100.00</cbc:LineExtensionAmount>'
+        f'<cac:Item><cbc:Name>منتج {number}</cbc:Name></cac:Item></cac:InvoiceLine>\n'
+    )
+
+
+class LineStream(io.RawIOBase):
+    """A binary stream producing a large invoice without holding it in memory."""
+    
+    def __init__(self, lines: int):
+        head, tail = make_invoice(0).split('</Invoice>')
+        self.parts = itertools.chain(
+            [head], (make_line(number) for number in range(lines)), ['</Invoice>' + tail]
+        )
+        self.buffer = b''
+    
+    def readable(self):
+        return True
+    
+    def read(self, size=-1):
+        for part in self.parts:
+            self.buffer += part.encode('utf-8')
+            if len(self.buffer) >= size:
+                break
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+class TestInvoiceHasher:
+    """Test cases for InvoiceHasher and canonicalize."""
+    
+    def test_should_leave_out_signature_sections(self):
+        """Test UBLExtensions, Signature and the QR reference are removed, and the PIH reference kept."""
+        canonical = canonicalize(make_invoice(1).encode('utf-8'))
+        
+        assert 'UBLExtensions' not in canonical
+        assert 'cac:Signature' not in canonical
+        assert '>QR<' not in canonical and 'AQ==' not in canonical
+        assert '<cbc:ID>PIH</cbc:ID>' in canonical
+        assert canonical.startswith(f'<Invoice {NAMESPACES}>\n    \n    <cbc:ID>SME00010</cbc:ID>')
+        assert canonical.endswith('</cac:InvoiceLine>\n</Invoice>')
+    
+    def test_should_leave_out_qr_reference_with_spaced_id(self):
+        """Test the QR reference is recognised when whitespace surrounds its ID."""
+        xml = make_invoice(1).replace('<cbc:ID>QR</cbc:ID>', '<cbc:ID>\n            QR </cbc:ID>')
+        
+        assert canonicalize(xml.encode('utf-8')) == canonicalize(make_invoice(1).encode('utf-8'))
+    
+    def test_should_match_standard_canonical_form(self):
+        """Test ordering and escaping agree with the standard library canonicalizer."""
+        xml = (
+            '<?xml version="1.0"?>\n<!-- comment --><a xmlns="urn:x" xmlns:b="urn:b" z="1" b:y="2&amp;&#9;&#10;" '
+            'a="&quot;&lt;">\r\n<b:c/>t&gt;&lt;&amp; <d x="1"></d><e xmlns=""/><?pi  data ?></a>'
+        )
+        
+        assert canonicalize(xml.encode('utf-8')) == ET.canonicalize(xml)
+    
+    def test_should_hash_any_chunking(self):
+        """Test the digest does not depend on how the XML is split."""
+        xml = make_invoice(20).encode('utf-8')
+        expected = hashlib.sha256(canonicalize(xml).encode('utf-8')).digest()
+        
+        for chunk_size in (1, 7, 100, 65536):
+            assert InvoiceHasher.hash(io.BytesIO(xml), chunk_size=chunk_size) == expected
+    
+    def test_should_hash_paths_bytes_and_text(self, tmp_path):
+        """Test every kind of source gives the same digest."""
+        xml = make_invoice(3)
+        path = tmp_path / 'invoice.xml'
+        path.write_text(xml, encoding='utf-8')
+        digest = InvoiceHasher().update(xml).digest()
+        
+        assert InvoiceHasher.hash(str(path)) == digest
+        assert InvoiceHasher.hash(path) == digest
+        assert InvoiceHasher.hash(xml.encode('utf-8')) == digest
+        assert InvoiceHasher.hash(io.StringIO(xml)) == digest
+    
+    def test_should_hash_in_bounded_memory(self):
+        """Test a large invoice is hashed without holding it in memory."""
+        tracemalloc.start()
+        try:
+            InvoiceHasher.hash(LineStream(10000))
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        
+        assert peak < 1024 * 1024
+    
+    def test_should_reject_malformed_xml(self):
+        """Test malformed or incomplete XML raises ValueError."""
+        with pytest.raises(ValueError):
+            InvoiceHasher.hash(b'<Invoice><a></Invoice>')
+        with pytest.raises(ValueError):
+            InvoiceHasher.hash(b'<Invoice>')
+    
+    def test_should_not_update_final_hash(self):
+        """Test a finished hash cannot be extended."""
+        hasher = InvoiceHasher().update('<Invoice/>')
+        hasher.digest()
+        
+        with pytest.raises(ValueError):
+            hasher.update('<Invoice/>')
+
+
+class TestInvoiceSignHash:
+    """Test cases for the canonical hash used by InvoiceSign."""
+    
+    def test_should_ignore_signature_and_qr(self, certificate_pair):
+        """Test signing output embedded in the invoice does not change its hash."""
+        certificate = Certificate(*certificate_pair)
+        unsigned = InvoiceSign(make_invoice(signature='', qr=''), certificate)
+        signed = InvoiceSign(make_invoice(signature='c2lnbmF0dXJl', qr='AQID'), certificate)
+        
+        assert unsigned.get_hash() == signed.get_hash()
+        assert unsigned.get_hash() != InvoiceSign(make_invoice(3), certificate).get_hash()
+    
+    def test_should_sign_from_path(self, tmp_path, certificate_pair):
+        """Test an invoice file is hashed like its content."""
+        certificate = Certificate(*certificate_pair)
+        path = tmp_path / 'invoice.xml'
+        path.write_text(make_invoice(5), encoding='utf-8')
+        signer = InvoiceSign.from_path(str(path), certificate)
+        
+        assert signer.get_hash() == InvoiceSign(make_invoice(5), certificate).get_hash()
+        assert signer.invoice.xml_content is None
+        assert signer.xml_invoice == make_invoice(5)
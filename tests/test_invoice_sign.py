@@ -0,0 +1,197 @@
+"""
+Tests for InvoiceSign class.
+"""
+
+import base64
+import hashlib
+import re
+import xml.etree.ElementTree as ET
+
+import pytest
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+from pyzatca import Certificate, GenerateQrCode, InvoiceSign
+from pyzatca.helpers import InvoiceHasher
+from pyzatca.helpers.xades import SignatureTemplate
+from pyzatca.models import SignedInvoice
+from pyzatca.qr_verifier import QrVerifier
+from tests.conftest import make_ubl_invoice
+
+
+def make_invoice(number: int) -> str:
+    """Build a minimal invoice XML document."""
+    return f'<Invoice><cbc:ID>INV-{number:05d}</cbc:ID></Invoice>'
+
+
+class TestInvoiceSign:
+    """Test cases for InvoiceSign class."""
+    
+    def test_should_sign_invoice_hash(self, certificate_pair):
+        """Test the signature verifies against the certificate public key."""
+        certificate = Certificate(*certificate_pair)
+        signer = InvoiceSign(make_invoice(1), certificate).sign()
+        digest = hashlib.sha256(make_invoice(1).encode('utf-8')).digest()
+        
+        certificate.get_certificate().public_key().verify(
+            base64.b64decode(signer.get_signature()), digest, ec.ECDSA(hashes.SHA256())
+        )
+        assert signer.get_hash() == base64.b64encode(digest).decode('ascii')
+    
+    def test_should_put_signature_in_qr_code(self, certificate_pair):
+        """Test the QR code carries the hash, signature and public key."""
+        certificate = Certificate(*certificate_pair)
+        signer = InvoiceSign(make_invoice(1), certificate)
+        tags = GenerateQrCode.from_base64(signer.get_qr_code()).data
+        
+        assert [tag.get_tag() for tag in tags] == [6, 7, 8, 9]
+        assert tags[0].get_value() == signer.get_hash()
+        assert tags[1].get_value() == signer.get_signature()
+        assert tags[2].get_value() == certificate.get_plain_public_key()
+
+
+class TestSignMany:
+    """Test cases for InvoiceSign.sign_many."""
+    
+    def test_should_sign_many_in_order(self, certificate_pair):
+        """Test batch results match single signing, in input order."""
+        certificate = Certificate(*certificate_pair)
+        invoices = [make_invoice(number) for number in range(50)]
+        results = list(InvoiceSign.sign_many(iter(invoices), certificate, workers=4))
+        
+        assert len(results) == 50
+        for xml_invoice, result in zip(invoices, results):
+            assert isinstance(result, SignedInvoice)
+            assert '<ds:SignatureValue>' in result.xml
+            assert result.hash == InvoiceSign(xml_invoice, certificate).get_hash()
+            tags = GenerateQrCode.from_base64(result.qr_code).data
+            assert tags[0].get_value() == result.hash
+    
+    def test_should_stream_results(self, certificate_pair):
+        """Test results are yielded before the input is exhausted."""
+        certificate = Certificate(*certificate_pair)
+        consumed = []
+        
+        def invoices():
+            for number in range(1000):
+                consumed.append(number)
+                yield make_invoice(number)
+        
+        results = InvoiceSign.sign_many(invoices(), certificate, workers=2)
+        next(results)
+        results.close()
+        
+        assert len(consumed) < 1000
+    
+    def test_should_reject_invalid_workers(self, certificate_pair):
+        """Test exception for a negative worker count."""
+        with pytest.raises(ValueError, match='workers must be positive'):
+            list(InvoiceSign.sign_many([make_invoice(1)], Certificate(*certificate_pair), workers=-1))
+
+
+class TestXadesSignature:
+    """Test cases for the XAdES signature in the signed invoice."""
+    
+    NAMESPACES = {
+        'ds': 'http://www.w3.org/2000/09/xmldsig#',
+        'xades': 'http://uri.etsi.org/01903/v1.3.2#',
+        'cac': 'urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2',
+        'cbc': 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2',
+        'ext': 'urn:oasis:names:specification:ubl:schema:xsd:CommonExtensionComponents-2',
+    }
+    
+    def sign(self, certificate_pair, xml_invoice=None):
+        signer = InvoiceSign(
+            xml_invoice or make_ubl_invoice(), Certificate(*certificate_pair), signing_time='2025-08-05T07:21:10'
+        )
+        return signer, ET.fromstring(signer.get_invoice())
+    
+    def test_should_embed_signature_values(self, certificate_pair):
+        """Test the signature carries the hash, signature value, certificate and signing time."""
+        signer, root = self.sign(certificate_pair)
+        data = signer.certificate.data
+        
+        digests = [element.text for element in root.iterfind('.//ds:SignedInfo/ds:Reference/ds:DigestValue', self.NAMESPACES)]
+        assert digests[0] == signer.get_hash()
+        assert root.findtext('.//ds:SignatureValue', namespaces=self.NAMESPACES) == signer.get_signature()
+        assert root.findtext('.//ds:X509Certificate', namespaces=self.NAMESPACES) == data.get_raw_certificate()
+        assert root.findtext('.//xades:SigningTime', namespaces=self.NAMESPACES) == '2025-08-05T07:21:10'
+        assert root.findtext('.//xades:CertDigest/ds:DigestValue', namespaces=self.NAMESPACES) == data.get_digest_value()
+        assert root.findtext('.//ds:X509IssuerName', namespaces=self.NAMESPACES) == signer.certificate.get_formatted_issuer_dn()
+        assert root.findtext('.//ds:X509SerialNumber', namespaces=self.NAMESPACES) == str(
+            signer.certificate.get_certificate().serial_number
+        )
+        
+        signed_properties = re.search(
+            r'<xades:SignedProperties .*</xades:SignedProperties>', signer.get_invoice(), re.S
+        ).group(0)
+        assert digests[1] == base64.b64encode(
+            hashlib.sha256(signed_properties.encode('utf-8')).hexdigest().encode('ascii')
+        ).decode('ascii')
+    
+    def test_should_keep_invoice_hash(self, certificate_pair):
+        """Test the signed invoice hashes to the signed hash, and the signature verifies."""
+        signer, root = self.sign(certificate_pair)
+        signed_xml = signer.get_invoice()
+        
+        assert InvoiceHasher.hash(signed_xml.encode('utf-8')) == InvoiceHasher.hash(make_ubl_invoice().encode('utf-8'))
+        assert base64.b64encode(InvoiceHasher.hash(signed_xml.encode('utf-8'))).decode('ascii') == signer.get_hash()
+        signer.certificate.get_certificate().public_key().verify(
+            base64.b64decode(signer.get_signature()), base64.b64decode(signer.get_hash()), ec.ECDSA(hashes.SHA256())
+        )
+    
+    def test_should_add_qr_and_signature_references(self, certificate_pair):
+        """Test the QR reference and cac:Signature are added after the other document references."""
+        signer, root = self.sign(certificate_pair)
+        children = [child.tag.split('}')[1] for child in root]
+        references = root.findall('cac:AdditionalDocumentReference', self.NAMESPACES)
+        
+        assert children[0] == 'UBLExtensions'
+        assert [reference.findtext('cbc:ID', namespaces=self.NAMESPACES) for reference in references] == ['PIH', 'QR']
+        assert references[1].findtext('.//cbc:EmbeddedDocumentBinaryObject', namespaces=self.NAMESPACES) == signer.get_qr_code()
+        assert children.index('Signature') == children.index('AccountingSupplierParty') - 1
+    
+    def test_should_fill_placeholders(self, certificate_pair):
+        """Test existing UBLExtensions, QR reference and cac:Signature are reused, not duplicated."""
+        xml_invoice = make_ubl_invoice(placeholders=True)
+        signer, root = self.sign(certificate_pair, xml_invoice)
+        
+        assert len(root.findall('ext:UBLExtensions', self.NAMESPACES)) == 1
+        assert len(root.findall('cac:AdditionalDocumentReference', self.NAMESPACES)) == 2
+        assert len(root.findall('cac:Signature', self.NAMESPACES)) == 1
+        assert root.findtext('cac:AdditionalDocumentReference[2]//cbc:EmbeddedDocumentBinaryObject',
+                             namespaces=self.NAMESPACES) == signer.get_qr_code()
+        assert base64.b64encode(InvoiceHasher.hash(signer.get_invoice().encode('utf-8'))).decode('ascii') == signer.get_hash()
+    
+    def test_should_fill_placeholder_with_spaced_id(self, certificate_pair):
+        """Test a QR reference with whitespace around its ID is filled, not duplicated."""
+        xml_invoice = make_ubl_invoice(placeholders=True).replace('<cbc:ID>QR</cbc:ID>', '<cbc:ID> QR\n</cbc:ID>')
+        signer, root = self.sign(certificate_pair, xml_invoice)
+        
+        assert len(root.findall('cac:AdditionalDocumentReference', self.NAMESPACES)) == 2
+        assert root.findtext('cac:AdditionalDocumentReference[2]//cbc:EmbeddedDocumentBinaryObject',
+                             namespaces=self.NAMESPACES) == signer.get_qr_code()
+    
+    def test_should_put_invoice_fields_in_qr_code(self, certificate_pair):
+        """Test the QR code has tags 1 to 9 and verifies."""
+        signer, root = self.sign(certificate_pair)
+        tags = GenerateQrCode.from_base64(signer.get_qr_code()).data
+        
+        assert [tag.get_tag() for tag in tags] == list(range(1, 10))
+        assert [tag.get_value() for tag in tags[:5]] == [
+            'شركة سلة', '310461435700003', '2025-08-05T07:21:06', '230.00', '30.00'
+        ]
+        assert QrVerifier([signer.certificate]).verify(signer.get_qr_code()).valid
+    
+    def test_should_share_template_per_certificate(self, certificate_pair):
+        """Test the certificate parts of the signature are built once per certificate."""
+        first = SignatureTemplate.for_certificate(Certificate(*certificate_pair))
+        
+        assert SignatureTemplate.for_certificate(Certificate(*certificate_pair)) is first
+    
+    def test_should_default_signing_time_to_now(self, certificate_pair):
+        """Test the signing time is taken when the invoice is signed."""
+        signer = InvoiceSign(make_ubl_invoice(), Certificate(*certificate_pair))
+        assert signer.get_signing_time() is None
+        
+        signer.sign()
+        assert re.fullmatch(r'\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d', signer.get_signing_time())
@@ -0,0 +1,85 @@
+"""
+Tests for the payload store.
+"""
+
+import pytest
+from pyzatca import GenerateQrCode
+from pyzatca.payload_store import PayloadStore, PayloadStoreWriter
+from pyzatca.tags import Seller, TaxNumber, InvoiceDate, InvoiceTotalAmount, InvoiceTaxAmount
+
+
+def make_qr_code(total: int) -> GenerateQrCode:
+    return GenerateQrCode.from_array([
+        Seller('سلة'),
+        TaxNumber('1234567891'),
+        InvoiceDate('2021-07-12T14:25:09Z'),
+        InvoiceTotalAmount(f'{total}.00'),
+        InvoiceTaxAmount('15.00')
+    ])
+
+
+class TestPayloadStore:
+    """Test cases for PayloadStoreWriter and PayloadStore."""
+    
+    def test_should_round_trip_payloads(self, tmp_path):
+        """Test random access to payloads written out of order."""
+        path = str(tmp_path / 'payloads.pzqs')
+        numbers = [f'INV-{number:05d}' for number in (7, 3, 11, 1, 5)]
+        with PayloadStoreWriter(path) as writer:
+            for total, number in enumerate(numbers):
+                make_qr_code(total).to_store(writer, number)
+        
+        with PayloadStore(path) as store:
+            assert len(store) == 5
+            assert list(store.keys()) == sorted(numbers)
+            for total, number in enumerate(numbers):
+                view = store[number]
+                assert isinstance(view, memoryview)
+                assert view == make_qr_code(total).to_tlv_bytes()
+                assert store.get_qr_code(number).to_base64() == make_qr_code(total).to_base64()
+                assert store.get_image(number) is None
+                view.release()
+            assert 'INV-00002' not in store
+            assert store.get('INV-00002') is None
+            with pytest.raises(KeyError):
+                store['INV-00002']
+    
+    def test_should_store_images(self, tmp_path):
+        """Test SVG images are stored next to payloads."""
+        path = str(tmp_path / 'payloads.pzqs')
+        with PayloadStoreWriter(path, image_format='svg') as writer:
+            make_qr_code(100).to_store(writer, 42)
+        
+        with PayloadStore(path) as store:
+            assert store.image_format == 'svg'
+            image = store.get_image(42)
+            assert bytes(image).decode('utf-8') == make_qr_code(100).render_svg()
+            image.release()
+    
+    def test_should_not_publish_aborted_store(self, tmp_path):
+        """Test a failed write leaves no store behind."""
+        path = tmp_path / 'payloads.pzqs'
+        with pytest.raises(RuntimeError):
+            with PayloadStoreWriter(str(path)) as writer:
+                writer.add('1', b'\x01\x01a')
+                raise RuntimeError('interrupted')
+        
+        assert list(tmp_path.iterdir()) == []
+    
+    def test_should_reject_invalid_keys(self, tmp_path):
+        """Test duplicate and oversized invoice numbers."""
+        with PayloadStoreWriter(str(tmp_path / 'payloads.pzqs'), key_width=4) as writer:
+            writer.add('1', b'')
+            with pytest.raises(ValueError, match='duplicate invoice number'):
+                writer.add('1', b'')
+            with pytest.raises(ValueError, match='1 to 4 bytes'):
+                writer.add('12345', b'')
+            with pytest.raises(ValueError, match='no image format'):
+                writer.add('2', b'', b'png')
+    
+    def test_should_reject_other_files(self, tmp_path):
+        """Test opening a file that is not a store."""
+        path = tmp_path / 'other.bin'
+        path.write_bytes(b'x' * 64)
+        with pytest.raises(ValueError, match='not a payload store'):
+            PayloadStore(str(path))
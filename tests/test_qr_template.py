@@ -0,0 +1,65 @@
+"""
+Tests for QrTemplate class.
+"""
+
+import pytest
+from pyzatca import GenerateQrCode
+from pyzatca.qr_template import QrTemplate, qr_template
+from pyzatca.tags import (
+    Seller, TaxNumber, InvoiceDate, InvoiceTotalAmount, InvoiceTaxAmount,
+    InvoiceHash, InvoiceDigitalSignature, PublicKey, CertificateSignature
+)
+
+
+class TestQrTemplate:
+    """Test cases for QrTemplate class."""
+    
+    def test_should_match_phase_one_payload(self):
+        """Test template output matches the tag objects."""
+        template = GenerateQrCode.template(seller='سلة', tax_number='310461435700003')
+        expected = GenerateQrCode.from_array([
+            Seller('سلة'),
+            TaxNumber('310461435700003'),
+            InvoiceDate('2025-08-05T07:21:06Z'),
+            InvoiceTotalAmount('100.00'),
+            InvoiceTaxAmount('15.00'),
+        ])
+        
+        assert template.to_base64('2025-08-05T07:21:06Z', '100.00', '15.00') == expected.to_base64()
+        assert template.build('2025-08-05T07:21:06Z', '100.00', '15.00').to_tlv() == expected.to_tlv()
+    
+    def test_should_append_phase_two_tags(self):
+        """Test the optional Phase 2 tags."""
+        template = QrTemplate('Salla', '310461435700003')
+        expected = GenerateQrCode.from_array([
+            Seller('Salla'),
+            TaxNumber('310461435700003'),
+            InvoiceDate('2025-08-05T07:21:06Z'),
+            InvoiceTotalAmount('100.00'),
+            InvoiceTaxAmount('15.00'),
+            InvoiceHash('hash'),
+            InvoiceDigitalSignature('signature'),
+            PublicKey('key'),
+            CertificateSignature('certificate'),
+        ])
+        
+        assert template.to_tlv_bytes(
+            '2025-08-05T07:21:06Z', '100.00', '15.00',
+            invoice_hash='hash', invoice_signature='signature',
+            public_key='key', certificate_signature='certificate'
+        ) == expected.to_tlv_bytes()
+    
+    def test_should_cache_templates(self):
+        """Test repeated merchants share a template."""
+        qr_template.cache_clear()
+        first = GenerateQrCode.template('Salla', '310461435700003')
+        
+        assert GenerateQrCode.template('Salla', 310461435700003) is first
+        assert qr_template.cache_info().hits == 1
+    
+    def test_should_throw_exception_for_oversized_value(self):
+        """Test exception for values longer than 255 bytes."""
+        with pytest.raises(ValueError, match='must fit in one byte'):
+            QrTemplate('a' * 256, '310461435700003')
+        with pytest.raises(ValueError, match='must fit in one byte'):
+            QrTemplate('Salla', '310461435700003').to_base64('2025-08-05T07:21:06Z', '1' * 256, '15.00')
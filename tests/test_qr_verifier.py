@@ -0,0 +1,127 @@
+"""
+Tests for Phase 2 QR signature verification.
+"""
+
+import base64
+
+import pytest
+from pyzatca import (
+    Certificate, GenerateQrCode, InvoiceSign, InvoiceHash, InvoiceDigitalSignature, PublicKey, CertificateSignature
+)
+from pyzatca.qr_verifier import PublicKeyCache, QrVerifier, VerificationReport
+from tests.conftest import make_certificate_pair
+
+
+@pytest.fixture(scope='module')
+def certificate(certificate_pair):
+    return Certificate(*certificate_pair)
+
+
+def signed_payload(certificate, number: int = 0) -> str:
+    return InvoiceSign(f'<Invoice>{number}</Invoice>', certificate).get_qr_code()
+
+
+def replace_tag(payload: str, replacement) -> str:
+    tags = [tag for tag in GenerateQrCode.from_base64(payload).data if tag.tag != replacement.tag]
+    return GenerateQrCode.from_array(tags + [replacement]).to_base64()
+
+
+class TestQrVerifier:
+    """Test cases for QrVerifier."""
+    
+    def test_should_accept_signed_payloads(self, certificate):
+        """Test a payload from InvoiceSign verifies against a known certificate."""
+        result = QrVerifier([certificate]).verify(signed_payload(certificate), 'INV-1')
+        
+        assert result.invoice == 'INV-1'
+        assert result.valid and result.signature_valid and result.certificate_valid
+        assert result.error is None
+    
+    def test_should_leave_unknown_certificates_unchecked(self, certificate):
+        """Test tag 9 is not checked when the public key belongs to no known certificate."""
+        result = QrVerifier().verify(signed_payload(certificate))
+        
+        assert result.valid and result.signature_valid
+        assert result.certificate_valid is None
+    
+    def test_should_reject_tampered_hash(self, certificate):
+        """Test a signature over a different hash is rejected."""
+        other_hash = InvoiceSign('<Invoice>other</Invoice>', certificate).get_hash()
+        result = QrVerifier().verify(replace_tag(signed_payload(certificate), InvoiceHash(other_hash)))
+        
+        assert not result.valid and result.signature_valid is False
+        assert 'invoice signature' in result.error
+    
+    def test_should_reject_foreign_public_key(self, certificate):
+        """Test a signature checked against another key is rejected."""
+        other = Certificate(*make_certificate_pair('Other EGS'))
+        result = QrVerifier().verify(replace_tag(signed_payload(certificate), PublicKey(other.get_plain_public_key())))
+        
+        assert result.signature_valid is False
+    
+    def test_should_reject_wrong_certificate_signature(self, certificate):
+        """Test tag 9 must match the known certificate of the public key."""
+        payload = replace_tag(signed_payload(certificate), CertificateSignature('00' * 70))
+        result = QrVerifier([certificate.get_plain_certificate()]).verify(payload)
+        
+        assert result.signature_valid and result.certificate_valid is False
+        assert not result.valid
+    
+    def test_should_report_malformed_payloads(self, certificate):
+        """Test malformed payloads are reported instead of raising."""
+        verifier = QrVerifier()
+        phase_one = GenerateQrCode.from_array([InvoiceHash('abc')]).to_base64()
+        bad_signature = replace_tag(signed_payload(certificate), InvoiceDigitalSignature('not base64!'))
+        
+        for payload in ('***', phase_one, bad_signature):
+            result = verifier.verify(payload)
+            assert result.valid is False and result.signature_valid is None
+            assert result.error
+    
+    def test_should_cache_public_keys(self, certificate):
+        """Test each distinct public key is deserialized once."""
+        cache = PublicKeyCache()
+        verifier = QrVerifier(key_cache=cache)
+        for number in range(5):
+            verifier.verify(signed_payload(certificate, number))
+        
+        assert len(cache) == 1
+        assert (cache.hits, cache.misses) == (4, 1)
+    
+    def test_should_evict_least_recently_used_keys(self):
+        """Test the key cache keeps at most maxsize keys."""
+        cache = PublicKeyCache(maxsize=2)
+        keys = [base64.b64decode(Certificate(*make_certificate_pair(f'EGS {n}')).get_plain_public_key()) for n in range(3)]
+        for key in keys:
+            cache.get(key)
+        
+        assert len(cache) == 2
+        cache.get(keys[0])
+        assert cache.misses == 4
+    
+    def test_should_verify_many_in_order(self, certificate):
+        """Test batch verification keeps input order and fills the report."""
+        payloads = [(f'INV-{n}', signed_payload(certificate, n)) for n in range(20)]
+        payloads[7] = ('INV-7', replace_tag(payloads[7][1], InvoiceHash(InvoiceSign('<x/>', certificate).get_hash())))
+        report = VerificationReport()
+        
+        results = list(QrVerifier([certificate]).verify_many(payloads, workers=4, report=report))
+        
+        assert [result.invoice for result in results] == [invoice for invoice, _ in payloads]
+        assert [result.valid for result in results] == [n != 7 for n in range(20)]
+        assert report.to_dict()['total'] == 20
+        assert (report.valid, report.invalid_signatures, report.errors) == (19, 1, 0)
+        assert report.per_second > 0
+    
+    def test_should_audit_plain_payloads(self, certificate):
+        """Test audit() collects results and the report for bare payloads."""
+        results, report = QrVerifier().audit([signed_payload(certificate, n) for n in range(3)], workers=2)
+        
+        assert [result.invoice for result in results] == [None] * 3
+        assert report.valid == 3 and report.unknown_certificates == 3
+        assert report.end is not None
+    
+    def test_should_reject_non_positive_workers(self, certificate):
+        """Test workers must be positive."""
+        with pytest.raises(ValueError):
+            list(QrVerifier().verify_many([signed_payload(certificate)], workers=-1))
@@ -0,0 +1,212 @@
+"""
+Tests for the rendering module.
+"""
+
+import os
+
+import pytest
+from pyzatca import GenerateQrCode
+from pyzatca.rendering import RenderCache, render_png, qr_matrix, render_bitmap
+from pyzatca.tags import Seller, TaxNumber, InvoiceDate, InvoiceTotalAmount, InvoiceTaxAmount
+
+
+def make_qr_code(total: int) -> GenerateQrCode:
+    return GenerateQrCode.from_array([
+        Seller('سلة'),
+        TaxNumber('1234567891'),
+        InvoiceDate('2021-07-12T14:25:09Z'),
+        InvoiceTotalAmount(f'{total}.00'),
+        InvoiceTaxAmount('15.00')
+    ])
+
+
+class TestRenderPng:
+    """Test cases for render_png."""
+    
+    def test_should_render_png(self):
+        """Test PNG rendering of a payload."""
+        png = render_png(make_qr_code(100).to_base64())
+        assert png.startswith(b'\x89PNG')
+    
+    def test_should_apply_options(self):
+        """Test render options change the image."""
+        payload = make_qr_code(100).to_base64()
+        assert render_png(payload, {'box_size': 2}) != render_png(payload)
+
+
+class TestRenderMany:
+    """Test cases for GenerateQrCode.render_many."""
+    
+    def test_should_render_in_order(self):
+        """Test results match render and keep the input order."""
+        qr_codes = [make_qr_code(total) for total in range(100, 105)]
+        
+        images = list(GenerateQrCode.render_many(qr_codes, workers=2, chunk_size=2))
+        
+        assert images == [qr_code.render() for qr_code in qr_codes]
+    
+    def test_should_accept_base64_payloads(self):
+        """Test rendering plain base64 payloads."""
+        payload = make_qr_code(100).to_base64()
+        
+        images = list(GenerateQrCode.render_many([payload], workers=1))
+        
+        assert images == [make_qr_code(100).render()]
+    
+    def test_should_write_files_to_directory(self, tmp_path):
+        """Test writing rendered images into a directory."""
+        qr_codes = [make_qr_code(total) for total in range(100, 103)]
+        
+        paths = list(GenerateQrCode.render_many(
+            qr_codes, directory=str(tmp_path), names=['a.png', 'b.png', 'c.png'], workers=2, chunk_size=1
+        ))
+        
+        assert paths == [os.path.join(str(tmp_path), name) for name in ('a.png', 'b.png', 'c.png')]
+        with open(paths[1], 'rb') as f:
+            assert f.read() == render_png(qr_codes[1].to_base64())
+    
+    def test_should_default_file_names_to_index(self, tmp_path):
+        """Test default file names."""
+        paths = list(GenerateQrCode.render_many([make_qr_code(100)], directory=str(tmp_path), workers=1))
+        assert os.path.basename(paths[0]) == '00000000.png'
+    
+    def test_should_throw_exception_when_names_run_out(self, tmp_path):
+        """Test exception when fewer names than payloads are given."""
+        with pytest.raises(ValueError, match='fewer names than payloads'):
+            list(GenerateQrCode.render_many(
+                [make_qr_code(100), make_qr_code(101)], directory=str(tmp_path), names=['a.png'], workers=1
+            ))
+    
+    def test_should_throw_exception_for_invalid_chunk_size(self):
+        """Test exception for a non-positive chunk size."""
+        with pytest.raises(ValueError, match='chunk_size must be positive'):
+            list(GenerateQrCode.render_many([make_qr_code(100)], chunk_size=0))
+
+
+class TestMatrixTargets:
+    """Test cases for the PIL-free render targets."""
+    
+    def pil_bitmap(self, qr_code: GenerateQrCode) -> bytes:
+        from pyzatca.rendering import make_image
+        image = make_image(qr_code.to_base64(), {'box_size': 8}).get_image().convert('1')
+        # PIL stores white pixels as set bits
+        return bytes(byte ^ 0xFF for byte in image.tobytes())
+    
+    def test_should_render_svg(self):
+        """Test SVG rendering."""
+        qr_code = make_qr_code(100)
+        size = len(qr_matrix(qr_code.to_base64()))
+        
+        svg = qr_code.render_svg()
+        
+        assert svg.startswith('<svg xmlns="http://www.w3.org/2000/svg"')
+        assert f'viewBox="0 0 {size} {size}"' in svg
+        assert 'M4 4h7v1h-7z' in svg  # top-left finder pattern
+    
+    def test_should_build_independent_border_rows(self):
+        """Test changing one border row of the matrix leaves the others alone."""
+        matrix = qr_matrix(make_qr_code(100).to_base64())
+        
+        matrix[0][0] = True
+        
+        assert not any(matrix[1]) and not any(matrix[-1])
+    
+    def test_should_render_bitmap_like_pil(self):
+        """Test the raw bitmap matches the PIL image pixel for pixel."""
+        qr_code = make_qr_code(100)
+        
+        width, height, bitmap = render_bitmap(qr_code.to_base64(), {'box_size': 8})
+        
+        assert width == height == len(qr_matrix(qr_code.to_base64())) * 8
+        assert bitmap == self.pil_bitmap(qr_code)
+    
+    def test_should_pad_bitmap_rows(self):
+        """Test rows are padded to whole bytes."""
+        payload = make_qr_code(100).to_base64()
+        
+        width, height, bitmap = render_bitmap(payload, {'box_size': 1})
+        
+        assert width % 8 != 0
+        assert len(bitmap) == height * ((width + 7) // 8)
+    
+    def test_should_render_pbm(self, tmp_path):
+        """Test PBM rendering."""
+        qr_code = make_qr_code(100)
+        path = str(tmp_path / 'qr.pbm')
+        
+        pbm = qr_code.render_pbm(file_path=path)
+        
+        width, height, bitmap = render_bitmap(qr_code.to_base64())
+        assert pbm == b'P4\n%d %d\n' % (width, height) + bitmap
+        with open(path, 'rb') as f:
+            assert f.read() == pbm
+    
+    def test_should_render_escpos(self):
+        """Test ESC/POS raster command rendering."""
+        qr_code = make_qr_code(100)
+        
+        command = qr_code.render_escpos({'box_size': 6})
+        
+        width, height, bitmap = render_bitmap(qr_code.to_base64(), {'box_size': 6})
+        row_bytes = (width + 7) // 8
+        assert command[:4] == b'\x1dv0\x00'
+        assert command[4] + (command[5] << 8) == row_bytes
+        assert command[6] + (command[7] << 8) == height
+        assert command[8:] == bitmap
+
+
+class TestRenderCache:
+    """Test cases for RenderCache class."""
+    
+    def test_should_reuse_rendered_image(self, tmp_path):
+        """Test a repeated render is served from memory."""
+        cache = RenderCache(str(tmp_path))
+        qr_code = make_qr_code(100)
+        first = qr_code.render(cache=cache)
+        
+        assert qr_code.render(cache=cache) == first == qr_code.render()
+        assert (cache.memory_hits, cache.disk_hits, cache.misses) == (1, 0, 1)
+    
+    def test_should_key_on_options(self):
+        """Test different options are cached separately."""
+        cache = RenderCache()
+        qr_code = make_qr_code(100)
+        
+        assert qr_code.render({'box_size': 2}, cache=cache) != qr_code.render(cache=cache)
+        assert cache.misses == 2
+        assert RenderCache.key(qr_code.to_tlv_bytes(), {'border': 4}) == RenderCache.key(qr_code.to_tlv_bytes())
+    
+    def test_should_read_disk_tier(self, tmp_path):
+        """Test a new cache finds images written by an earlier one."""
+        qr_code = make_qr_code(100)
+        expected = qr_code.render(cache=RenderCache(str(tmp_path)))
+        cache = RenderCache(str(tmp_path), max_items=0)
+        file_path = str(tmp_path / 'qr.png')
+        
+        assert qr_code.render(file_path=file_path, cache=cache) == expected
+        assert cache.disk_hits == 1
+        with open(file_path, 'rb') as f:
+            assert f.read().startswith(b'\x89PNG')
+        assert not [name for name in os.listdir(tmp_path / RenderCache.key(qr_code.to_tlv_bytes())[:2])
+                    if name.endswith('.tmp')]
+    
+    def test_should_evict_least_recently_used_files(self, tmp_path):
+        """Test the disk tier stays under its size limit."""
+        png_size = len(render_png(make_qr_code(100).to_base64()))
+        cache = RenderCache(str(tmp_path), max_items=0, max_disk_bytes=png_size * 2 + png_size // 2)
+        for total in (100, 101, 102):
+            make_qr_code(total).render(cache=cache)
+        
+        assert cache.stats()['disk_files'] == 2
+        assert cache.evictions == 1
+        assert cache.get(RenderCache.key(make_qr_code(100).to_tlv_bytes())) is None
+        assert cache.get(RenderCache.key(make_qr_code(102).to_tlv_bytes())) is not None
+    
+    def test_should_clear(self, tmp_path):
+        """Test clearing both tiers."""
+        cache = RenderCache(str(tmp_path))
+        make_qr_code(100).render(cache=cache)
+        cache.clear()
+        
+        assert cache.stats()['disk_files'] == cache.stats()['memory_items'] == 0
+        assert RenderCache(str(tmp_path)).stats()['disk_files'] == 0
@@ -0,0 +1,148 @@
+"""
+Tests for certificates that follow their files on disk.
+"""
+
+import os
+import threading
+import time
+
+import pytest
+from pyzatca.helpers import Certificate, RotatingCertificate
+from pyzatca.models.invoice_sign import InvoiceSign
+from tests.conftest import make_certificate_pair, make_ubl_invoice
+
+
+@pytest.fixture(scope='module')
+def certificate_pairs():
+    return [make_certificate_pair(f'EGS {number}') for number in range(2)]
+
+
+def replace_file(path, content):
+    """Write a file next to the target and move it into place, as a renewal would."""
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(temporary, path)
+
+
+@pytest.fixture
+def paths(tmp_path, certificate_pairs):
+    certificate_path, key_path = str(tmp_path / 'csid.pem'), str(tmp_path / 'csid.key')
+    replace_file(certificate_path, certificate_pairs[0][0])
+    replace_file(key_path, certificate_pairs[0][1])
+    return certificate_path, key_path
+
+
+class TestRotatingCertificate:
+    """Test cases for RotatingCertificate."""
+    
+    def test_should_load_current_certificate(self, paths, certificate_pairs):
+        """Test the files are loaded up front and nothing changes without a rotation."""
+        source = RotatingCertificate(*paths, start=False)
+        
+        assert isinstance(source.current(), Certificate)
+        assert source.current().get_plain_certificate() == certificate_pairs[0][0]
+        assert source.check() is False
+        assert source.rotations == 0
+    
+    def test_should_swap_renewed_certificate(self, paths, certificate_pairs):
+        """Test replaced files swap in a new certificate while the old object stays usable."""
+        rotated = []
+        source = RotatingCertificate(*paths, start=False, on_rotate=lambda old, new: rotated.append((old, new)))
+        previous = source.current()
+        
+        replace_file(paths[0], certificate_pairs[1][0])
+        replace_file(paths[1], certificate_pairs[1][1])
+        assert source.check() is True
+        
+        assert source.current().get_plain_certificate() == certificate_pairs[1][0]
+        assert rotated == [(previous, source.current())]
+        assert previous.get_plain_certificate() == certificate_pairs[0][0]
+        assert source.rotations == 1 and source.errors == 0
+    
+    def test_should_keep_polling_when_callback_fails(self, paths, certificate_pairs):
+        """Test an exception from on_rotate is recorded and later rotations still happen."""
+        def on_rotate(old, new):
+            raise RuntimeError('callback failed')
+        
+        with RotatingCertificate(*paths, interval=0.01, on_rotate=on_rotate) as source:
+            for number in (1, 0):
+                rotations = source.rotations
+                replace_file(paths[1], certificate_pairs[number][1])
+                replace_file(paths[0], certificate_pairs[number][0])
+                deadline = time.monotonic() + 5
+                while source.rotations == rotations and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                assert source.current().get_plain_certificate() == certificate_pairs[number][0]
+            assert source._thread.is_alive()
+        assert isinstance(source.last_error, RuntimeError)
+        assert source.errors >= 2
+    
+    def test_should_keep_old_certificate_until_key_matches(self, paths, certificate_pairs):
+        """Test a certificate renewed before its key is not used until the key follows."""
+        source = RotatingCertificate(*paths, start=False)
+        
+        replace_file(paths[0], certificate_pairs[1][0])
+        assert source.check() is False
+        assert source.current().get_plain_certificate() == certificate_pairs[0][0]
+        assert source.errors == 1
+        assert 'does not match' in str(source.last_error)
+        
+        replace_file(paths[1], certificate_pairs[1][1])
+        assert source.check() is True
+        assert source.current().get_plain_certificate() == certificate_pairs[1][0]
+    
+    def test_should_keep_old_certificate_when_files_are_missing(self, paths):
+        """Test a missing file is counted as an error instead of raising."""
+        source = RotatingCertificate(*paths, start=False)
+        os.remove(paths[1])
+        
+        assert source.check() is False
+        assert isinstance(source.last_error, FileNotFoundError)
+        assert source.current() is not None
+    
+    def test_should_raise_for_invalid_initial_files(self, paths, certificate_pairs):
+        """Test a mismatched pair is rejected when the source is created."""
+        replace_file(paths[1], certificate_pairs[1][1])
+        
+        with pytest.raises(ValueError):
+            RotatingCertificate(*paths, start=False)
+    
+    def test_should_rotate_in_background(self, paths, certificate_pairs):
+        """Test the polling thread picks up renewed files and stops on close."""
+        with RotatingCertificate(*paths, interval=0.01) as source:
+            replace_file(paths[1], certificate_pairs[1][1])
+            replace_file(paths[0], certificate_pairs[1][0])
+            deadline = time.monotonic() + 5
+            while source.rotations == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert source.current().get_plain_certificate() == certificate_pairs[1][0]
+        assert source._thread is None
+    
+    def test_should_finish_signing_with_old_certificate(self, paths, certificate_pairs):
+        """Test a signer created before a rotation keeps the certificate it started with."""
+        source = RotatingCertificate(*paths, start=False)
+        signer = InvoiceSign(make_ubl_invoice(), source)
+        
+        replace_file(paths[0], certificate_pairs[1][0])
+        replace_file(paths[1], certificate_pairs[1][1])
+        assert source.check() is True
+        
+        signed = signer.get_invoice()
+        assert signer.certificate.get_plain_certificate() == certificate_pairs[0][0]
+        assert signer.certificate.data.get_raw_certificate() in signed
+        assert InvoiceSign(make_ubl_invoice(), source).certificate is source.current()
+    
+    def test_should_not_block_readers_during_reload(self, paths, certificate_pairs):
+        """Test readers get a certificate while a reload is in progress."""
+        source = RotatingCertificate(*paths, start=False)
+        replace_file(paths[0], certificate_pairs[1][0])
+        replace_file(paths[1], certificate_pairs[1][1])
+        
+        checking = threading.Thread(target=source.check)
+        with source._lock:
+            checking.start()
+            # The checker waits on the lock, readers do not
+            assert source.current().get_plain_certificate() == certificate_pairs[0][0]
+        checking.join()
+        assert source.current().get_plain_certificate() == certificate_pairs[1][0]
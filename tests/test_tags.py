@@ -2,8 +2,14 @@
 Tests for Tag classes.
 """
 
+import pickle
+
 import pytest
-from pyzatca.tags import Tag, Seller, TaxNumber, InvoiceDate, InvoiceTotalAmount, InvoiceTaxAmount
+from pyzatca.tags import (
+    Tag, Seller, TaxNumber, InvoiceDate, InvoiceTotalAmount, InvoiceTaxAmount,
+    InvoiceHash, InvoiceDigitalSignature, PublicKey, CertificateSignature,
+    TAG_CLASSES, make_tag
+)
 
 
 class TestTag:
@@ -32,6 +38,47 @@ class TestTag:
         """Test tag with numeric values."""
         tag = Tag(1, 123)
         assert tag.get_value() == '123'
+    
+    def test_should_convert_to_bytes(self):
+        """Test tag to bytes conversion."""
+        assert Tag(1, 'test').to_bytes() == b'\x01\x04test'
+        assert Tag(1, 'سلة').to_bytes() == b'\x01\x06' + 'سلة'.encode('utf-8')
+    
+    def test_should_encode_long_length_as_single_byte(self):
+        """Test lengths above 127 are written as one raw byte."""
+        tag = Tag(8, 'a' * 200)
+        assert tag.to_bytes()[:2] == b'\x08\xc8'
+        assert len(tag.to_bytes()) == 202
+    
+    def test_should_throw_exception_for_oversized_value(self):
+        """Test exception for values longer than 255 bytes."""
+        with pytest.raises(ValueError, match='must fit in one byte'):
+            Tag(1, 'a' * 256)
+        with pytest.raises(ValueError, match='must fit in one byte'):
+            Seller('ب' * 128)
+        with pytest.raises(ValueError, match='must fit in one byte'):
+            Tag(256, 'test')
+    
+    def test_should_be_immutable(self):
+        """Test tags cannot be changed and carry no instance dict."""
+        tag = Seller('Salla')
+        with pytest.raises(AttributeError, match='immutable'):
+            tag.value = 'Other'
+        assert not hasattr(tag, '__dict__')
+        assert tag.tag == 1 and tag.value == 'Salla'
+    
+    def test_should_compare_by_class_and_value(self):
+        """Test equality and hashing of tags."""
+        assert Seller('Salla') == Seller('Salla')
+        assert hash(Seller('Salla')) == hash(Seller('Salla'))
+        assert Seller('Salla') != Seller('Other')
+        assert Seller('Salla') != Tag(1, 'Salla')
+    
+    def test_should_pickle(self):
+        """Test tags survive pickling with their class."""
+        tag = pickle.loads(pickle.dumps(InvoiceTotalAmount('100.00')))
+        assert type(tag) is InvoiceTotalAmount
+        assert tag.to_bytes() == b'\x04\x06100.00'
 
 
 class TestSeller:
@@ -81,4 +128,36 @@ class TestInvoiceTaxAmount:
         """Test invoice tax amount tag creation."""
         tax_amount = InvoiceTaxAmount('15.00')
         assert tax_amount.get_tag() == 5
-        assert tax_amount.get_value() == '15.00' 
\ No newline at end of file
+        assert tax_amount.get_value() == '15.00'
+
+
+class TestPhaseTwoTags:
+    """Test cases for Phase 2 tags."""
+    
+    def test_should_use_zatca_tag_numbers(self):
+        """Test Phase 2 tags follow the ZATCA numbering."""
+        assert InvoiceHash('hash').get_tag() == 6
+        assert InvoiceDigitalSignature('signature').get_tag() == 7
+        assert PublicKey('key').get_tag() == 8
+        assert CertificateSignature('signature').get_tag() == 9
+
+
+class TestRegistry:
+    """Test cases for the tag registry."""
+    
+    def test_should_register_every_tag_number_once(self):
+        """Test each registered class matches its tag number."""
+        for number, tag_class in TAG_CLASSES.items():
+            assert tag_class('value').get_tag() == number
+    
+    def test_should_make_registered_tag(self):
+        """Test creating a tag from its number."""
+        tag = make_tag(1, 'Salla')
+        assert isinstance(tag, Seller)
+        assert tag.get_value() == 'Salla'
+    
+    def test_should_make_plain_tag_for_unknown_number(self):
+        """Test unknown tag numbers fall back to Tag."""
+        tag = make_tag(42, 'value')
+        assert type(tag) is Tag
+        assert tag.get_tag() == 42